@@ -0,0 +1,201 @@
+"""
+Vectorized backtests of drift-band rebalancing policies
+
+A policy is a target allocation (percent per asset), a drift band
+(percent) and a check frequency (every n periods). On a check date, if
+any asset has drifted from its target by more than the band, the whole
+portfolio is traded back to target, which is the self-financing version of
+generate_rebalancing_recommendations. band=0 is calendar rebalancing and
+band=inf is buy-and-hold. Trading costs are `cost_bps` of traded notional.
+
+Every policy in a grid is simulated together: the state is a (configs x
+assets) weight matrix stepped through the price history once, so one pass
+costs O(periods x configs x assets) NumPy work. Large grids are split into
+chunks and run on a process pool.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rebalancer import DEFAULT_BAND
+from risk import RISK_METRIC_NAMES, TRADING_DAYS, batch_risk_metrics
+
+DEFAULT_CHUNK_SIZE = 250
+SUMMARY_COLUMNS = (['config', 'target', 'band', 'frequency', 'cost_bps', 'final_value', 'total_return',
+                    'rebalances', 'turnover', 'annual_turnover', 'costs'] + RISK_METRIC_NAMES)
+
+_worker_state = {}
+
+
+def price_matrix(prices) -> Tuple[np.ndarray, List[str]]:
+    """(periods x assets) closes and asset names from a DataFrame or array; rows with gaps are dropped"""
+    if hasattr(prices, 'to_numpy'):
+        prices = prices.dropna()
+        return prices.to_numpy(dtype=np.float64), [str(c) for c in prices.columns]
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[~np.isnan(prices).any(axis=1)]
+    return prices, [str(i) for i in range(prices.shape[1])]
+
+
+def target_matrix(targets: Sequence, assets: Sequence[str]) -> np.ndarray:
+    """(configs x assets) target fractions from dicts (percent by asset) or percent rows"""
+    rows = []
+    for target in targets:
+        if isinstance(target, dict):
+            unknown = set(target) - set(assets)
+            if unknown:
+                raise ValueError(f"No price history for target assets: {', '.join(sorted(unknown))}")
+            target = [target.get(a, 0.0) for a in assets]
+        rows.append(np.asarray(target, dtype=np.float64))
+    matrix = np.vstack(rows)
+    totals = matrix.sum(axis=1, keepdims=True)
+    if np.any(totals <= 0):
+        raise ValueError("Every target allocation needs a positive total")
+    return matrix / totals
+
+
+def parameter_grid(targets: Sequence, bands: Iterable[float] = (DEFAULT_BAND,),
+                   frequencies: Iterable[int] = (1,), costs_bps: Iterable[float] = (0.0,)) -> Dict[str, list]:
+    """Cartesian product of policy parameters as columns; `target` holds the index into `targets`"""
+    grid = {'target': [], 'band': [], 'frequency': [], 'cost_bps': []}
+    for t, band, frequency, cost in itertools.product(range(len(targets)), bands, frequencies, costs_bps):
+        grid['target'].append(t)
+        grid['band'].append(float(band))
+        grid['frequency'].append(int(frequency))
+        grid['cost_bps'].append(float(cost))
+    return grid
+
+
+def simulate(prices: np.ndarray, targets: np.ndarray, bands, frequencies, costs_bps,
+             initial_value: float = 1.0, keep_equity: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Step every policy through the price history at once
+    `prices` is (periods x assets); `targets` (configs x assets) fractions;
+    bands (percent), frequencies (periods) and costs_bps broadcast to one
+    value per config. Portfolios start at target weights. Returns per-config
+    arrays of rebalance counts, turnover (sum of one-way traded fractions of
+    equity) and costs, and the (periods x configs) equity curve when
+    `keep_equity`; otherwise only the period returns needed for risk metrics.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    targets = np.atleast_2d(np.asarray(targets, dtype=np.float64))
+    n_configs = targets.shape[0]
+    bands = np.broadcast_to(np.asarray(bands, dtype=np.float64), (n_configs,)) / 100
+    frequencies = np.broadcast_to(np.asarray(frequencies, dtype=np.int64), (n_configs,))
+    cost_rate = np.broadcast_to(np.asarray(costs_bps, dtype=np.float64), (n_configs,)) / 10_000
+    if np.any(frequencies < 1):
+        raise ValueError("Rebalance frequency must be at least 1 period")
+
+    growth = prices[1:] / prices[:-1]
+    n_periods = growth.shape[0]
+    weights = targets.copy()
+    equity = np.full(n_configs, float(initial_value))
+    curve = np.empty((n_periods + 1, n_configs))
+    curve[0] = equity
+    rebalances = np.zeros(n_configs, dtype=np.int64)
+    turnover = np.zeros(n_configs)
+    costs = np.zeros(n_configs)
+
+    for t in range(n_periods):
+        values = weights * growth[t]
+        period_growth = values.sum(axis=1)
+        weights = values / period_growth[:, None]
+        equity = equity * period_growth
+
+        due = ((t + 1) % frequencies) == 0
+        if due.any():
+            drift = np.abs(weights - targets)
+            trade = due & (drift > bands[:, None]).any(axis=1)
+            if trade.any():
+                traded = 0.5 * drift[trade].sum(axis=1)
+                cost = equity[trade] * traded * 2 * cost_rate[trade]
+                equity[trade] -= cost
+                costs[trade] += cost
+                turnover[trade] += traded
+                rebalances[trade] += 1
+                weights[trade] = targets[trade]
+        curve[t + 1] = equity
+
+    result = {'rebalances': rebalances, 'turnover': turnover, 'costs': costs, 'final_value': equity}
+    if keep_equity:
+        result['equity'] = curve
+    result['returns'] = curve[1:] / curve[:-1] - 1
+    return result
+
+
+def summarize(result: Dict[str, np.ndarray], grid: Dict[str, list], periods_per_year: float = TRADING_DAYS,
+              initial_value: float = 1.0, offset: int = 0):
+    """One row per config: parameters, final value, turnover, costs and risk metrics of the equity returns"""
+    import pandas as pd
+    returns = result['returns']
+    n_periods = returns.shape[0]
+    risk = batch_risk_metrics(returns.T, periods_per_year=periods_per_year)
+    years = n_periods / periods_per_year if n_periods else float('nan')
+    frame = pd.DataFrame({
+        'config': np.arange(offset, offset + len(result['final_value'])),
+        'target': grid['target'],
+        'band': grid['band'],
+        'frequency': grid['frequency'],
+        'cost_bps': grid['cost_bps'],
+        'final_value': result['final_value'],
+        'total_return': result['final_value'] / initial_value - 1,
+        'rebalances': result['rebalances'],
+        'turnover': result['turnover'],
+        'annual_turnover': result['turnover'] / years,
+        'costs': result['costs'],
+        **{name: risk[name] for name in RISK_METRIC_NAMES},
+    }, columns=SUMMARY_COLUMNS)
+    return frame
+
+
+def _init_worker(prices: np.ndarray, targets: np.ndarray, periods_per_year: float, initial_value: float) -> None:
+    """Install the price history and target table once per worker process"""
+    _worker_state.update(prices=prices, targets=targets, periods_per_year=periods_per_year,
+                         initial_value=initial_value)
+
+
+def _run_chunk(grid: Dict[str, list], offset: int):
+    state = _worker_state
+    result = simulate(state['prices'], state['targets'][grid['target']], grid['band'], grid['frequency'],
+                      grid['cost_bps'], state['initial_value'], keep_equity=False)
+    return summarize(result, grid, state['periods_per_year'], state['initial_value'], offset)
+
+
+def run_grid(prices, targets: Sequence, bands: Iterable[float] = (DEFAULT_BAND,),
+             frequencies: Iterable[int] = (1,), costs_bps: Iterable[float] = (0.0,),
+             periods_per_year: float = TRADING_DAYS, initial_value: float = 1.0,
+             workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Backtest every combination of targets, bands, frequencies and costs
+    `prices` is a (dates x assets) DataFrame or array of closes; `targets`
+    a list of allocations (dicts of percent by asset, or percent rows).
+    Chunks of `chunk_size` configs are vectorized; with more than one chunk
+    and workers != 1 they run on a process pool. Returns the summary
+    DataFrame, one row per config in grid order.
+    """
+    import pandas as pd
+    matrix, assets = price_matrix(prices)
+    if matrix.shape[0] < 2:
+        raise ValueError("Need at least two periods of prices")
+    target_table = target_matrix(targets, assets)
+    grid = parameter_grid(targets, bands, frequencies, costs_bps)
+    n_configs = len(grid['target'])
+    chunks = [({k: v[i:i + chunk_size] for k, v in grid.items()}, i) for i in range(0, n_configs, chunk_size)]
+    initargs = (matrix, target_table, periods_per_year, initial_value)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(*initargs)
+        try:
+            parts = [_run_chunk(*chunk) for chunk in chunks]
+        finally:
+            # In-process runs share the module; don't keep the price history alive after returning
+            _worker_state.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=initargs) as pool:
+            parts = list(pool.map(_run_chunk, *zip(*chunks)))
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,59 @@
+"""
+Benchmark: batch CLI throughput, serial vs process pool
+
+Writes synthetic holdings, a price table and a year of stored history to a
+temporary directory, then runs portfolio_core.batch with one worker and
+with a pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_cli
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from portfolio_core.batch import run_batch
+from price_store import PriceStore
+
+
+def write_inputs(root: str, n_portfolios: int, n_assets: int, positions: int, days: int, seed: int):
+    rng = np.random.default_rng(seed)
+    assets = np.array([f"coin-{i}" for i in range(n_assets)])
+    picks = rng.integers(0, n_assets, size=(n_portfolios, positions))
+    holdings = pd.DataFrame({
+        'portfolio_id': np.repeat(np.arange(n_portfolios), positions),
+        'asset': assets[picks.ravel()],
+        'quantity': rng.uniform(1, 100, n_portfolios * positions),
+        'cost_basis': rng.uniform(100, 10_000, n_portfolios * positions),
+        'target_weight': 100 / positions,
+    })
+    holdings.to_csv(os.path.join(root, 'portfolios.csv'), index=False)
+
+    closes = 100 * np.cumprod(1 + rng.normal(0.0005, 0.02, size=(days, n_assets)), axis=0)
+    pd.DataFrame({'id': assets, 'current_price': closes[-1]}).to_csv(os.path.join(root, 'prices.csv'), index=False)
+    store = PriceStore(os.path.join(root, 'store'))
+    dates = np.datetime64('2024-01-01') + np.arange(days)
+    for j, asset in enumerate(assets):
+        store.append(asset, dates, closes[:, j])
+
+
+def run(n_portfolios: int = 20_000, n_assets: int = 500, positions: int = 8, days: int = 252, seed: int = 42):
+    with tempfile.TemporaryDirectory() as root:
+        write_inputs(root, n_portfolios, n_assets, positions, days, seed)
+        kwargs = dict(prices_path=os.path.join(root, 'prices.csv'), store_root=os.path.join(root, 'store'),
+                      progress=False)
+        serial = run_batch(os.path.join(root, 'portfolios.csv'), os.path.join(root, 'serial.csv'),
+                           workers=1, **kwargs)
+        pooled = run_batch(os.path.join(root, 'portfolios.csv'), os.path.join(root, 'pooled.csv'), **kwargs)
+        assert pd.read_csv(os.path.join(root, 'serial.csv')).equals(pd.read_csv(os.path.join(root, 'pooled.csv')))
+
+    print(f"{n_portfolios} portfolios x {positions} positions over {n_assets} assets, {days} days of history")
+    for label, summary in (('1 worker', serial), (f"{pooled['workers']} workers", pooled)):
+        timings = ', '.join(f"{k} {v:.2f}s" for k, v in summary['timings'].items())
+        print(f"{label:10} {summary['seconds']:7.2f}s  {summary['portfolios_per_sec']:9,.0f} portfolios/sec  ({timings})")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,38 @@
+"""
+Benchmark: batched risk metrics vs looping calculate_risk_metrics
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_risk
+"""
+import time
+
+import numpy as np
+
+from portfolio_analyzer import PortfolioAnalyzer
+from risk import batch_risk_metrics, RISK_METRIC_NAMES
+
+
+def run(n_series: int = 5000, n_days: int = 252, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.001, 0.02, size=(n_series, n_days))
+    analyzer = PortfolioAnalyzer()
+
+    start = time.perf_counter()
+    looped = [analyzer.calculate_risk_metrics(row) for row in returns]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = batch_risk_metrics(returns)
+    batch_time = time.perf_counter() - start
+
+    for name in RISK_METRIC_NAMES:
+        expected = np.array([m[name] for m in looped])
+        assert np.allclose(expected, batched[name]), name
+
+    print(f"{n_series} series x {n_days} days")
+    print(f"Loop:    {loop_time:8.3f}s")
+    print(f"Batched: {batch_time:8.3f}s  ({loop_time / batch_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,66 @@
+"""
+Benchmark: concurrent pooled quote fetching vs serial per-symbol requests
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk_fetch
+"""
+import time
+
+import requests
+
+from benchmarks.mock_market_server import MockMarketServer
+from market_cache import QuoteCache
+from market_transport import PooledTransport, TokenBucket
+from portfolio_analyzer import PortfolioAnalyzer
+
+
+def serial_fetch(base_url: str, symbols):
+    """The previous behaviour: one un-pooled requests.get per symbol"""
+    quotes = {}
+    for symbol in symbols:
+        params = {'function': 'GLOBAL_QUOTE', 'symbol': symbol, 'apikey': 'demo'}
+        response = requests.get(base_url, params=params, timeout=10)
+        response.raise_for_status()
+        quotes[symbol] = response.json()['Global Quote']
+    return quotes
+
+
+def run(n_symbols: int = 200, n_coins: int = 1000, latency: float = 0.02, workers: int = 16):
+    symbols = [f"SYM{i:04d}" for i in range(n_symbols)]
+    coins = [f"coin-{i}" for i in range(n_coins)]
+
+    with MockMarketServer(latency=latency) as server:
+        start = time.perf_counter()
+        serial_fetch(f"{server.url}/query", symbols)
+        serial_time = time.perf_counter() - start
+
+    # The pooled run also absorbs a failure every 50 requests through retries
+    with MockMarketServer(latency=latency, fail_every=50) as server:
+        # Mock server has no rate limit, so give the buckets generous budgets
+        transport = PooledTransport(pool_size=workers, backoff=0.01, rate_limits={
+            'alphavantage': TokenBucket(rate=10000, capacity=1000),
+            'coingecko': TokenBucket(rate=10000, capacity=1000),
+        })
+        analyzer = PortfolioAnalyzer(cache=QuoteCache(), transport=transport)
+        analyzer.coingecko_base = server.url
+        analyzer.alpha_vantage_base = f"{server.url}/query"
+
+        start = time.perf_counter()
+        result = analyzer.fetch_stock_data_many(symbols, max_workers=workers)
+        pooled_time = time.perf_counter() - start
+
+        server.requests.clear()
+        start = time.perf_counter()
+        crypto = analyzer.fetch_crypto_data(coins)
+        crypto_time = time.perf_counter() - start
+        pages = len(server.requested_ids())
+
+    print(f"{n_symbols} symbols, {latency * 1000:.0f}ms mock latency")
+    print(f"Serial requests.get: {serial_time:8.3f}s")
+    print(f"Pooled x{workers}:        {pooled_time:8.3f}s  ({serial_time / pooled_time:.1f}x faster)")
+    print(f"  quotes: {len(result['quotes'])}, errors: {len(result['errors'])}, retries: {transport.retries}")
+    print(f"{n_coins} coins in {pages} pages: {crypto_time:.3f}s, {len(crypto)} rows")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,96 @@
+"""
+Benchmark: bytes the dashboard sends to the browser, default vs large-portfolio rendering
+
+Plotly figures are measured as their JSON spec (what st.plotly_chart
+ships) and tables as the Arrow IPC stream st.dataframe serializes, for a
+5,000-holding book and a 50,000-day rolling-risk history.
+
+Run from the repository root:
+    python -m benchmarks.bench_dashboard_payload
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from charts import (ALLOCATION_TOP_N, MAX_CHART_POINTS, TABLE_PAGE_SIZE, allocation_pie, holdings_table,
+                    page_slice, rolling_risk_figures)
+from holdings import holdings_from_records
+from rolling_risk import rolling_risk_metrics
+
+
+def book(n_holdings: int, seed: int):
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(8, 2, n_holdings)
+    weights = values / values.sum() * 100
+    return holdings_from_records({'asset': f"coin-{i}", 'quantity': float(q), 'cost_basis': float(v * 0.9),
+                                  'value': float(v), 'weight': float(w)}
+                                 for i, (q, v, w) in enumerate(zip(rng.uniform(0.1, 100, n_holdings),
+                                                                   values, weights)))
+
+
+def formatted_table(holdings) -> pd.DataFrame:
+    """The composition table as it was built before: one Python-formatted string per cell"""
+    return pd.DataFrame([{
+        'Asset': h['asset'].upper(),
+        'Quantity': h['quantity'],
+        'Value': f"${h['value']:,.2f}",
+        'Weight': f"{h['weight']:.1f}%",
+        'P&L': f"${h['value'] - h['cost_basis']:,.2f}"
+    } for h in holdings])
+
+
+def arrow_bytes(frame: pd.DataFrame) -> int:
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def figure_bytes(figures) -> int:
+    return sum(len(fig.to_json()) for fig in figures)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def report(name: str, before: int, after: int, before_time: float, after_time: float) -> None:
+    print(f"{name:<22} {before / 1024:>10,.1f} KiB {after / 1024:>10,.1f} KiB {before / after:>8.1f}x "
+          f"{before_time * 1000:>9.1f} ms {after_time * 1000:>9.1f} ms")
+
+
+def run(n_holdings: int = 5_000, n_days: int = 50_000, windows=(30, 90, 252), seed: int = 42):
+    holdings = book(n_holdings, seed)
+    labels = [h['asset'].upper() for h in holdings]
+    values = [h['value'] for h in holdings]
+
+    print(f"{n_holdings:,} holdings, {n_days:,} days of returns, windows {', '.join(map(str, windows))}")
+    print(f"{'':<22} {'default':>14} {'large mode':>14} {'smaller':>9} {'default':>12} {'large mode':>12}")
+    allocation_pie(labels[:2], values[:2], None)  # import plotly outside the timings
+
+    full_pie, full_time = timed(allocation_pie, labels, values, None)
+    top_pie, top_time = timed(allocation_pie, labels, values, ALLOCATION_TOP_N)
+    report(f"Allocation pie (top {ALLOCATION_TOP_N})", figure_bytes([full_pie]), figure_bytes([top_pie]),
+           full_time, top_time)
+
+    returns = np.random.default_rng(seed).normal(0.0005, 0.02, n_days)
+    rolling = rolling_risk_metrics(returns, windows)
+    full_lines, full_time = timed(rolling_risk_figures, rolling, None)
+    webgl_lines, webgl_time = timed(rolling_risk_figures, rolling, MAX_CHART_POINTS)
+    report(f"Rolling risk (LTTB {MAX_CHART_POINTS})", figure_bytes(full_lines.values()),
+           figure_bytes(webgl_lines.values()), full_time, webgl_time)
+
+    strings, string_time = timed(formatted_table, holdings)
+    numeric, numeric_time = timed(holdings_table, holdings, True)
+    report("Holdings table", arrow_bytes(strings), arrow_bytes(numeric), string_time, numeric_time)
+    report(f"  one {TABLE_PAGE_SIZE}-row page", arrow_bytes(strings), arrow_bytes(numeric.iloc[page_slice(1)]),
+           string_time, numeric_time)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+"""
+Benchmark: memory and speed of Holding objects vs holding dicts
+
+Builds the same book as dicts and as slotted Holding objects, with asset
+ids interned in an AssetTable, then reports traced memory, a full GC pass
+(also after gc.freeze(), as the batch CLI does) and the
+calculate_portfolio_metrics / generate_rebalancing_recommendations time.
+
+Run from the repository root:
+    python -m benchmarks.bench_holding_memory
+"""
+import gc
+import time
+import tracemalloc
+
+from benchmarks import synthetic
+from holdings import AssetTable, holdings_from_records
+from instrumentation import MetricsRegistry
+from portfolio_core import PortfolioAnalyzer
+
+
+def traced(build):
+    """Result of build() and the memory it still holds (MB)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current / 1e6
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(n_holdings: int = 1_000_000, n_assets: int = 5_000):
+    analyzer = PortfolioAnalyzer(metrics=MetricsRegistry())
+    # Assets ids are built per record, as they would be when parsed from a file
+    records = synthetic.holdings(n_holdings, n_assets)
+    targets = synthetic.target_weights([f"coin-{i}" for i in range(n_assets)])
+
+    builders = (
+        ('dict', lambda: [{k: (''.join(v) if k == 'asset' else v) for k, v in r.items()} for r in records]),
+        ('Holding', lambda: holdings_from_records(records, table)),
+    )
+    table = AssetTable()
+    print(f"{n_holdings:,} holdings over {n_assets:,} assets")
+    print(f"{'':10} {'memory':>10} {'gc.collect':>11} {'frozen':>8} {'metrics':>9} {'rebalance':>10}")
+    memory = {}
+    for label, build in builders:
+        # One book alive at a time so the GC pass only walks that book
+        book, memory[label] = traced(build)
+        gc_time = timed(gc.collect)
+        gc.freeze()
+        frozen_time = timed(gc.collect)
+        gc.unfreeze()
+        metrics_time = timed(analyzer.calculate_portfolio_metrics, book)
+        rebalance_time = timed(analyzer.generate_rebalancing_recommendations, book, targets)
+        print(f"{label:10} {memory[label]:8.1f}MB {gc_time:10.3f}s {frozen_time:7.3f}s {metrics_time:8.3f}s {rebalance_time:9.3f}s")
+        del book
+    print(f"Holding uses {memory['dict'] / memory['Holding']:.1f}x less memory "
+          f"({len(table):,} interned asset ids)")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,59 @@
+"""
+Benchmark: start-up cost of importing the analytics engine
+
+Each statement is imported in a fresh interpreter under `python -X importtime`
+and the top-level cumulative times are summed. The baseline is exactly the
+module-level imports of the original single-file portfolio_analyzer.py
+(requests and pandas at the top), which is what `import portfolio_analyzer`
+cost before the engine moved to portfolio_core with lazy imports.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    'original portfolio_analyzer': ('import requests, pandas, numpy, json, time; '
+                                    'from datetime import datetime, timedelta; from typing import Dict, List, Tuple'),
+    'portfolio_core': 'import portfolio_core',
+    'portfolio_core.PortfolioAnalyzer': 'from portfolio_core import PortfolioAnalyzer',
+    'portfolio_analyzer (CLI)': 'import portfolio_analyzer',
+}
+HEAVY_MODULES = ('pandas', 'requests', 'plotly', 'streamlit')
+
+
+def import_time_us(statement: str):
+    """Cumulative microseconds of top-level imports reported by -X importtime"""
+    check = f"{statement}; import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', check], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; only count the outermost ones
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total, result.stdout.strip()
+
+
+def run(repeats: int = 5):
+    baseline = None
+    for label, statement in CASES.items():
+        times, loaded = [], ''
+        for _ in range(repeats):
+            elapsed, loaded = import_time_us(statement)
+            times.append(elapsed)
+        median = statistics.median(times) / 1000
+        baseline = baseline or median
+        print(f"{label:34} {median:8.1f} ms  ({baseline / median:5.1f}x)  heavy: {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    run()
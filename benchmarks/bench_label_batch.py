@@ -0,0 +1,69 @@
+"""
+Benchmark: bulk label generation vs the single-shot scripts' approach
+
+Renders a mixed batch of QR codes and Code128 barcodes. The baseline
+builds a new QRCode / ImageWriter per label and saves one PNG file each,
+as generate_qrcode.py and generate_barcode.py did; it is timed on a sample
+and scaled up. The pipeline writes one ZIP, first cold, then again with
+every label in the content-hash cache, then on a process pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_label_batch
+"""
+import io
+import os
+import tempfile
+import time
+
+from label_batch import BARCODE_OPTIONS, generate_labels
+
+QR_PAYLOAD = "https://shop.example/p/{}"
+
+
+def items(n_labels: int):
+    for i in range(n_labels):
+        if i % 2:
+            yield f"SKU{i:06d}", 'qr', QR_PAYLOAD.format(i)
+        else:
+            yield f"SKU{i:06d}", 'code128', f"{i:012d}"
+
+
+def single_shot(batch, out_dir: str) -> None:
+    import barcode
+    import qrcode
+    from barcode.writer import ImageWriter
+    for name, kind, data in batch:
+        if kind == 'qr':
+            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+            qr.add_data(data)
+            qr.make(fit=True)
+            qr.make_image(fill_color="black", back_color="white").save(os.path.join(out_dir, f"{name}.png"))
+        else:
+            code = barcode.get_barcode_class('code128')(data, writer=ImageWriter())
+            code.save(os.path.join(out_dir, name), dict(BARCODE_OPTIONS))
+
+
+def run(n_labels: int = 5_000, loop_sample: int = 500):
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        single_shot(list(items(loop_sample)), tmp)
+        loop_rate = loop_sample / (time.perf_counter() - start)
+
+        cache_dir = os.path.join(tmp, 'cache')
+        cold = generate_labels(items(n_labels), io.BytesIO(), workers=1, cache_dir=cache_dir, progress=False)
+        warm = generate_labels(items(n_labels), io.BytesIO(), workers=1, cache_dir=cache_dir, progress=False)
+        workers = os.cpu_count() or 1
+        pooled = generate_labels(items(n_labels), io.BytesIO(), workers=max(workers, 2), cache_dir=None,
+                                 progress=False)
+    assert cold['labels'] == warm['labels'] == pooled['labels'] == n_labels
+
+    print(f"{n_labels:,} labels (half QR, half Code128), {workers} CPUs")
+    print(f"Single-shot, one PNG file each: {loop_rate:8,.0f} labels/sec  (sampled on {loop_sample:,})")
+    print(f"Pipeline to ZIP, cold cache:    {cold['labels_per_sec']:8,.0f} labels/sec")
+    print(f"Pipeline to ZIP, warm cache:    {warm['labels_per_sec']:8,.0f} labels/sec  "
+          f"({warm['cached']:,} from cache)")
+    print(f"Pipeline, {pooled['workers']} workers, no cache:  {pooled['labels_per_sec']:8,.0f} labels/sec")
+
+
+if __name__ == "__main__":
+    run()
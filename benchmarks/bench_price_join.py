@@ -0,0 +1,71 @@
+"""
+Benchmark: PriceBook join vs per-holding DataFrame filtering
+
+Prices 100k holdings against a 10k-row market frame. The old loop (one
+boolean scan of the frame plus .iloc[0] per holding) is timed on a sample
+of holdings and scaled up, since running it in full takes minutes.
+
+Run from the repository root:
+    python -m benchmarks.bench_price_join
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from holdings import holdings_from_records
+from price_book import PriceBook
+
+
+def market_frame(n_quotes: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': [f"coin-{i}" for i in range(n_quotes)],
+        'symbol': [f"c{i}" for i in range(n_quotes)],
+        'current_price': rng.lognormal(3, 1.5, n_quotes),
+    })
+
+
+def book(n_holdings: int, n_quotes: int, unpriced_share: float, seed: int):
+    rng = np.random.default_rng(seed)
+    # A slice of the ids fall outside the quoted universe
+    universe = int(n_quotes * (1 + unpriced_share))
+    return holdings_from_records({'asset': f"coin-{i}", 'quantity': q, 'cost_basis': 100.0, 'value': 0.0}
+                                 for i, q in zip(rng.integers(0, universe, n_holdings).tolist(),
+                                                 rng.uniform(0.1, 100, n_holdings).tolist()))
+
+
+def filter_loop(holdings, crypto_data):
+    for holding in holdings:
+        price_data = crypto_data[crypto_data['id'] == holding['asset']]
+        if not price_data.empty:
+            current_price = price_data.iloc[0]['current_price']
+            holding['value'] = holding['quantity'] * current_price
+            holding['current_price'] = current_price
+
+
+def run(n_holdings: int = 100_000, n_quotes: int = 10_000, loop_sample: int = 1_000,
+        unpriced_share: float = 0.01, seed: int = 42):
+    crypto_data = market_frame(n_quotes, seed)
+    holdings = book(n_holdings, n_quotes, unpriced_share, seed)
+
+    sample = book(loop_sample, n_quotes, unpriced_share, seed)
+    start = time.perf_counter()
+    filter_loop(sample, crypto_data)
+    loop_time = (time.perf_counter() - start) * n_holdings / loop_sample
+
+    start = time.perf_counter()
+    unpriced = PriceBook.from_market_data(crypto_data).revalue(holdings)
+    join_time = time.perf_counter() - start
+
+    # Same prices as the loop on the sampled holdings
+    for old, new in zip(sample, holdings[:loop_sample]):
+        assert old.get('current_price') == new.get('current_price')
+
+    print(f"{n_holdings:,} holdings x {n_quotes:,} quotes ({len(unpriced):,} unpriced assets reported)")
+    print(f"Filter loop: {loop_time:8.2f}s  (scaled from {loop_sample:,} holdings)")
+    print(f"PriceBook:   {join_time:8.3f}s  ({loop_time / join_time:,.0f}x faster)")
+
+
+if __name__ == "__main__":
+    run()
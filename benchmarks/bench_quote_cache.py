@@ -0,0 +1,48 @@
+"""
+Benchmark: quote cache in front of fetch_crypto_data / fetch_stock_data
+
+Run from the repository root:
+    python -m benchmarks.bench_quote_cache
+"""
+import time
+
+from benchmarks.mock_market_server import MockMarketServer
+from market_cache import QuoteCache
+from portfolio_analyzer import PortfolioAnalyzer
+
+
+def run(latency: float = 0.05, repeats: int = 20):
+    with MockMarketServer(latency=latency) as server:
+        analyzer = PortfolioAnalyzer(cache=QuoteCache())
+        analyzer.coingecko_base = server.url
+        analyzer.alpha_vantage_base = f"{server.url}/query"
+
+        # Overlapping requests only fetch the coins that are not cached yet
+        analyzer.fetch_crypto_data(['bitcoin', 'ethereum'])
+        analyzer.fetch_crypto_data(['bitcoin', 'ethereum', 'cardano'])
+        assert server.requested_ids() == [['bitcoin', 'ethereum'], ['cardano']], server.requested_ids()
+
+        analyzer.fetch_stock_data('IBM')
+        analyzer.fetch_stock_data('IBM')
+        assert len(server.requests) == 3
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            analyzer.fetch_crypto_data(['bitcoin', 'ethereum', 'cardano'])
+        cached_time = time.perf_counter() - start
+
+        uncached = PortfolioAnalyzer(cache=QuoteCache(ttls={'coingecko': 0}))
+        uncached.coingecko_base = server.url
+        start = time.perf_counter()
+        for _ in range(repeats):
+            uncached.fetch_crypto_data(['bitcoin', 'ethereum', 'cardano'])
+        uncached_time = time.perf_counter() - start
+
+    print(f"{repeats} refreshes with {latency * 1000:.0f}ms mock latency")
+    print(f"Uncached: {uncached_time:8.3f}s")
+    print(f"Cached:   {cached_time:8.3f}s")
+    print(f"Cache stats: {analyzer.cache.stats()}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,65 @@
+"""
+Benchmark: vectorized multi-account rebalancer vs per-account loop
+
+Run from the repository root:
+    python -m benchmarks.bench_rebalancer
+"""
+import time
+
+import numpy as np
+
+from portfolio_analyzer import PortfolioAnalyzer
+from rebalancer import build_account_matrix, rebalance_orders
+
+
+def synthetic_accounts(n_accounts: int, n_assets: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    assets = [f"asset-{j}" for j in range(n_assets)]
+    prices = rng.uniform(1, 500, n_assets)
+    accounts = []
+    for _ in range(n_accounts):
+        quantities = rng.uniform(0, 100, n_assets)
+        accounts.append([
+            {'asset': a, 'quantity': q, 'cost_basis': q * p, 'value': q * p, 'current_price': p}
+            for a, q, p in zip(assets, quantities.tolist(), prices.tolist())
+        ])
+    # Concentrated targets so a good share of positions drift past the band
+    raw = rng.uniform(0, 1, n_assets)
+    raw[:10] *= n_assets / 10
+    targets = dict(zip(assets, (raw / raw.sum() * 100).tolist()))
+    return accounts, targets
+
+
+def run(n_accounts: int = 2000, n_assets: int = 200):
+    accounts, targets = synthetic_accounts(n_accounts, n_assets)
+    analyzer = PortfolioAnalyzer()
+
+    start = time.perf_counter()
+    looped = 0
+    for holdings in accounts:
+        analyzer.calculate_portfolio_metrics(holdings)
+        looped += len(analyzer.generate_rebalancing_recommendations(holdings, targets))
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assets, values, target_matrix, prices = build_account_matrix(accounts, targets)
+    layout_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    orders = rebalance_orders(values, target_matrix, assets, prices)
+    vector_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rebalance_orders(values, target_matrix, assets, prices, min_trade=50, lot_size=1, cost_bps=10)
+    lots_time = time.perf_counter() - start
+
+    assert looped == len(orders), (looped, len(orders))
+    print(f"{n_accounts} accounts x {n_assets} assets, {len(orders)} orders")
+    print(f"Per-account loop:      {loop_time:8.3f}s")
+    print(f"Vectorized rebalance:  {vector_time:8.3f}s  ({loop_time / vector_time:.1f}x faster)")
+    print(f"  + lots, min size, costs: {lots_time:.3f}s")
+    print(f"  one-off dict -> matrix layout: {layout_time:.3f}s")
+
+
+if __name__ == "__main__":
+    run()
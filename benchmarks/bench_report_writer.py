@@ -0,0 +1,82 @@
+"""
+Benchmark: streaming report writers vs building every report in memory
+
+Renders 100k synthetic reports in each format and tracks peak traced
+memory with tracemalloc at checkpoints. The streaming writers stay flat;
+the baseline keeps every generate_report string, like a run that collects
+reports and joins them at the end. Times include tracemalloc overhead, so
+they compare formats rather than measure raw throughput.
+
+Run from the repository root:
+    python -m benchmarks.bench_report_writer
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from portfolio_core import PortfolioAnalyzer
+from portfolio_core.reports import REPORT_FORMATS, open_report_writer
+
+
+def synthetic_reports(n_reports: int, n_recommendations: int = 8, seed: int = 42):
+    """Lazily generate (portfolio_id, metrics, risk, recommendations) tuples"""
+    rng = np.random.default_rng(seed)
+    for i in range(n_reports):
+        value, cost = rng.uniform(1e3, 1e6, 2).tolist()
+        metrics = {
+            'total_value': value, 'total_cost': cost, 'total_return': value - cost,
+            'return_percentage': (value - cost) / cost * 100, 'num_positions': n_recommendations,
+            'herfindahl_index': 0.2, 'diversification_ratio': 5.0,
+            'largest_position': 'bitcoin', 'largest_position_weight': 31.5,
+        }
+        risk = dict(zip(['volatility', 'sharpe_ratio', 'max_drawdown', 'var_95', 'mean_return'],
+                        rng.normal(0, 0.3, 5).tolist()))
+        recommendations = [
+            {'asset': f"coin-{j}", 'action': 'BUY' if j % 2 else 'SELL', 'current_weight': 10.0 + j,
+             'target_weight': 12.5, 'difference': 2.5 - j, 'amount': 1000.0 * (j + 1)}
+            for j in range(n_recommendations)
+        ]
+        yield f"p{i}", metrics, risk, recommendations
+
+
+def _peaks(reports, consume, checkpoints):
+    """Run consume(report) over reports, recording peak traced memory at each checkpoint"""
+    tracemalloc.start()
+    peaks = []
+    start = time.perf_counter()
+    for i, report in enumerate(reports, start=1):
+        consume(report)
+        if i in checkpoints:
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1e6)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return peaks, elapsed
+
+
+def run(n_reports: int = 100_000):
+    checkpoints = (n_reports // 10, n_reports // 2, n_reports)
+    header = '  '.join(f"{c:>10,}" for c in checkpoints)
+    print(f"Peak traced memory (MB) after N reports: {header}")
+
+    analyzer = PortfolioAnalyzer()
+    kept = []
+    peaks, elapsed = _peaks(synthetic_reports(n_reports),
+                            lambda r: kept.append(analyzer.generate_report(*r[1:])), checkpoints)
+    print(f"{'in-memory generate_report':26} {'  '.join(f'{p:10.1f}' for p in peaks)}   {elapsed:6.2f}s")
+    del kept
+
+    with tempfile.TemporaryDirectory() as root:
+        for fmt in REPORT_FORMATS:
+            path = os.path.join(root, f"reports.{fmt}")
+            with open_report_writer(path, fmt) as writer:
+                peaks, elapsed = _peaks(synthetic_reports(n_reports), lambda r: writer.write(*r), checkpoints)
+            size = os.path.getsize(path) / 1e6
+            print(f"{'stream ' + fmt:26} {'  '.join(f'{p:10.1f}' for p in peaks)}   {elapsed:6.2f}s  "
+                  f"{n_reports / elapsed:8,.0f} reports/s  {size:7.1f} MB written")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,75 @@
+"""
+Benchmark: streaming tick-to-bar aggregation vs loading every tick into pandas
+
+Synthetic 24/7 trade ticks are generated chunk by chunk. The streaming
+pipeline aggregates them into 1-minute bars and risk metrics without ever
+holding the full tick set; the baseline concatenates all ticks and uses
+Series.resample. Peak traced memory and ticks/sec are reported for both.
+
+Run from the repository root:
+    python -m benchmarks.bench_tick_aggregation
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from risk import StreamingRiskMetrics
+from ticks import periods_per_year, tick_risk_metrics
+
+
+def tick_chunks(n_ticks: int, chunk_size: int, ticks_per_second: float = 20.0, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    clock, price = 1.7e9, 30000.0
+    for start in range(0, n_ticks, chunk_size):
+        n = min(chunk_size, n_ticks - start)
+        timestamps = clock + np.cumsum(rng.exponential(1 / ticks_per_second, n))
+        prices = price * np.exp(np.cumsum(rng.normal(0, 2e-5, n)))
+        clock, price = timestamps[-1], prices[-1]
+        yield timestamps, prices, rng.exponential(0.05, n)
+
+
+def streaming(n_ticks, chunk_size, interval):
+    return tick_risk_metrics(tick_chunks(n_ticks, chunk_size), interval)
+
+
+def in_memory(n_ticks, chunk_size, interval):
+    timestamps, prices, sizes = (np.concatenate(parts) for parts in zip(*tick_chunks(n_ticks, chunk_size)))
+    index = pd.to_datetime(timestamps, unit='s', utc=True)
+    bars = pd.Series(prices, index=index).resample(interval).ohlc()
+    bars['volume'] = pd.Series(sizes, index=index).resample(interval).sum()
+    closes = bars['close'].ffill().to_numpy()
+    metrics = StreamingRiskMetrics(periods_per_year=periods_per_year(interval))
+    metrics.update_many(closes[1:] / closes[:-1] - 1)
+    return metrics.metrics()
+
+
+def measure(fn, *args):
+    """Time an untraced run, then take peak memory from a second run under tracemalloc"""
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def run(n_ticks: int = 2_000_000, chunk_size: int = 250_000, interval: str = '1min'):
+    streamed, stream_time, stream_mb = measure(streaming, n_ticks, chunk_size, interval)
+    loaded, load_time, load_mb = measure(in_memory, n_ticks, chunk_size, interval)
+
+    assert np.isclose(streamed['volatility'], loaded['volatility']), (streamed, loaded)
+    assert np.isclose(streamed['max_drawdown'], loaded['max_drawdown'])
+
+    print(f"{n_ticks:,} ticks -> {streamed['bars']:,} {interval} bars "
+          f"(annualized over {streamed['periods_per_year']:,.0f} bars/year)")
+    print(f"Streaming: {stream_time:7.2f}s  {n_ticks / stream_time:12,.0f} ticks/s  peak {stream_mb:8.1f} MB")
+    print(f"In memory: {load_time:7.2f}s  {n_ticks / load_time:12,.0f} ticks/s  peak {load_mb:8.1f} MB")
+    print(f"Annual volatility {streamed['volatility']:.2%}, max drawdown {streamed['max_drawdown']:.2%}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the CoinGecko and Alpha Vantage endpoints
+
+Serves deterministic synthetic quotes for any requested id/symbol so the
+analyzer can be exercised without network access:
+
+    with MockMarketServer(latency=0.05) as server:
+        analyzer = PortfolioAnalyzer()
+        analyzer.coingecko_base = server.url
+        analyzer.alpha_vantage_base = f"{server.url}/query"
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def synthetic_price(asset: str) -> float:
+    """Stable pseudo-random price for an asset id"""
+    return 1 + (zlib.crc32(asset.encode()) % 100000) / 10
+
+
+def coin_row(coin_id: str) -> dict:
+    price = synthetic_price(coin_id)
+    return {
+        'id': coin_id,
+        'symbol': coin_id[:4],
+        'name': coin_id.title(),
+        'current_price': price,
+        'market_cap': price * 1e6,
+        'total_volume': price * 1e4,
+        'price_change_percentage_24h': (zlib.crc32(coin_id.encode()) % 2000) / 100 - 10,
+        'price_change_percentage_7d_in_currency': (zlib.crc32(coin_id[::-1].encode()) % 4000) / 100 - 20,
+    }
+
+
+# Units per BTC, in CoinGecko's /exchange_rates shape
+EXCHANGE_RATES = {
+    'btc': {'name': 'Bitcoin', 'unit': 'BTC', 'value': 1.0, 'type': 'crypto'},
+    'usd': {'name': 'US Dollar', 'unit': '$', 'value': 60000.0, 'type': 'fiat'},
+    'eur': {'name': 'Euro', 'unit': '€', 'value': 55200.0, 'type': 'fiat'},
+    'gbp': {'name': 'British Pound Sterling', 'unit': '£', 'value': 47400.0, 'type': 'fiat'},
+    'jpy': {'name': 'Japanese Yen', 'unit': '¥', 'value': 9000000.0, 'type': 'fiat'},
+}
+
+
+def stock_quote(symbol: str) -> dict:
+    price = synthetic_price(symbol)
+    return {
+        'Global Quote': {
+            '01. symbol': symbol,
+            '05. price': f"{price:.4f}",
+            '06. volume': str(int(price * 1000)),
+            '09. change': f"{price / 100:.4f}",
+            '10. change percent': '1.0000%',
+        }
+    }
+
+
+class MockMarketServer:
+    """Threaded HTTP server recording every request it answers"""
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Avoid Nagle / delayed-ACK stalls on keep-alive connections
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                with server._lock:
+                    server.requests.append((parsed.path, params))
+                    count = len(server.requests)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if server.fail_every and count % server.fail_every == 0:
+                    status, payload = 503, {'error': 'unavailable'}
+                elif parsed.path.endswith('/coins/markets'):
+                    ids = [c for c in params.get('ids', '').split(',') if c]
+                    status, payload = 200, [coin_row(c) for c in ids]
+                elif parsed.path.endswith('/exchange_rates'):
+                    status, payload = 200, {'rates': EXCHANGE_RATES}
+                elif parsed.path.endswith('/query'):
+                    status, payload = 200, stock_quote(params.get('symbol', ''))
+                else:
+                    status, payload = 404, {'error': 'not found'}
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def __enter__(self) -> 'MockMarketServer':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def requested_ids(self):
+        """Coin ids requested from /coins/markets, in request order"""
+        return [params.get('ids', '').split(',') for path, params in self.requests
+                if path.endswith('/coins/markets')]
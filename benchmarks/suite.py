@@ -0,0 +1,306 @@
+"""
+Benchmark suite for the analytics hot paths, with regression tracking
+
+Times each case (best of several runs) and measures its peak traced memory
+in a separate run under tracemalloc, writes everything to JSON and compares
+it against a stored baseline. Cases scale holdings (10 -> 1M), return
+lengths (100 days -> 10 years of minute ticks) and universes (10 -> 5,000
+assets). Quote fetching is served by the local mock market server.
+
+Run from the repository root:
+    python -m benchmarks.suite                      # full suite
+    python -m benchmarks.suite --quick              # smaller sizes only
+    python -m benchmarks.suite -k risk -k report    # cases matching any filter
+    python -m benchmarks.suite --save-baseline      # store results as the new baseline
+
+Exits with status 1 when a case is slower or uses more memory than the
+baseline by more than the thresholds.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks import synthetic
+from benchmarks.mock_market_server import MockMarketServer
+from instrumentation import MetricsRegistry
+from market_cache import QuoteCache
+from market_transport import PooledTransport, TokenBucket
+from portfolio_core import PortfolioAnalyzer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results.json')
+
+FULL_SIZES = {
+    'holdings': (10, 1_000, 100_000, 1_000_000),
+    'returns': (100, 2_520, synthetic.TEN_YEARS_OF_TICKS),
+    'universe': (10, 500, 5_000),
+    'recommendations': (10, 1_000, 100_000),
+}
+QUICK_SIZES = {
+    'holdings': (10, 1_000, 100_000),
+    'returns': (100, 2_520),
+    'universe': (10, 500),
+    'recommendations': (10, 1_000),
+}
+
+# Slow-down (or memory growth) fraction that counts as a regression, and
+# absolute floors below which differences are treated as noise. Timings on a
+# shared machine jitter far more than traced allocations do.
+TIME_THRESHOLD = 0.5
+MEMORY_THRESHOLD = 0.25
+MIN_SECONDS_DELTA = 0.001
+MIN_MB_DELTA = 0.5
+
+
+def _analyzer(**kwargs) -> PortfolioAnalyzer:
+    return PortfolioAnalyzer(metrics=MetricsRegistry(), **kwargs)
+
+
+@contextmanager
+def portfolio_metrics_case(n_holdings: int) -> Iterator[Callable]:
+    analyzer = _analyzer()
+    holdings = synthetic.holdings(n_holdings)
+    yield lambda: analyzer.calculate_portfolio_metrics(holdings)
+
+
+@contextmanager
+def risk_metrics_case(n_periods: int) -> Iterator[Callable]:
+    analyzer = _analyzer()
+    returns = synthetic.returns(n_periods)
+    yield lambda: analyzer.calculate_risk_metrics(returns)
+
+
+@contextmanager
+def correlation_case(n_assets: int, n_days: int = 252) -> Iterator[Callable]:
+    analyzer = _analyzer()
+    prices = synthetic.price_frame(n_days, n_assets)
+    yield lambda: analyzer.analyze_correlation(prices)
+
+
+@contextmanager
+def rebalancing_case(n_holdings: int) -> Iterator[Callable]:
+    analyzer = _analyzer()
+    holdings = synthetic.holdings(n_holdings)
+    analyzer.calculate_portfolio_metrics(holdings)  # writes the weights recommendations read
+    targets = synthetic.target_weights([h['asset'] for h in holdings])
+    yield lambda: analyzer.generate_rebalancing_recommendations(holdings, targets)
+
+
+@contextmanager
+def report_case(n_recommendations: int) -> Iterator[Callable]:
+    analyzer = _analyzer()
+    inputs = synthetic.report_inputs(n_recommendations)
+    yield lambda: analyzer.generate_report(*inputs)
+
+
+@contextmanager
+def fetch_crypto_case(n_coins: int) -> Iterator[Callable]:
+    """Cold-cache fetch_crypto_data through the pooled transport against the mock server"""
+    with MockMarketServer() as server:
+        # The mock has no rate limit, so give the buckets generous budgets
+        transport = PooledTransport(backoff=0.01, metrics=MetricsRegistry(), rate_limits={
+            'coingecko': TokenBucket(rate=10000, capacity=1000),
+        })
+        cache = QuoteCache()
+        analyzer = _analyzer(cache=cache, transport=transport)
+        analyzer.coingecko_base = server.url
+        coins = synthetic.asset_ids(n_coins)
+
+        def run():
+            cache.clear()
+            return analyzer.fetch_crypto_data(coins)
+        yield run
+
+
+def build_cases(sizes: Dict[str, Tuple[int, ...]]) -> List[Tuple[str, Dict, Callable]]:
+    """(name, params, case factory) for every case at the given sizes"""
+    cases = []
+    for n in sizes['holdings']:
+        cases.append((f"portfolio_metrics/holdings={n}", {'holdings': n}, lambda n=n: portfolio_metrics_case(n)))
+    for n in sizes['returns']:
+        cases.append((f"risk_metrics/periods={n}", {'periods': n}, lambda n=n: risk_metrics_case(n)))
+    for n in sizes['universe']:
+        cases.append((f"analyze_correlation/assets={n}", {'assets': n, 'days': 252},
+                      lambda n=n: correlation_case(n)))
+    for n in sizes['holdings']:
+        cases.append((f"rebalancing_recommendations/holdings={n}", {'holdings': n},
+                      lambda n=n: rebalancing_case(n)))
+    for n in sizes['recommendations']:
+        cases.append((f"generate_report/recommendations={n}", {'recommendations': n},
+                      lambda n=n: report_case(n)))
+    for n in sizes['universe']:
+        cases.append((f"fetch_crypto_data/coins={n}", {'coins': n}, lambda n=n: fetch_crypto_case(n)))
+    return cases
+
+
+def measure(run: Callable, min_time: float = 0.25, max_repeats: int = 7) -> Dict:
+    """Best and median wall time over repeated runs, then peak memory of one traced run"""
+    times = []
+    while len(times) < max_repeats and (len(times) < 2 or sum(times) < min_time):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        if times[0] > min_time * 4:
+            break  # slow cases are timed once
+
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': min(times),
+        'median_seconds': float(np.median(times)),
+        'repeats': len(times),
+        'peak_mb': peak / 1e6,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: Dict[str, Tuple[int, ...]], filters: Optional[List[str]] = None,
+              stream=sys.stdout) -> Dict:
+    results = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'cases': {},
+    }
+    for name, params, factory in build_cases(sizes):
+        if filters and not any(f in name for f in filters):
+            continue
+        with factory() as run:
+            result = measure(run)
+        result['params'] = params
+        results['cases'][name] = result
+        stream.write(f"{name:48} {result['seconds'] * 1000:12.3f} ms  {result['peak_mb']:10.2f} MB"
+                     f"  (x{result['repeats']})\n")
+        stream.flush()
+    return results
+
+
+def remeasure(results: Dict, names: List[str], sizes: Dict[str, Tuple[int, ...]]) -> None:
+    """Time the named cases again and keep the faster run, to weed out one-off scheduler noise"""
+    for name, _, factory in build_cases(sizes):
+        if name in names:
+            with factory() as run:
+                retry = measure(run)
+            case = results['cases'][name]
+            case['seconds'] = min(case['seconds'], retry['seconds'])
+            case['repeats'] += retry['repeats']
+
+
+def compare(results: Dict, baseline: Dict, time_threshold: float = TIME_THRESHOLD,
+            memory_threshold: float = MEMORY_THRESHOLD) -> List[Dict]:
+    """Per-case comparison rows; status is 'regression', 'improved', 'ok' or 'new'"""
+    rows = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if previous is None:
+            rows.append({'case': name, 'status': 'new'})
+            continue
+        time_ratio = current['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+        memory_ratio = current['peak_mb'] / previous['peak_mb'] if previous['peak_mb'] else 1.0
+        slower = (time_ratio > 1 + time_threshold
+                  and current['seconds'] - previous['seconds'] > MIN_SECONDS_DELTA)
+        bigger = (memory_ratio > 1 + memory_threshold
+                  and current['peak_mb'] - previous['peak_mb'] > MIN_MB_DELTA)
+        faster = (time_ratio < 1 - time_threshold
+                  and previous['seconds'] - current['seconds'] > MIN_SECONDS_DELTA)
+        reasons = [r for r, hit in (('time', slower), ('memory', bigger)) if hit]
+        rows.append({
+            'case': name,
+            'status': 'regression' if reasons else ('improved' if faster else 'ok'),
+            'reasons': reasons,
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+        })
+    return rows
+
+
+def _write_json(data: Dict, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analytics hot paths")
+    parser.add_argument('--quick', action='store_true', help="Skip the largest sizes")
+    parser.add_argument('-k', '--filter', action='append', help="Only run cases containing this text (repeatable)")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Merge this run's cases into the baseline file instead of comparing")
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD,
+                        help="Fractional slow-down that counts as a regression")
+    parser.add_argument('--memory-threshold', type=float, default=MEMORY_THRESHOLD,
+                        help="Fractional peak-memory growth that counts as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    results = run_suite(sizes, args.filter)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if baseline is not None and not args.save_baseline:
+        suspects = [row['case'] for row in compare(results, baseline, args.time_threshold, args.memory_threshold)
+                    if 'time' in row.get('reasons', ())]
+        if suspects:
+            print(f"\nRe-timing {len(suspects)} slower case(s)")
+            remeasure(results, suspects, sizes)
+
+    _write_json(results, args.output)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        merged = baseline or {'cases': {}}
+        merged['meta'] = results['meta']
+        merged['cases'].update(results['cases'])
+        _write_json(merged, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    rows = compare(results, baseline, args.time_threshold, args.memory_threshold)
+    print(f"\nCompared with baseline from {baseline.get('meta', {}).get('commit') or 'unknown commit'}:")
+    for row in rows:
+        if row['status'] == 'new':
+            print(f"  {row['case']:48} new case")
+            continue
+        flag = f"REGRESSION ({', '.join(row['reasons'])})" if row['reasons'] else row['status']
+        print(f"  {row['case']:48} time x{row['time_ratio']:5.2f}  memory x{row['memory_ratio']:5.2f}  {flag}")
+    regressions = [row for row in rows if row['status'] == 'regression']
+    print(f"\n{len(regressions)} regression(s) across {len(rows)} case(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
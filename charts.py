@@ -0,0 +1,155 @@
+"""
+Chart and table builders that stay small for large portfolios
+
+Allocation pies keep the top N slices and group the rest as "Other".
+Long time series are downsampled server-side with Largest-Triangle-Three-
+Buckets (LTTB) and drawn with WebGL. Tables keep numeric columns (formatted
+by the front end through column_config) instead of one Python-formatted
+string per cell. Plotly and pandas are imported only when a builder needs them.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from holdings import holding_columns
+
+ALLOCATION_TOP_N = 15
+MAX_CHART_POINTS = 1000
+TABLE_PAGE_SIZE = 100
+ROLLING_METRICS = ['volatility', 'sharpe_ratio', 'drawdown', 'var_95']
+
+
+def top_n_allocation(labels: Sequence[str], values: Sequence[float], n: int = ALLOCATION_TOP_N,
+                     other_label: str = "Other") -> Tuple[List[str], List[float]]:
+    """The n - 1 largest slices plus one slice summing the rest; unchanged when there are n or fewer"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= n:
+        return list(labels), values.tolist()
+    keep = np.argpartition(-values, n - 1)[:n - 1]
+    keep = keep[np.argsort(-values[keep], kind='stable')]
+    rest = np.ones(len(values), dtype=bool)
+    rest[keep] = False
+    return ([labels[i] for i in keep.tolist()] + [f"{other_label} ({int(rest.sum())})"],
+            values[keep].tolist() + [float(values[rest].sum())])
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps
+    The first and last points are always kept; each bucket in between
+    contributes the point forming the largest triangle with the previous
+    pick and the next bucket's average, which preserves peaks and troughs
+    that plain striding drops.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    picks = np.empty(threshold, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picks[i + 1] = a
+    return picks
+
+
+def downsample(y, max_points: int = MAX_CHART_POINTS, x=None) -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) with non-finite points dropped and at most max_points kept by LTTB; x defaults to the position"""
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(len(y), dtype=np.float64) if x is None else np.asarray(x)
+    finite = np.isfinite(y)
+    x, y = x[finite], y[finite]
+    keep = lttb(x.astype(np.float64), y, max_points)
+    return x[keep], y[keep]
+
+
+def page_count(n_rows: int, page_size: int = TABLE_PAGE_SIZE) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def page_slice(page: int, page_size: int = TABLE_PAGE_SIZE) -> slice:
+    """Rows of a 1-based page"""
+    start = (page - 1) * page_size
+    return slice(start, start + page_size)
+
+
+def allocation_pie(labels: Sequence[str], values: Sequence[float], top_n: Optional[int] = ALLOCATION_TOP_N):
+    import plotly.graph_objects as go
+    if top_n:
+        labels, values = top_n_allocation(labels, values, top_n)
+    fig = go.Figure(data=[go.Pie(labels=list(labels), values=list(values), hole=0.4)])
+    fig.update_layout(title="Asset Allocation", height=400)
+    return fig
+
+
+def rolling_risk_figures(rolling: Dict[int, Dict[str, np.ndarray]],
+                         max_points: Optional[int] = MAX_CHART_POINTS) -> Dict:
+    """
+    One figure per rolling metric with a trace per window
+    With max_points, series longer than that are LTTB-downsampled and drawn
+    with Scattergl; otherwise every point is drawn with SVG Scatter.
+    """
+    import plotly.graph_objects as go
+    figures = {}
+    for metric in ROLLING_METRICS:
+        fig = go.Figure()
+        for window, series in rolling.items():
+            values = series[metric]
+            if max_points and len(values) > max_points:
+                x, y = downsample(values, max_points)
+                fig.add_trace(go.Scattergl(x=x, y=y, mode='lines', name=f"{window}-day"))
+            else:
+                fig.add_trace(go.Scatter(y=values, mode='lines', name=f"{window}-day"))
+        fig.update_layout(height=350, xaxis_title="Day", yaxis_title=metric.replace('_', ' ').title())
+        figures[metric] = fig
+    return figures
+
+
+def holdings_table(holdings: List[Dict], sort_by_value: bool = False):
+    """Numeric holdings table (Asset, Quantity, Value, Weight, P&L) for st.dataframe with column_config"""
+    import pandas as pd
+    assets, quantity, value, weight, cost_basis = holding_columns(
+        holdings, 'asset', 'quantity', 'value', 'weight', 'cost_basis')
+    value = np.asarray(value, dtype=np.float64)
+    table = pd.DataFrame({
+        'Asset': pd.Series(assets, dtype=object).str.upper(),
+        'Quantity': np.asarray(quantity, dtype=np.float64),
+        'Value': value,
+        'Weight': np.asarray(weight, dtype=np.float64),
+        'P&L': value - np.asarray(cost_basis, dtype=np.float64),
+    })
+    if sort_by_value:
+        table = table.sort_values('Value', ascending=False, kind='stable', ignore_index=True)
+    return table
+
+
+def rebalancing_frame(orders):
+    """Numeric rebalancing table from rebalance_orders output"""
+    import pandas as pd
+    return pd.DataFrame({
+        'Action': orders['action'],
+        'Asset': orders['asset'].str.upper(),
+        'Amount': orders['amount'],
+        'Current Weight': orders['current_weight'],
+        'Target Weight': orders['target_weight'],
+        'Difference': orders['difference'],
+    })
+
+
+def market_frame(crypto_data):
+    """Numeric live-market table from fetch_crypto_data output"""
+    import pandas as pd
+    table = pd.DataFrame({'Symbol': crypto_data['symbol'].str.upper(), 'Price': crypto_data['current_price']})
+    if 'price_change_percentage_24h' in crypto_data.columns:
+        table['24h Change'] = crypto_data['price_change_percentage_24h']
+    return table
@@ -0,0 +1,194 @@
+import numpy as np
+from typing import List, Optional
+
+COVARIANCE_METHODS = ('sample', 'ewma')
+
+
+class CovarianceEngine:
+    """
+    Incrementally updated covariance / correlation estimator
+    New return rows are folded into running moment sums, so adding a day of
+    data costs one (rows x assets)^T (rows x assets) product instead of a
+    full recompute. Supports:
+      - 'sample': equal-weight covariance, optionally Ledoit-Wolf shrunk
+        towards a scaled identity (the shrinkage intensity is tracked from
+        running fourth-moment sums, so it is exact and incremental too)
+      - 'ewma': RiskMetrics-style zero-mean exponentially weighted covariance
+    Moment sums are stored in `dtype` (float32 halves memory for large
+    universes). Setting `block_size` computes products in column blocks to
+    cap temporary memory.
+    """
+
+    def __init__(self, assets: Optional[List[str]] = None, dtype=np.float64,
+                 method: str = 'sample', halflife: float = 60, block_size: Optional[int] = None):
+        if method not in COVARIANCE_METHODS:
+            raise ValueError(f"method must be one of {COVARIANCE_METHODS}")
+        self.assets = list(assets) if assets is not None else None
+        self.dtype = np.dtype(dtype)
+        self.method = method
+        self.decay = 0.5 ** (1 / halflife)
+        self.block_size = block_size
+        self.count = 0
+        self._shift = None
+        self._sum = None
+        self._cross = None
+        self._sq_weighted_sum = None
+        self._fourth = 0.0
+
+    @classmethod
+    def from_prices(cls, price_data, **kwargs) -> 'CovarianceEngine':
+        """Build an engine from a (dates x assets) price DataFrame"""
+        engine = cls(assets=list(price_data.columns), **kwargs)
+        engine.update(price_data.pct_change().dropna())
+        return engine
+
+    def _gram(self, x: np.ndarray, weighted: Optional[np.ndarray] = None) -> np.ndarray:
+        """x^T x (or weighted^T x), optionally in column blocks"""
+        left = x if weighted is None else weighted
+        n = x.shape[1]
+        if not self.block_size or self.block_size >= n:
+            return left.T @ x
+        out = np.empty((n, n), dtype=self.dtype)
+        for start in range(0, n, self.block_size):
+            stop = start + self.block_size
+            out[:, start:stop] = left.T @ x[:, start:stop]
+        return out
+
+    def update(self, returns) -> None:
+        """Fold a batch of return rows (rows x assets) into the estimate"""
+        if hasattr(returns, 'to_numpy'):
+            if self.assets is None:
+                self.assets = list(returns.columns)
+            returns = returns.to_numpy()
+        x = np.atleast_2d(np.asarray(returns, dtype=self.dtype))
+        x = x[~np.isnan(x).any(axis=1)]
+        if len(x) == 0:
+            return
+        n_assets = x.shape[1]
+        if self.assets is None:
+            self.assets = list(range(n_assets))
+
+        if self._cross is None:
+            self._cross = np.zeros((n_assets, n_assets), dtype=self.dtype)
+            self._sum = np.zeros(n_assets, dtype=np.float64)
+            self._sq_weighted_sum = np.zeros(n_assets, dtype=np.float64)
+            # Shift by the first batch mean to keep raw moment sums well conditioned
+            self._shift = x.mean(axis=0).astype(self.dtype) if self.method == 'sample' else np.zeros(n_assets, self.dtype)
+
+        if self.method == 'ewma':
+            k = len(x)
+            weights = ((1 - self.decay) * self.decay ** np.arange(k - 1, -1, -1)).astype(self.dtype)
+            self._cross *= self.decay ** k
+            self._cross += self._gram(x, x * weights[:, None])
+            self.count += k
+            return
+
+        xc = x - self._shift
+        sq_norms = np.einsum('ij,ij->i', xc, xc, dtype=np.float64)
+        self._cross += self._gram(xc)
+        self._sum += xc.sum(axis=0, dtype=np.float64)
+        self._sq_weighted_sum += sq_norms @ xc
+        self._fourth += float(sq_norms @ sq_norms)
+        self.count += len(x)
+
+    def mean(self) -> np.ndarray:
+        """Mean return per asset ('sample' method only)"""
+        if self.method != 'sample':
+            raise ValueError("Mean returns are only tracked for method='sample'")
+        return self._shift.astype(np.float64) + self._sum / self.count
+
+    def _sample_covariance(self) -> np.ndarray:
+        mean = (self._sum / self.count).astype(self.dtype)
+        cov = self._cross / self.count
+        cov -= np.outer(mean, mean)
+        return cov
+
+    def shrinkage_intensity(self) -> float:
+        """Ledoit-Wolf shrinkage intensity towards a scaled identity"""
+        if self.method != 'sample':
+            raise ValueError("Ledoit-Wolf shrinkage needs method='sample'")
+        n, p = self.count, len(self.assets)
+        if n == 0:
+            return 0.0
+        cov = self._sample_covariance().astype(np.float64)
+        mu_vec = self._sum / n
+        mu_sq = mu_vec @ mu_vec
+
+        # sum_t ||x_t - mean||^4 expanded in terms of the running raw sums
+        fourth = (self._fourth
+                  + 4 * mu_vec @ self._cross.astype(np.float64) @ mu_vec
+                  + n * mu_sq ** 2
+                  - 4 * mu_vec @ self._sq_weighted_sum
+                  + 2 * mu_sq * np.trace(self._cross, dtype=np.float64)
+                  - 4 * mu_sq * (mu_vec @ self._sum))
+
+        trace = np.trace(cov)
+        mu = trace / p
+        cov_sq = np.sum(cov ** 2)
+        beta = (fourth / n - cov_sq) / (p * n)
+        delta = (cov_sq - 2 * mu * trace + p * mu ** 2) / p
+        if delta <= 0:
+            return 0.0
+        return float(min(max(beta, 0.0), delta) / delta)
+
+    def covariance(self, shrinkage: Optional[str] = None) -> np.ndarray:
+        """Current covariance matrix (population normalisation)"""
+        if self.count == 0:
+            raise ValueError("No return rows have been added")
+        if self.method == 'ewma':
+            if shrinkage:
+                raise ValueError("Shrinkage is only available for method='sample'")
+            return self._cross.copy()
+
+        cov = self._sample_covariance()
+        if shrinkage == 'ledoit_wolf':
+            intensity = self.shrinkage_intensity()
+            mu = np.trace(cov) / len(cov)
+            cov *= (1 - intensity)
+            cov[np.diag_indices_from(cov)] += intensity * mu
+        elif shrinkage is not None:
+            raise ValueError(f"Unknown shrinkage: {shrinkage}")
+        return cov
+
+    def correlation(self, shrinkage: Optional[str] = None) -> np.ndarray:
+        """Current correlation matrix; rows and columns of zero-variance assets are NaN, as in pandas"""
+        cov = self.covariance(shrinkage)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / std[:, None] / std[None, :]
+        flat = ~(std > 0)
+        corr[flat, :] = np.nan
+        corr[:, flat] = np.nan
+        corr[np.diag_indices_from(corr)] = np.where(flat, np.nan, 1.0)
+        return np.clip(corr, -1, 1, out=corr)
+
+    def correlation_frame(self, shrinkage: Optional[str] = None):
+        import pandas as pd
+        return pd.DataFrame(self.correlation(shrinkage), index=self.assets, columns=self.assets)
+
+    def top_k_pairs(self, k: int = 5, shrinkage: Optional[str] = None, absolute: bool = False):
+        """
+        The k most correlated other assets for every asset
+        Correlations are formed one row block at a time, so only a
+        (block x assets) slice of the correlation matrix exists at once.
+        """
+        import pandas as pd
+        cov = self.covariance(shrinkage)
+        n = len(cov)
+        k = min(k, n - 1)
+        std = np.sqrt(np.diag(cov))
+        block = self.block_size or 1024
+        rows = []
+        for start in range(0, n, block):
+            stop = min(start + block, n)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov[start:stop] / std[start:stop, None] / std[None, :]
+            corr[np.arange(stop - start), np.arange(start, stop)] = np.nan
+            score = np.nan_to_num(np.abs(corr) if absolute else corr, nan=-np.inf)
+            top = np.argpartition(-score, k - 1, axis=1)[:, :k] if k > 0 else np.empty((stop - start, 0), int)
+            order = np.argsort(-np.take_along_axis(score, top, axis=1), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            for i, cols in enumerate(top):
+                for rank, j in enumerate(cols, start=1):
+                    rows.append((self.assets[start + i], self.assets[j], float(corr[i, j]), rank))
+        return pd.DataFrame(rows, columns=['asset', 'pair', 'correlation', 'rank'])
@@ -0,0 +1,106 @@
+"""
+Valuation-currency conversion
+
+Market data is always fetched in BASE_CURRENCY. One small rate table
+(units of each currency per unit of base) converts whole holdings books,
+price arrays and market frames with a single multiply, so showing EUR,
+GBP or JPY costs one rate lookup instead of a refetch per currency.
+Rates come from CoinGecko's /exchange_rates, which quotes every currency
+against BTC; dividing by the USD quote rebases them.
+
+Cost basis is assumed to be recorded in the base currency and is
+translated at the current rate, so returns in percent are the same in
+every currency. Risk metrics are computed from base-currency returns.
+"""
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from holdings import Holding, holding_columns
+
+BASE_CURRENCY = 'usd'
+SUPPORTED_CURRENCIES = ('usd', 'eur', 'gbp', 'jpy')
+CURRENCY_SYMBOLS = {'usd': '$', 'eur': '€', 'gbp': '£', 'jpy': '¥'}
+# Currencies quoted without minor units
+CURRENCY_DECIMALS = {'jpy': 0}
+# Market frame columns that are amounts; percentage changes are unit-free
+PRICE_COLUMNS = ('current_price', 'market_cap', 'total_volume')
+
+
+def format_money(amount: float, currency: str = BASE_CURRENCY, width: int = 0) -> str:
+    """Amount with the currency's symbol (or upper-case code) and its usual number of decimals"""
+    currency = currency.lower()
+    symbol = CURRENCY_SYMBOLS.get(currency, currency.upper() + ' ')
+    decimals = CURRENCY_DECIMALS.get(currency, 2)
+    return f"{symbol}{amount:>{width},.{decimals}f}"
+
+
+class FxTable:
+    """Units of each currency per one unit of `base`; the base itself is always 1"""
+
+    def __init__(self, rates: Dict[str, float], base: str = BASE_CURRENCY):
+        self.base = base.lower()
+        self.rates = {c.lower(): float(r) for c, r in rates.items()}
+        self.rates[self.base] = 1.0
+
+    @classmethod
+    def from_exchange_rates(cls, payload: Dict, base: str = BASE_CURRENCY,
+                            currencies: Optional[Iterable[str]] = None) -> 'FxTable':
+        """Rebase a CoinGecko /exchange_rates payload ({'rates': {code: {'value': per BTC}}}) onto `base`"""
+        quotes = payload['rates']
+        if base not in quotes:
+            raise ValueError(f"Exchange rates have no quote for {base.upper()}")
+        base_value = float(quotes[base]['value'])
+        codes = quotes if currencies is None else [c for c in currencies if c in quotes]
+        return cls({c: float(quotes[c]['value']) / base_value for c in codes
+                    if quotes[c].get('type', 'fiat') == 'fiat'}, base)
+
+    def __reduce__(self):
+        # st.cache_data hashes arguments through __reduce__; the default one returns a function
+        return (FxTable, (self.rates, self.base))
+
+    def __contains__(self, currency: str) -> bool:
+        return currency.lower() in self.rates
+
+    def rate(self, currency: str, from_currency: Optional[str] = None) -> float:
+        """Multiplier taking amounts in from_currency (default base) to currency"""
+        currency = currency.lower()
+        from_currency = (from_currency or self.base).lower()
+        missing = [c for c in (currency, from_currency) if c not in self.rates]
+        if missing:
+            raise ValueError(f"No exchange rate for {', '.join(c.upper() for c in missing)}")
+        return self.rates[currency] / self.rates[from_currency]
+
+    def convert(self, amounts, currency: str, from_currency: Optional[str] = None) -> np.ndarray:
+        """Convert an array of amounts in one multiply"""
+        return np.asarray(amounts, dtype=np.float64) * self.rate(currency, from_currency)
+
+    def convert_frame(self, market_data, currency: str, columns: Iterable[str] = PRICE_COLUMNS):
+        """Copy of a fetch_crypto_data frame with its amount columns in `currency`"""
+        rate = self.rate(currency)
+        frame = market_data.copy()
+        for col in columns:
+            if col in frame.columns:
+                frame[col] = frame[col] * rate
+        return frame
+
+    def convert_holdings(self, holdings: List[Dict], currency: str, from_currency: Optional[str] = None) -> None:
+        """
+        Convert value, cost_basis and current_price of every holding in place
+        Weights are unchanged. Holdings without a current_price keep None.
+        """
+        rate = self.rate(currency, from_currency)
+        if rate == 1.0 or not holdings:
+            return
+        value, cost_basis = (np.asarray(c, dtype=np.float64) * rate
+                             for c in holding_columns(holdings, 'value', 'cost_basis'))
+        # current_price is unset until a holding has been priced
+        price = np.array([h.get('current_price') for h in holdings], dtype=np.float64) * rate
+        price = [None if np.isnan(p) else p for p in price.tolist()]
+        for h, v, c, p in zip(holdings, value.tolist(), cost_basis.tolist(), price):
+            if type(h) is Holding:
+                h.value, h.cost_basis, h.current_price = v, c, p
+            else:
+                h['value'], h['cost_basis'] = v, c
+                if p is not None:
+                    h['current_price'] = p
@@ -1,21 +1,10 @@
-
-import barcode
-from barcode.writer import ImageWriter
+from label_batch import LabelRenderer
 
 data = "123456789012"
 
-#)
-Code128 = barcode.get_barcode_class('code128')
-barcode_obj = Code128(data, writer=ImageWriter())
-
-options = {
-    "module_width": 0.2,     
-    "module_height": 15,     
-    "font_size": 10,         
-    "text_distance": 2,     
-    "quiet_zone": 1,        
-}
-
-filename = barcode_obj.save("my_barcode", options)
+# Code128 writer options live in label_batch.BARCODE_OPTIONS;
+# for many codes at once run: python label_batch.py payloads.csv -o labels.zip --kind code128
+img = LabelRenderer().render('code128', data)
+img.save("my_barcode.png")
 
-print(f"✅ Barcode generated and saved as {filename}.png")
+print("✅ Barcode generated and saved as my_barcode.png")
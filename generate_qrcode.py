@@ -1,18 +1,9 @@
-import qrcode
+from label_batch import LabelRenderer
 
 data = "https://instagram.com/shop_elyra"
 
-qr = qrcode.QRCode(
-    version=1,  
-    error_correction=qrcode.constants.ERROR_CORRECT_L, 
-    box_size=10,  
-    border=4,
-    )
-
-
-qr.add_data(data)
-qr.make(fit=True)
-img = qr.make_image(fill_color="black", back_color="white")
+# Settings (version 1, error correction L, box size 10, border 4) live in label_batch.QR_OPTIONS;
+# for many codes at once run: python label_batch.py payloads.csv -o labels.zip
+img = LabelRenderer().render('qr', data)
 img.save("my_qrcode.png")
 print("QR code generated and saved as my_qrcode.png!")
-
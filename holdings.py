@@ -0,0 +1,259 @@
+import sys
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+PORTFOLIO_METRIC_NAMES = ['total_value', 'total_cost', 'total_return', 'return_percentage',
+                          'num_positions', 'herfindahl_index', 'diversification_ratio',
+                          'largest_position', 'largest_position_weight']
+
+HOLDING_FIELDS = ('asset', 'quantity', 'cost_basis', 'value', 'current_price', 'weight')
+_FIELD_SET = frozenset(HOLDING_FIELDS)
+
+
+class AssetTable:
+    """
+    Interned asset-id table
+    Each distinct asset id is stored once and given a dense integer code;
+    intern() returns that canonical string, so a million holdings of a few
+    thousand assets share a few thousand str objects.
+    """
+
+    def __init__(self, assets: Iterable[str] = ()):
+        self.ids: List[str] = []
+        self._codes: Dict[str, int] = {}
+        for asset in assets:
+            self.code(asset)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, asset) -> bool:
+        return asset in self._codes
+
+    def code(self, asset: str) -> int:
+        """Dense integer code for an asset id, assigned on first sight"""
+        code = self._codes.get(asset)
+        if code is None:
+            asset = sys.intern(str(asset))
+            code = self._codes[asset] = len(self.ids)
+            self.ids.append(asset)
+        return code
+
+    def intern(self, asset: str) -> str:
+        return self.ids[self.code(asset)]
+
+    def codes(self, assets: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.code(a) for a in assets), dtype=np.int64)
+
+
+_default_assets = None
+
+
+def get_asset_table() -> AssetTable:
+    """Process-wide asset table used when none is passed"""
+    global _default_assets
+    if _default_assets is None:
+        _default_assets = AssetTable()
+    return _default_assets
+
+
+class Holding:
+    """
+    One position, stored in slots instead of a per-holding dict
+    Supports the dict-style access the analytics code uses (h['value'],
+    h.get('current_price'), h['weight'] = w), so a list of Holding objects
+    is accepted anywhere a list of holding dicts is, without conversion.
+    current_price and weight behave as missing keys until they are set.
+    """
+
+    __slots__ = HOLDING_FIELDS
+
+    def __init__(self, asset: str, quantity: float = 0.0, cost_basis: float = 0.0, value: float = 0.0,
+                 current_price: Optional[float] = None, weight: Optional[float] = None,
+                 assets: Optional[AssetTable] = None):
+        self.asset = (assets if assets is not None else get_asset_table()).intern(asset)
+        self.quantity = quantity
+        self.cost_basis = cost_basis
+        self.value = value
+        self.current_price = current_price
+        self.weight = weight
+
+    @classmethod
+    def from_dict(cls, record: Dict, assets: Optional[AssetTable] = None) -> 'Holding':
+        return cls(record['asset'], record.get('quantity', 0.0), record.get('cost_basis', 0.0),
+                   record.get('value', 0.0), record.get('current_price'), record.get('weight'), assets)
+
+    def __getitem__(self, key: str):
+        value = getattr(self, key) if key in _FIELD_SET else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in _FIELD_SET and getattr(self, key) is not None
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key) if key in _FIELD_SET else None
+        return default if value is None else value
+
+    def keys(self) -> List[str]:
+        return [f for f in HOLDING_FIELDS if getattr(self, f) is not None]
+
+    def items(self):
+        return [(f, getattr(self, f)) for f in self.keys()]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Holding, dict)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Explicit so pickling (and st.cache_data hashing, which calls __reduce__) works
+        # for slots; the asset id is re-interned on load
+        return (Holding, (self.asset, self.quantity, self.cost_basis, self.value, self.current_price, self.weight))
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{k}={v!r}" for k, v in self.items())
+        return f"Holding({fields})"
+
+
+def holding_columns(holdings: List[Dict], *fields: str) -> List[list]:
+    """One list per field, read from Holding slots directly or through the mapping interface for dicts"""
+    try:
+        return [[getattr(h, f) for h in holdings] for f in fields]
+    except AttributeError:
+        return [[h[f] for h in holdings] for f in fields]
+
+
+def holdings_from_records(records: Iterable[Dict], assets: Optional[AssetTable] = None) -> List[Holding]:
+    """Convert holding dicts to Holding objects, interning asset ids in `assets`"""
+    assets = assets if assets is not None else get_asset_table()
+    return [Holding.from_dict(r, assets) for r in records]
+
+
+class HoldingsFrame:
+    """
+    Columnar holdings container
+    Stores a book as parallel NumPy arrays so portfolio metrics are computed
+    in vectorized passes instead of Python loops over holding dicts
+    """
+
+    def __init__(self, asset_ids, quantity, cost_basis, price=None, value=None):
+        self.asset_ids = np.asarray(asset_ids, dtype=object)
+        self.quantity = np.asarray(quantity, dtype=np.float64)
+        self.cost_basis = np.asarray(cost_basis, dtype=np.float64)
+
+        if value is None:
+            price = np.full(len(self.asset_ids), np.nan) if price is None else price
+            self.price = np.asarray(price, dtype=np.float64)
+            self.value = np.nan_to_num(self.quantity * self.price)
+        else:
+            self.value = np.asarray(value, dtype=np.float64)
+            if price is None:
+                # Derive the unit price from value where the quantity allows it
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    price = np.where(self.quantity != 0, self.value / self.quantity, np.nan)
+            self.price = np.asarray(price, dtype=np.float64)
+
+        self.weight = self._compute_weights()
+
+    @classmethod
+    def from_records(cls, holdings: List[Dict]) -> 'HoldingsFrame':
+        """Build a frame from a list of holding dicts or Holding objects"""
+        n = len(holdings)
+        asset_ids = np.empty(n, dtype=object)
+        try:
+            # Slot reads skip the key hashing of the mapping interface; any dict in the list
+            # raises AttributeError and sends the whole list down the mapping path
+            asset_ids[:] = [h.asset for h in holdings]
+            quantity = np.fromiter((h.quantity for h in holdings), dtype=np.float64, count=n)
+            cost_basis = np.fromiter((h.cost_basis for h in holdings), dtype=np.float64, count=n)
+            value = np.fromiter((h.value for h in holdings), dtype=np.float64, count=n)
+            price = np.fromiter((np.nan if h.current_price is None else h.current_price for h in holdings),
+                                dtype=np.float64, count=n)
+        except AttributeError:
+            asset_ids[:] = [h['asset'] for h in holdings]
+            quantity = np.fromiter((h.get('quantity', 0) for h in holdings), dtype=np.float64, count=n)
+            cost_basis = np.fromiter((h['cost_basis'] for h in holdings), dtype=np.float64, count=n)
+            value = np.fromiter((h['value'] for h in holdings), dtype=np.float64, count=n)
+            price = np.fromiter((h.get('current_price', np.nan) for h in holdings), dtype=np.float64, count=n)
+
+        # Records without a quoted price fall back to value / quantity
+        missing = np.isnan(price) & (quantity != 0)
+        price[missing] = value[missing] / quantity[missing]
+        return cls(asset_ids, quantity, cost_basis, price=price, value=value)
+
+    def __len__(self) -> int:
+        return len(self.asset_ids)
+
+    def _compute_weights(self) -> np.ndarray:
+        """Position weights in percent of total value"""
+        total_value = self.value.sum()
+        if total_value > 0:
+            return self.value / total_value * 100
+        return np.zeros(len(self.value))
+
+    def revalue(self, price) -> None:
+        """Replace prices and recompute values and weights in place"""
+        self.price = np.asarray(price, dtype=np.float64)
+        self.value = np.nan_to_num(self.quantity * self.price)
+        self.weight = self._compute_weights()
+
+    def metrics(self) -> Dict:
+        """Calculate portfolio metrics in single vectorized passes"""
+        total_value = float(self.value.sum())
+        total_cost = float(self.cost_basis.sum())
+
+        total_return = total_value - total_cost
+        return_pct = (total_return / total_cost * 100) if total_cost > 0 else 0
+
+        fractions = self.weight / 100
+        herfindahl_index = float(np.dot(fractions, fractions))
+        diversification_ratio = 1 / herfindahl_index if herfindahl_index > 0 else 0
+
+        largest_position: Optional[str] = None
+        largest_position_weight = 0
+        if len(self):
+            idx = int(np.argmax(self.weight))
+            largest_position = self.asset_ids[idx]
+            largest_position_weight = float(self.weight[idx])
+
+        return {
+            'total_value': total_value,
+            'total_cost': total_cost,
+            'total_return': total_return,
+            'return_percentage': return_pct,
+            'num_positions': len(self),
+            'herfindahl_index': herfindahl_index,
+            'diversification_ratio': diversification_ratio,
+            'largest_position': largest_position,
+            'largest_position_weight': largest_position_weight
+        }
+
+    def write_weights(self, holdings: List[Dict]) -> None:
+        """Copy computed weights back onto the source holdings"""
+        for h, w in zip(holdings, self.weight.tolist()):
+            if type(h) is Holding:
+                h.weight = w
+            else:
+                h['weight'] = w
+
+    def to_records(self) -> List[Dict]:
+        """Convert back to the list-of-dicts holdings format"""
+        return [
+            {'asset': a, 'quantity': q, 'cost_basis': c, 'value': v,
+             'current_price': p, 'weight': w}
+            for a, q, c, v, p, w in zip(self.asset_ids.tolist(), self.quantity.tolist(),
+                                        self.cost_basis.tolist(), self.value.tolist(),
+                                        self.price.tolist(), self.weight.tolist())
+        ]
@@ -0,0 +1,347 @@
+import cProfile
+import functools
+import io
+import json
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+METRIC_PREFIX = 'portfolio_'
+MAX_RECENT_ERRORS = 50
+PROFILE_BACKENDS = ('cprofile', 'pyinstrument')
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; counts are per bucket, not cumulative"""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: List[int], total: float, count: int) -> None:
+        for i, c in enumerate(counts):
+            self.counts[i] += c
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the bucket (as histogram_quantile does)"""
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, c in zip(self.buckets, self.counts):
+            if c and seen + c >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / c
+            seen += c
+            lower = bound if not math.isinf(bound) else lower
+        return lower
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, latency histograms and gauges
+    Gauges come from collectors - callables returning {name: value} that
+    are read at snapshot time, so components such as the quote cache keep
+    their own counters and are only polled when metrics are exported.
+    Snapshots are plain dicts that can be merged back into another
+    registry, which is how process-pool workers report to the parent.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[LabelKey, float] = {}
+        self._histograms: Dict[LabelKey, Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+        self._errors = deque(maxlen=MAX_RECENT_ERRORS)
+        self._lock = threading.Lock()
+
+    def count(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a block into the `<name>_seconds` histogram and count calls / errors"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+            self.count(f"{name}_calls_total", **labels)
+
+    def record_error(self, where: str, message: str) -> None:
+        """Count an error and keep it in the recent-errors log"""
+        self.count('errors_total', where=where)
+        with self._lock:
+            self._errors.append({'time': time.time(), 'where': where, 'message': message})
+
+    def register_collector(self, name: str, collector: Callable[[], Dict]) -> None:
+        """Poll `collector()` for gauges named `<name>_<key>`; re-registering a name replaces it"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(_key(name, labels))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self._counters.items()]
+            histograms = [{'name': n, 'labels': dict(l), 'buckets': list(h.buckets), 'counts': list(h.counts),
+                           'sum': h.sum, 'count': h.count} for (n, l), h in self._histograms.items()]
+            collectors = list(self._collectors.items())
+            errors = list(self._errors)
+        gauges = []
+        for prefix, collector in collectors:
+            for key, value in collector().items():
+                if isinstance(value, (int, float)):
+                    gauges.append({'name': f"{prefix}_{key}", 'labels': {}, 'value': value})
+        return {'counters': counters, 'histograms': histograms, 'gauges': gauges, 'errors': errors}
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add another registry's counters, histograms and errors (gauges are not merged)"""
+        with self._lock:
+            for c in snapshot['counters']:
+                key = _key(c['name'], c['labels'])
+                self._counters[key] = self._counters.get(key, 0) + c['value']
+            for h in snapshot['histograms']:
+                key = _key(h['name'], h['labels'])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(h['buckets'])
+                histogram.merge(h['counts'], h['sum'], h['count'])
+            self._errors.extend(snapshot['errors'])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._errors.clear()
+
+    def summary(self) -> List[Dict]:
+        """Per-timer rows (calls, errors, mean / p50 / p95 / max-bucket latency) for display"""
+        rows = []
+        with self._lock:
+            items = list(self._histograms.items())
+            counters = dict(self._counters)
+        for (name, labels), h in sorted(items):
+            if not name.endswith('_seconds'):
+                continue
+            base = name[:-len('_seconds')]
+            rows.append({
+                'timer': base,
+                **dict(labels),
+                'calls': h.count,
+                'errors': int(counters.get((f"{base}_errors_total", labels), 0)),
+                'total_s': h.sum,
+                'mean_ms': h.sum / h.count * 1000 if h.count else math.nan,
+                'p50_ms': h.quantile(0.5) * 1000,
+                'p95_ms': h.quantile(0.95) * 1000,
+            })
+        return rows
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        snap = self.snapshot()
+        lines = []
+
+        def fmt_labels(labels: Dict, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in items) + '}'
+
+        for kind, rows in (('counter', snap['counters']), ('gauge', snap['gauges'])):
+            for name in sorted({r['name'] for r in rows}):
+                metric = _metric_name(name)
+                lines.append(f"# TYPE {metric} {kind}")
+                for r in rows:
+                    if r['name'] == name:
+                        lines.append(f"{metric}{fmt_labels(r['labels'])} {_fmt_value(r['value'])}")
+        for name in sorted({h['name'] for h in snap['histograms']}):
+            metric = _metric_name(name)
+            lines.append(f"# TYPE {metric} histogram")
+            for h in snap['histograms']:
+                if h['name'] != name:
+                    continue
+                cumulative = 0
+                for bound, c in zip(h['buckets'], h['counts']):
+                    cumulative += c
+                    le = '+Inf' if math.isinf(bound) else repr(bound)
+                    lines.append(f"{metric}_bucket{fmt_labels(h['labels'], ('le', le))} {cumulative}")
+                lines.append(f"{metric}_sum{fmt_labels(h['labels'])} {_fmt_value(h['sum'])}")
+                lines.append(f"{metric}_count{fmt_labels(h['labels'])} {h['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> str:
+        snap = self.snapshot()
+        snap['timers'] = self.summary()
+        return json.dumps(snap, default=str, indent=2)
+
+    def export(self, path: str, fmt: Optional[str] = None) -> None:
+        """
+        Write metrics to a local file, atomically
+        `fmt` is 'prometheus' or 'json'; by default .json paths get JSON and
+        anything else (e.g. .prom for a node_exporter textfile directory)
+        gets Prometheus text.
+        """
+        fmt = fmt or ('json' if path.endswith('.json') else 'prometheus')
+        body = self.to_json() if fmt == 'json' else self.to_prometheus()
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+
+def _metric_name(name: str) -> str:
+    return METRIC_PREFIX + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsExporter:
+    """Background thread that re-exports a registry to a file every `interval` seconds"""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 15.0, fmt: Optional[str] = None):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.registry.export(self.path, self.fmt)
+
+    def start(self) -> 'MetricsExporter':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.registry.export(self.path, self.fmt)
+
+
+_default_registry = None
+
+
+def get_default_registry() -> MetricsRegistry:
+    """Process-wide registry shared by every PortfolioAnalyzer by default"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
+
+
+def instrumented(name: Optional[str] = None):
+    """
+    Method decorator timing each call into the owner's `metrics` registry
+    Calls are recorded as method_calls_total / method_seconds with a
+    `method` label, so all analyzer methods share one histogram family.
+    """
+    def decorate(fn):
+        method = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            registry = getattr(self, 'metrics', None) or get_default_registry()
+            with registry.timer('method', method=method):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def profile(backend: str = 'cprofile', output: Optional[str] = None, stream=None, top: int = 30):
+    """
+    Profile the enclosed block
+    'cprofile' prints the top functions by cumulative time to `stream`
+    (stderr by default) and, with `output`, saves pstats data for
+    snakeviz / pstats. 'pyinstrument' needs the optional pyinstrument
+    package; `output` ending in .html gets its interactive HTML report.
+    """
+    stream = stream or sys.stderr
+    if backend == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("pyinstrument is not installed (pip install pyinstrument); "
+                              "use backend='cprofile' instead") from None
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            if output:
+                with open(output, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html() if output.endswith('.html') else profiler.output_text())
+            stream.write(profiler.output_text())
+    elif backend == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+    else:
+        raise ValueError(f"backend must be one of {PROFILE_BACKENDS}")
+
+
+def profile_to_text(fn: Callable, *args, backend: str = 'cprofile', top: int = 30, **kwargs):
+    """Run fn under the profiler; returns (result, report text)"""
+    buffer = io.StringIO()
+    with profile(backend, stream=buffer, top=top):
+        result = fn(*args, **kwargs)
+    return result, buffer.getvalue()
@@ -0,0 +1,362 @@
+"""
+Bulk QR code and Code128 barcode generation
+
+    python label_batch.py skus.csv -o labels.zip
+    python label_batch.py skus.jsonl -o labels.pdf --kind code128 -w 8
+
+Input is streamed from CSV (a header row with a `data` column) or JSON
+lines ({"data": ...} per line). Optional columns: `name` (or `sku` / `id`),
+used for ZIP member names, and `kind` (qr or code128), which overrides
+--kind per row. Payloads are rendered in chunks on a process pool; each
+worker configures one QRCode and one Code128 ImageWriter and reuses them
+for every label. All labels go into one output: a ZIP of PNGs or a
+multi-page PDF / TIFF (one label per page), written to a path or to an
+in-memory binary stream.
+
+Rendered PNGs are cached under a content hash of kind, payload and
+render options, so a rerun only renders the rows that changed. Labels
+are monochrome (mode "1"), which is what label printers take and encodes
+about twice as fast as RGB.
+
+Needs `qrcode` and `python-barcode` (with Pillow).
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from progress import ProgressMeter
+
+LABEL_KINDS = ('qr', 'code128')
+OUTPUT_FORMATS = ('zip', 'pdf', 'tiff')
+_EXTENSIONS = {'.zip': 'zip', '.pdf': 'pdf', '.tif': 'tiff', '.tiff': 'tiff'}
+NAME_COLUMNS = ('name', 'sku', 'id')
+
+# Same settings as generate_qrcode.py / generate_barcode.py; version is where best fit starts
+QR_OPTIONS = {'version': 1, 'error_correction': 'L', 'box_size': 10, 'border': 4}
+BARCODE_OPTIONS = {'module_width': 0.2, 'module_height': 15, 'font_size': 10, 'text_distance': 2, 'quiet_zone': 1}
+DEFAULT_CHUNK_SIZE = 200
+# Pages held in memory before a multi-page PDF / TIFF is appended to
+PAGES_PER_FLUSH = 1000
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.label_cache')
+
+# (name, kind, data)
+LabelItem = Tuple[str, str, str]
+
+_worker_state = {}
+
+
+def read_items(path: str, kind: str = 'qr') -> Iterator[LabelItem]:
+    """Stream (name, kind, data) from a CSV or JSON-lines file; rows without data are skipped"""
+    if kind not in LABEL_KINDS:
+        raise ValueError(f"kind must be one of {LABEL_KINDS}")
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ('.csv', '.jsonl'):
+        raise ValueError(f"Unsupported file type: {path} (expected .csv or .jsonl)")
+    with open(path, newline='' if ext == '.csv' else None, encoding='utf-8') as f:
+        rows = csv.DictReader(f) if ext == '.csv' else (json.loads(line) for line in f if line.strip())
+        for i, row in enumerate(rows):
+            data = row.get('data')
+            if data is None or data == '':
+                continue
+            name = next((str(row[c]) for c in NAME_COLUMNS if row.get(c) not in (None, '')), f"{i:06d}")
+            yield name, row.get('kind') or kind, str(data)
+
+
+def content_key(kind: str, data: str, options: Dict) -> str:
+    """Hash of everything that changes a label's pixels"""
+    payload = json.dumps([kind, data, options], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LabelCache:
+    """Rendered PNGs on disk, one file per content hash"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                png = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return png
+
+    def put(self, key: str, png: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so a killed run never leaves a truncated PNG behind
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(png)
+        os.replace(tmp, path)
+
+
+def render_options(qr_options: Optional[Dict] = None, barcode_options: Optional[Dict] = None) -> Dict[str, Dict]:
+    """Effective settings per label kind: the defaults overlaid with any overrides"""
+    return {'qr': dict(QR_OPTIONS, **(qr_options or {})),
+            'code128': dict(BARCODE_OPTIONS, **(barcode_options or {}))}
+
+
+class LabelRenderer:
+    """
+    One configured QRCode and Code128 writer, reused for every label
+    Building them is the per-label setup the single-shot scripts paid each
+    time; here it happens once per process.
+    """
+
+    def __init__(self, qr_options: Optional[Dict] = None, barcode_options: Optional[Dict] = None):
+        import barcode
+        import qrcode
+        from barcode.writer import ImageWriter
+        self.options = render_options(qr_options, barcode_options)
+        self.qr_options = self.options['qr']
+        self.barcode_options = self.options['code128']
+        levels = {'L': qrcode.constants.ERROR_CORRECT_L, 'M': qrcode.constants.ERROR_CORRECT_M,
+                  'Q': qrcode.constants.ERROR_CORRECT_Q, 'H': qrcode.constants.ERROR_CORRECT_H}
+        options = dict(self.qr_options, error_correction=levels[self.qr_options['error_correction']])
+        self._qr = qrcode.QRCode(**options)
+        self._code128 = barcode.get_barcode_class('code128')
+        self._writer = ImageWriter(mode='1')
+
+    def render(self, kind: str, data: str):
+        """PIL image of one label"""
+        if kind == 'qr':
+            qr = self._qr
+            qr.clear()
+            # make(fit=True) leaves the grown version behind; start every label from the configured one
+            qr.version = self.qr_options['version']
+            qr.add_data(data)
+            qr.make(fit=True)
+            return qr.make_image(fill_color="black", back_color="white").get_image()
+        if kind == 'code128':
+            return self._code128(data, writer=self._writer).render(self.barcode_options)
+        raise ValueError(f"Unknown label kind {kind!r} (expected one of {LABEL_KINDS})")
+
+    def render_png(self, kind: str, data: str) -> bytes:
+        buffer = io.BytesIO()
+        self.render(kind, data).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+def _init_worker(qr_options: Optional[Dict], barcode_options: Optional[Dict]) -> None:
+    """Configure the renderer once per worker process"""
+    _worker_state['renderer'] = LabelRenderer(qr_options, barcode_options)
+
+
+def _render_chunk(items: List[Tuple[str, str]]) -> List[Tuple[Optional[bytes], Optional[str]]]:
+    """(png, None) per (kind, data), or (None, error) for payloads the symbology rejects"""
+    renderer = _worker_state['renderer']
+    out = []
+    for kind, data in items:
+        try:
+            out.append((renderer.render_png(kind, data), None))
+        except Exception as e:
+            out.append((None, f"{type(e).__name__}: {e}"))
+    return out
+
+
+class ZipLabelSink:
+    """PNG members in one ZIP; stored uncompressed since PNG already is"""
+
+    def __init__(self, target: Union[str, BinaryIO]):
+        self._zip = zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED)
+        self._names = set()
+
+    def add(self, name: str, png: bytes) -> None:
+        name = name.replace('/', '_').replace('\\', '_')
+        member, n = f"{name}.png", 1
+        while member in self._names:
+            n += 1
+            member = f"{name}-{n}.png"
+        self._names.add(member)
+        self._zip.writestr(member, png)
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+class PageLabelSink:
+    """
+    Multi-page PDF or TIFF, one label per page
+    Pages are buffered and appended PAGES_PER_FLUSH at a time (Pillow's
+    PDF append mode; TIFF pages are appended to the existing file), so
+    memory stays bounded however many labels there are. Pillow walks every
+    existing TIFF page to append one, so TIFF cost grows with the square
+    of the page count; prefer PDF or ZIP for batches of many thousands.
+    """
+
+    def __init__(self, target: Union[str, BinaryIO], fmt: str, pages_per_flush: int = PAGES_PER_FLUSH):
+        self._own = isinstance(target, str)
+        self._stream = open(target, 'w+b') if self._own else target
+        self._start = self._stream.tell()
+        self.fmt = fmt
+        self.pages_per_flush = pages_per_flush
+        self._pages = []
+        self._written = 0
+
+    def add(self, name: str, png: bytes) -> None:
+        from PIL import Image
+        self._pages.append(Image.open(io.BytesIO(png)))
+        if len(self._pages) >= self.pages_per_flush:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pages:
+            return
+        first, rest = self._pages[0], self._pages[1:]
+        # Both formats read back what was written so far to append to it
+        self._stream.seek(self._start)
+        if self.fmt == 'pdf':
+            first.save(self._stream, format='PDF', save_all=True, append_images=rest, append=self._written > 0)
+        else:
+            first.save(self._stream, format='TIFF', save_all=True, append_images=rest, compression='group4')
+        self._written += len(self._pages)
+        self._pages = []
+
+    def close(self) -> None:
+        self._flush()
+        if self._own:
+            self._stream.close()
+
+
+def open_label_sink(target: Union[str, BinaryIO], fmt: Optional[str] = None):
+    """
+    ZIP / PDF / TIFF sink for a path or a seekable binary stream (io.BytesIO for in-memory output)
+    The format defaults to the path's extension, or to zip for streams.
+    """
+    if fmt is None:
+        fmt = _EXTENSIONS.get(os.path.splitext(target)[1].lower(), 'zip') if isinstance(target, str) else 'zip'
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"format must be one of {OUTPUT_FORMATS}")
+    return ZipLabelSink(target) if fmt == 'zip' else PageLabelSink(target, fmt)
+
+
+def generate_labels(items: Iterable[LabelItem], output: Union[str, BinaryIO], fmt: Optional[str] = None,
+                    workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    cache_dir: Optional[str] = DEFAULT_CACHE_DIR, qr_options: Optional[Dict] = None,
+                    barcode_options: Optional[Dict] = None, progress: bool = True) -> Dict:
+    """
+    Render every (name, kind, data) item into one ZIP / PDF / TIFF; returns counts and labels/sec
+    Items are consumed lazily, a chunk at a time, with at most two chunks
+    per worker in flight, and written in input order. Cached labels are
+    read instead of rendered. Payloads that cannot be encoded are left out
+    and reported under 'errors' as (position in items, name, message).
+    """
+    options = render_options(qr_options, barcode_options)
+    cache = LabelCache(cache_dir) if cache_dir else None
+    sink = open_label_sink(output, fmt)
+    meter = ProgressMeter(None, enabled=progress, unit='labels')
+    stats = {'labels': 0, 'rendered': 0, 'cached': 0, 'errors': []}
+    start = time.perf_counter()
+    offset = 0
+
+    def prepare(chunk: List[LabelItem]):
+        """Cached PNGs by position and the (position, key) of those still to render"""
+        found, todo = {}, []
+        for i, (_, kind, data) in enumerate(chunk):
+            key = content_key(kind, data, options.get(kind))
+            png = cache.get(key) if cache is not None else None
+            if png is None:
+                todo.append((i, key))
+            else:
+                found[i] = png
+        return found, todo
+
+    def collect(chunk: List[LabelItem], found: Dict[int, bytes], todo, rendered) -> None:
+        # Chunks are collected in input order, so offset is the position of chunk[0]
+        nonlocal offset
+        for (i, key), (png, error) in zip(todo, rendered):
+            if error is not None:
+                stats['errors'].append((offset + i, chunk[i][0], error))
+                continue
+            found[i] = png
+            if cache is not None:
+                cache.put(key, png)
+        for i, (name, _, _) in enumerate(chunk):
+            if i in found:
+                sink.add(name, found[i])
+        stats['rendered'] += len(todo) - sum(1 for _, error in rendered if error is not None)
+        stats['cached'] += len(chunk) - len(todo)
+        stats['labels'] += len(found)
+        offset += len(chunk)
+        meter.update(len(chunk))
+
+    items = iter(items)
+    chunks = iter(lambda: list(islice(items, chunk_size)), [])
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1:
+            _init_worker(qr_options, barcode_options)
+            for chunk in chunks:
+                found, todo = prepare(chunk)
+                collect(chunk, found, todo, _render_chunk([chunk[i][1:] for i, _ in todo]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(qr_options, barcode_options)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    found, todo = prepare(chunk)
+                    future = pool.submit(_render_chunk, [chunk[i][1:] for i, _ in todo])
+                    pending.append((chunk, found, todo, future))
+                    if len(pending) >= 2 * workers:
+                        chunk, found, todo, future = pending.popleft()
+                        collect(chunk, found, todo, future.result())
+                while pending:
+                    chunk, found, todo, future = pending.popleft()
+                    collect(chunk, found, todo, future.result())
+    finally:
+        meter.close()
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    stats.update(workers=workers, seconds=elapsed,
+                 labels_per_sec=stats['labels'] / elapsed if elapsed > 0 else 0.0)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate QR codes or Code128 barcodes in bulk")
+    parser.add_argument('input', help="Payloads file (.csv or .jsonl with a data column)")
+    parser.add_argument('-o', '--output', default='labels.zip', help="Output file (.zip, .pdf, .tif/.tiff)")
+    parser.add_argument('--kind', choices=LABEL_KINDS, default='qr', help="Label kind for rows without a kind")
+    parser.add_argument('-w', '--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Labels per task")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_DIR, help="Directory of rendered labels by content hash")
+    parser.add_argument('--no-cache', action='store_true', help="Render every label")
+    parser.add_argument('-q', '--quiet', action='store_true', help="No progress meter")
+    args = parser.parse_args(argv)
+
+    summary = generate_labels(read_items(args.input, args.kind), args.output, workers=args.workers,
+                              chunk_size=args.chunk_size, cache_dir=None if args.no_cache else args.cache,
+                              progress=not args.quiet)
+    print(f"Generated {summary['labels']:,} labels ({summary['rendered']:,} rendered, "
+          f"{summary['cached']:,} from cache) in {summary['seconds']:.2f}s with {summary['workers']} workers "
+          f"- {summary['labels_per_sec']:,.0f} labels/sec")
+    for index, name, error in summary['errors'][:10]:
+        print(f"  skipped #{index + 1} {name}: {error}")
+    if len(summary['errors']) > 10:
+        print(f"  ... and {len(summary['errors']) - 10:,} more skipped")
+    print(f"Labels written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
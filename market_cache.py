@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Seconds a quote stays fresh, per data source
+DEFAULT_TTLS = {
+    'coingecko': 60,
+    'alphavantage': 300,
+    'fx': 600,
+}
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _estimate_size(value) -> int:
+    """Approximate memory footprint of a cached quote"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class QuoteCache:
+    """
+    TTL + LRU cache for market quotes
+    Entries are keyed per (source, asset) so overlapping requests only fetch
+    the assets that are missing or stale. The least recently used entries are
+    evicted once the estimated size exceeds `max_bytes`.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, clock: Callable[[], float] = time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, source: str, asset: str):
+        """Return a fresh cached quote or None"""
+        key = (source, asset)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if self.clock() >= expires_at:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, source: str, asset: str, value) -> None:
+        """Store a quote, evicting least recently used entries over budget"""
+        key = (source, asset)
+        size = _estimate_size(value)
+        expires_at = self.clock() + self.ttls.get(source, 60)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_many(self, source: str, assets: Iterable[str]) -> Tuple[Dict, List[str]]:
+        """Split assets into cached quotes and the ones still to fetch"""
+        found, missing = {}, []
+        for asset in assets:
+            value = self.get(source, asset)
+            if value is None:
+                missing.append(asset)
+            else:
+                found[asset] = value
+        return found, missing
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit / miss / eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+def cached_fetch_many(cache: Optional[QuoteCache], source: str, assets: List[str],
+                      fetch_missing: Callable[[List[str]], Dict], refresh: bool = False) -> Dict:
+    """
+    Resolve quotes for `assets` through the cache
+    `fetch_missing` receives only the uncached assets and returns
+    {asset: quote}; fetched quotes are stored before being merged in.
+    With refresh=True every asset is refetched and the cache overwritten.
+    """
+    assets = list(dict.fromkeys(assets))
+    if cache is None:
+        return fetch_missing(assets) if assets else {}
+
+    if refresh:
+        found, missing = {}, assets
+    else:
+        found, missing = cache.get_many(source, assets)
+    if missing:
+        fetched = fetch_missing(missing)
+        for asset, quote in fetched.items():
+            cache.put(source, asset, quote)
+        found.update(fetched)
+    return found
+
+
+_default_cache = None
+
+
+def get_default_cache() -> QuoteCache:
+    """Process-wide cache shared by every PortfolioAnalyzer by default"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = QuoteCache()
+    return _default_cache
@@ -0,0 +1,151 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from instrumentation import MetricsRegistry, get_default_registry
+
+# Free-tier request budgets as (requests, per seconds)
+ALPHA_VANTAGE_RATE = (5, 60)
+COINGECKO_RATE = (30, 60)
+# Largest page CoinGecko's /coins/markets accepts
+COINGECKO_MAX_PAGE = 250
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is free"""
+
+    def __init__(self, rate: float, capacity: float,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_period(cls, requests_per_period: int, period: float) -> 'TokenBucket':
+        return cls(rate=requests_per_period / period, capacity=requests_per_period)
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class PooledTransport:
+    """
+    Shared HTTP transport for market-data requests
+    One requests.Session with a sized connection pool is reused for every
+    call, so concurrent fetches share keep-alive connections instead of
+    paying a TCP/TLS handshake each. Requests are retried with exponential
+    backoff on connection errors and 429/5xx responses. Request latency,
+    response bytes, statuses and retries are recorded per source in
+    `metrics`.
+    """
+
+    def __init__(self, pool_size: int = 16, max_retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 10, rate_limits: Optional[Dict[str, TokenBucket]] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate_limits = rate_limits if rate_limits is not None else {
+            'alphavantage': TokenBucket.per_period(*ALPHA_VANTAGE_RATE),
+            'coingecko': TokenBucket.per_period(*COINGECKO_RATE),
+        }
+        # requests is only imported once a transport is actually needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.retries = 0
+        self.metrics = metrics if metrics is not None else get_default_registry()
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    def get_json(self, url: str, params: Dict, source: Optional[str] = None):
+        """GET a JSON payload, rate limited per source and retried on transient errors"""
+        import requests
+        limiter = self.rate_limits.get(source) if source else None
+        label = source or 'other'
+        for attempt in range(self.max_retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            response = None
+            try:
+                with self.metrics.timer('http_request', source=label):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                self.metrics.count('http_responses_total', source=label, status=response.status_code)
+                self.metrics.count('http_response_bytes_total', len(response.content), source=label)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = requests.HTTPError(f"{response.status_code} for {response.url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            self.retries += 1
+            self.metrics.count('http_retries_total', source=label)
+            time.sleep(self._retry_delay(attempt, response))
+
+    def map(self, fn: Callable, items: Iterable, max_workers: Optional[int] = None) -> Tuple[List, Dict]:
+        """
+        Run fn over items with bounded concurrency
+        Returns ([(item, result), ...], {item: error message}) so one failing
+        item does not sink the whole batch.
+        """
+        items = list(items)
+        if not items:
+            return [], {}
+        workers = min(max_workers or self.pool_size, len(items))
+
+        def call(item):
+            try:
+                return item, fn(item), None
+            except Exception as e:
+                return item, None, str(e)
+
+        results, errors = [], {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for item, result, error in pool.map(call, items):
+                if error is None:
+                    results.append((item, result))
+                else:
+                    errors[item] = error
+        return results, errors
+
+
+def chunked(items: List, size: int) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+_default_transport = None
+
+
+def get_default_transport() -> PooledTransport:
+    """Process-wide transport shared by every PortfolioAnalyzer by default"""
+    global _default_transport
+    if _default_transport is None:
+        _default_transport = PooledTransport()
+    return _default_transport
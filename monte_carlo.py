@@ -0,0 +1,88 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+DEFAULT_CHUNK_PATHS = 50_000
+REPORTED_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def cholesky_factor(cov: np.ndarray) -> np.ndarray:
+    """Cholesky factor of a covariance matrix, adding diagonal jitter if it is not positive definite"""
+    cov = np.asarray(cov, dtype=np.float64)
+    jitter = 0.0
+    scale = np.mean(np.diag(cov)) or 1.0
+    for _ in range(8):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0 else jitter * 10
+    raise np.linalg.LinAlgError("Covariance matrix is not positive semi-definite")
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """Terminal values for one chunk of buy-and-hold paths"""
+    seed, n_paths, positions, mean, chol, horizon_days = args
+    rng = np.random.default_rng(seed)
+    # Growth of each position; memory is (chunk x assets) whatever the horizon
+    growth = np.ones((n_paths, len(positions)))
+    for _ in range(horizon_days):
+        shocks = rng.standard_normal((n_paths, len(positions))) @ chol.T
+        growth *= 1 + mean + shocks
+    return growth @ positions
+
+
+def simulate_terminal_values(positions, mean, cov, horizon_days: int = 10,
+                             n_paths: int = 100_000, seed: Optional[int] = None,
+                             workers: int = 1, chunk_paths: int = DEFAULT_CHUNK_PATHS) -> np.ndarray:
+    """
+    Simulate terminal portfolio values with correlated daily returns
+    `positions` are current values per asset, `mean`/`cov` daily return
+    moments. Paths are generated in chunks of `chunk_paths`, each drawing
+    from its own SeedSequence child, so results depend only on `seed`,
+    `n_paths` and `chunk_paths` - never on the worker count. Chunks are fanned
+    out over a process pool when `workers` > 1.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)
+    chol = cholesky_factor(cov)
+
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(s, size, positions, mean, chol, horizon_days) for s, size in zip(seeds, sizes)]
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, tasks))
+    else:
+        chunks = [_simulate_chunk(task) for task in tasks]
+    return np.concatenate(chunks) if chunks else np.empty(0)
+
+
+def monte_carlo_var(positions, mean, cov, confidence: float = 0.95, horizon_days: int = 10,
+                    n_paths: int = 100_000, seed: Optional[int] = None, workers: int = 1,
+                    chunk_paths: int = DEFAULT_CHUNK_PATHS) -> Dict:
+    """Simulation-based VaR / CVaR and terminal value distribution"""
+    initial_value = float(np.sum(positions))
+    terminal = simulate_terminal_values(positions, mean, cov, horizon_days, n_paths,
+                                        seed, workers, chunk_paths)
+    pnl = terminal - initial_value
+    cutoff = np.percentile(pnl, (1 - confidence) * 100)
+    tail = pnl[pnl <= cutoff]
+
+    var = -cutoff
+    cvar = -tail.mean() if len(tail) else var
+    return {
+        'initial_value': initial_value,
+        'confidence': confidence,
+        'horizon_days': horizon_days,
+        'n_paths': n_paths,
+        'var': var,
+        'cvar': cvar,
+        'var_pct': var / initial_value if initial_value else 0,
+        'cvar_pct': cvar / initial_value if initial_value else 0,
+        'expected_value': float(terminal.mean()),
+        'percentiles': dict(zip(REPORTED_PERCENTILES, np.percentile(terminal, REPORTED_PERCENTILES))),
+        'terminal_values': terminal
+    }
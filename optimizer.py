@@ -0,0 +1,249 @@
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+from risk import TRADING_DAYS, RISK_FREE_RATE
+
+OPTIMIZER_METHODS = ('min_variance', 'max_sharpe', 'risk_parity')
+
+
+def project_to_simplex_box(v: np.ndarray, lower: float = 0.0, upper: float = 1.0) -> np.ndarray:
+    """
+    Euclidean projection onto {lower <= w <= upper, sum(w) = 1}
+    The projection is clip(v - tau, lower, upper) for the shift tau where the
+    clipped sum equals one. That sum is piecewise linear in tau, so it is
+    evaluated at every breakpoint with sorted prefix sums and tau is read
+    off the crossing segment exactly - O(n log n), no iteration.
+    """
+    n = len(v)
+    if n * lower > 1 + 1e-12 or n * upper < 1 - 1e-12:
+        raise ValueError(f"Bounds ({lower}, {upper}) are infeasible for {n} assets")
+    a = np.sort(v - lower)
+    width = upper - lower
+    suffix = np.concatenate((np.cumsum(a[::-1])[::-1], [0.0]))
+
+    def excess(tau):
+        # sum(max(a - tau, 0)) for an array of shifts
+        k = np.searchsorted(a, tau, side='right')
+        return suffix[k] - (n - k) * tau
+
+    def clipped_sum(tau):
+        return n * lower + excess(tau) - excess(tau + width)
+
+    breakpoints = np.sort(np.concatenate((a, a - width)), kind='stable')
+    values = clipped_sum(breakpoints)
+    # values is non-increasing; find the first breakpoint at or below 1
+    idx = int(np.searchsorted(-values, -1.0, side='left'))
+    if idx == 0:
+        tau = breakpoints[0]
+    elif idx == len(breakpoints):
+        tau = breakpoints[-1]
+    else:
+        t0, t1 = breakpoints[idx - 1], breakpoints[idx]
+        g0, g1 = values[idx - 1], values[idx]
+        tau = t1 if g0 == g1 else t0 + (g0 - 1) * (t1 - t0) / (g0 - g1)
+    return np.clip(v - tau, lower, upper)
+
+
+def _largest_eigenvalue(cov: np.ndarray, iterations: int = 50) -> float:
+    """Power iteration estimate of the largest eigenvalue"""
+    x = np.ones(len(cov)) / np.sqrt(len(cov))
+    value = 0.0
+    for _ in range(iterations):
+        y = cov @ x
+        value = np.linalg.norm(y)
+        if value == 0:
+            return 0.0
+        x = y / value
+    return float(value)
+
+
+def _mean_variance_pgd(mean: np.ndarray, cov: np.ndarray, risk_aversion: float, w0: np.ndarray,
+                       lower: float, upper: float, lipschitz: float,
+                       max_iter: int = 2000, tol: float = 1e-8) -> np.ndarray:
+    """
+    Accelerated projected gradient for min (risk_aversion / 2) w'Cw - mean'w
+    Momentum is restarted whenever it points uphill (O'Donoghue & Candes),
+    which keeps convergence linear on these strongly convex problems.
+    """
+    # Small margin since the power-iteration eigenvalue can undershoot
+    step = 1 / (1.01 * risk_aversion * lipschitz)
+    w = y = w0
+    t = 1.0
+    for _ in range(max_iter):
+        w_next = project_to_simplex_box(y - step * (risk_aversion * (cov @ y) - mean), lower, upper)
+        if np.max(np.abs(w_next - w)) < tol:
+            return w_next
+        if (y - w_next) @ (w_next - w) > 0:
+            t, y = 1.0, w_next
+        else:
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + (t - 1) / t_next * (w_next - w)
+            t = t_next
+        w = w_next
+    return w
+
+
+def _within_bounds(w: np.ndarray, lower: float, upper: float) -> bool:
+    return bool(np.all(w >= lower - 1e-12) and np.all(w <= upper + 1e-12))
+
+
+def min_variance_weights(cov: np.ndarray, lower: float = 0.0, upper: float = 1.0) -> np.ndarray:
+    """Minimum-variance weights; closed form when it satisfies the bounds"""
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    try:
+        raw = np.linalg.solve(cov, np.ones(n))
+        w = raw / raw.sum()
+        if _within_bounds(w, lower, upper):
+            return w
+    except np.linalg.LinAlgError:
+        pass
+    w0 = project_to_simplex_box(np.full(n, 1 / n), lower, upper)
+    return _mean_variance_pgd(np.zeros(n), cov, 1.0, w0, lower, upper, _largest_eigenvalue(cov))
+
+
+def sharpe_ratio(w: np.ndarray, mean: np.ndarray, cov: np.ndarray, risk_free_rate: float) -> float:
+    volatility = np.sqrt(max(w @ cov @ w, 0.0))
+    return float((w @ mean - risk_free_rate) / volatility) if volatility > 0 else 0.0
+
+
+def max_sharpe_weights(mean: np.ndarray, cov: np.ndarray, risk_free_rate: float = RISK_FREE_RATE,
+                       lower: float = 0.0, upper: float = 1.0, refine_steps: int = 30) -> np.ndarray:
+    """
+    Maximum-Sharpe (tangency) weights
+    Uses the closed form when it is feasible. Otherwise the tangency
+    portfolio lies on the constrained frontier, so a coarse warm-started
+    sweep brackets the best risk aversion and a golden-section search on
+    log(risk aversion) refines it.
+    """
+    mean = np.asarray(mean, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    try:
+        raw = np.linalg.solve(cov, mean - risk_free_rate)
+        if raw.sum() > 0:
+            w = raw / raw.sum()
+            if _within_bounds(w, lower, upper):
+                return w
+    except np.linalg.LinAlgError:
+        pass
+
+    frontier = efficient_frontier(mean, cov, n_points=20, risk_free_rate=risk_free_rate,
+                                  lower=lower, upper=upper)
+    gammas = np.log(frontier['risk_aversion'])
+    best = int(np.argmax(frontier['sharpe_ratio']))
+    lipschitz = _largest_eigenvalue(cov)
+    w_start = frontier['weights'][best]
+
+    def evaluate(log_gamma):
+        w = _mean_variance_pgd(mean, cov, np.exp(log_gamma), w_start, lower, upper, lipschitz)
+        return sharpe_ratio(w, mean, cov, risk_free_rate), w
+
+    a, b = gammas[max(best - 1, 0)], gammas[min(best + 1, len(gammas) - 1)]
+    ratio = (np.sqrt(5) - 1) / 2
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    (fc, wc), (fd, wd) = evaluate(c), evaluate(d)
+    best_value, best_w = frontier['sharpe_ratio'][best], w_start
+    for _ in range(refine_steps):
+        if fc > fd:
+            b, d, fd, wd = d, c, fc, wc
+            c = b - ratio * (b - a)
+            fc, wc = evaluate(c)
+        else:
+            a, c, fc, wc = c, d, fd, wd
+            d = a + ratio * (b - a)
+            fd, wd = evaluate(d)
+    for value, w in ((fc, wc), (fd, wd)):
+        if value > best_value:
+            best_value, best_w = value, w
+    return best_w
+
+
+def risk_parity_weights(cov: np.ndarray, budgets: Optional[np.ndarray] = None,
+                        max_iter: int = 100, tol: float = 1e-12) -> np.ndarray:
+    """
+    Equal (or budgeted) risk contribution weights
+    Solves the convex problem min 1/2 y'Cy - sum(b log y) with damped
+    Newton steps; w = y / sum(y) gives each asset risk contribution b_i.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    b = np.full(n, 1 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+    y = 1 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(np.sum(b) / (y @ cov @ y))
+    for _ in range(max_iter):
+        grad = cov @ y - b / y
+        hessian = cov + np.diag(b / y ** 2)
+        direction = np.linalg.solve(hessian, grad)
+        # Damp the step so every coordinate stays positive
+        shrink = direction / y
+        alpha = min(1.0, 0.95 / shrink.max()) if shrink.max() > 0 else 1.0
+        y = y - alpha * direction
+        if np.max(np.abs(alpha * direction) / y) < tol:
+            break
+    return y / y.sum()
+
+
+def efficient_frontier(mean: np.ndarray, cov: np.ndarray, n_points: int = 100,
+                       risk_free_rate: float = RISK_FREE_RATE,
+                       lower: float = 0.0, upper: float = 1.0) -> Dict:
+    """
+    Sweep the long-only (box-constrained) mean-variance frontier
+    Points are solved from high to low risk aversion, each warm-started
+    from the previous solution, so later points converge in a handful of
+    accelerated projected-gradient iterations.
+    """
+    mean = np.asarray(mean, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(mean)
+    lipschitz = _largest_eigenvalue(cov)
+
+    # Risk aversions spanning minimum variance to maximum return
+    scale = (np.ptp(mean) or 1.0) / (np.mean(np.diag(cov)) or 1.0)
+    risk_aversions = np.geomspace(scale * 1e3, scale * 1e-2, n_points)
+
+    w = min_variance_weights(cov, lower, upper)
+    weights = np.empty((n_points, n))
+    for i, gamma in enumerate(risk_aversions):
+        w = _mean_variance_pgd(mean, cov, gamma, w, lower, upper, lipschitz)
+        weights[i] = w
+
+    returns = weights @ mean
+    volatility = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', weights, cov, weights), 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, (returns - risk_free_rate) / volatility, 0.0)
+    return {
+        'risk_aversion': risk_aversions,
+        'expected_return': returns,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe,
+        'weights': weights
+    }
+
+
+def optimize_weights(mean: np.ndarray, cov: np.ndarray, method: str = 'max_sharpe',
+                     risk_free_rate: float = RISK_FREE_RATE,
+                     lower: float = 0.0, upper: float = 1.0) -> np.ndarray:
+    """
+    Fully invested weights for one of OPTIMIZER_METHODS within [lower, upper] per asset
+    Risk parity is solved unconstrained; when its weights fall outside the
+    box they are projected onto it, which keeps them feasible at the cost
+    of exactly equal risk contributions.
+    """
+    if method == 'min_variance':
+        return min_variance_weights(cov, lower, upper)
+    if method == 'max_sharpe':
+        return max_sharpe_weights(mean, cov, risk_free_rate, lower, upper)
+    if method == 'risk_parity':
+        w = risk_parity_weights(cov)
+        return w if _within_bounds(w, lower, upper) else project_to_simplex_box(w, lower, upper)
+    raise ValueError(f"method must be one of {OPTIMIZER_METHODS}")
+
+
+def to_target_weights(assets: Sequence[str], weights: np.ndarray, decimals: int = 4) -> Dict[str, float]:
+    """Percent targets in the format generate_rebalancing_recommendations expects"""
+    return {asset: round(float(w) * 100, decimals) for asset, w in zip(assets, weights)}
+
+
+def annualized_moments(daily_mean: np.ndarray, daily_cov: np.ndarray,
+                       periods_per_year: int = TRADING_DAYS) -> Tuple[np.ndarray, np.ndarray]:
+    return np.asarray(daily_mean) * periods_per_year, np.asarray(daily_cov) * periods_per_year
@@ -0,0 +1,39 @@
+"""
+Headless portfolio analytics engine shared by the CLI, the dashboard and workers
+Importing this package has no side effects and pulls in only NumPy; pandas
+and requests are imported the first time a DataFrame is built or a quote is
+fetched, so processes that only compute metrics start fast.
+"""
+
+_EXPORTS = {
+    'PortfolioAnalyzer': 'portfolio_core.analyzer',
+    'Holding': 'holdings',
+    'AssetTable': 'holdings',
+    'HoldingsFrame': 'holdings',
+    'batch_risk_metrics': 'risk',
+    'StreamingRiskMetrics': 'risk',
+    'rolling_risk_metrics': 'rolling_risk',
+    'CovarianceEngine': 'covariance',
+    'PriceBook': 'price_book',
+    'FxTable': 'fx',
+    'PriceStore': 'price_store',
+    'PriceRefresher': 'price_refresher',
+    'SnapshotStore': 'price_refresher',
+    'historical_portfolio_returns': 'price_store',
+    'rebalance_orders': 'rebalancer',
+    'run_grid': 'backtest',
+    'aggregate_ticks': 'ticks',
+    'tick_risk_metrics': 'ticks',
+    'open_report_writer': 'portfolio_core.reports',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
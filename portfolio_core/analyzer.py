@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import price_matrix, run_grid, simulate, target_matrix
+from covariance import CovarianceEngine
+from fx import BASE_CURRENCY, FxTable
+from holdings import HoldingsFrame, holding_columns
+from instrumentation import MetricsRegistry, get_default_registry, instrumented
+from market_cache import QuoteCache, cached_fetch_many, get_default_cache
+from market_transport import PooledTransport, COINGECKO_MAX_PAGE, chunked, get_default_transport
+from monte_carlo import monte_carlo_var
+from optimizer import annualized_moments, efficient_frontier, optimize_weights, to_target_weights
+from price_book import PriceBook
+from price_store import PriceStore, historical_portfolio_returns
+from portfolio_core.reports import iter_text_report
+from rebalancer import DEFAULT_BAND, build_account_matrix, rebalance_orders
+from risk import RISK_FREE_RATE, TRADING_DAYS, batch_risk_metrics
+from rolling_risk import rolling_risk_metrics, DEFAULT_WINDOWS
+from ticks import tick_risk_metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class PortfolioAnalyzer:
+    """
+    Advanced Portfolio Analytics System
+    Integrates multiple financial APIs for comprehensive portfolio analysis
+    """
+    
+    def __init__(self, cache: Optional[QuoteCache] = None,
+                 transport: Optional[PooledTransport] = None,
+                 price_store: Optional[PriceStore] = None,
+                 on_error: Callable[[str], None] = print,
+                 metrics: Optional[MetricsRegistry] = None):
+        # Free API endpoints 
+        self.coingecko_base = "https://api.coingecko.com/api/v3"
+        self.alpha_vantage_key = "demo"  # Replace with your free key from alphavantage.co
+        self.alpha_vantage_base = "https://www.alphavantage.co/query"
+        # Quote cache and pooled HTTP transport shared across analyzers unless passed in
+        self.cache = cache if cache is not None else get_default_cache()
+        self._transport = transport
+        # Optional on-disk price history backing risk and correlation analysis
+        self.price_store = price_store
+        # Where fetch errors are reported (print for the CLI, st.warning in the dashboard)
+        self.on_error = on_error
+        # Per-method timers and counters; quote cache counters are polled at export time
+        self.metrics = metrics if metrics is not None else get_default_registry()
+        self.metrics.register_collector('quote_cache', self.cache.stats)
+    
+    @property
+    def transport(self) -> PooledTransport:
+        # Created on first request so metric-only callers never import requests
+        if self._transport is None:
+            self._transport = get_default_transport()
+        return self._transport
+    
+    def _report_error(self, where: str, message: str) -> None:
+        self.metrics.record_error(where, message)
+        self.on_error(message)
+        
+    def _request_crypto_page(self, coin_ids: Tuple[str, ...]) -> List[Dict]:
+        """Fetch one page of CoinGecko market rows"""
+        params = {
+            'vs_currency': BASE_CURRENCY,
+            'ids': ','.join(coin_ids),
+            'order': 'market_cap_desc',
+            'per_page': COINGECKO_MAX_PAGE,
+            'sparkline': False,
+            'price_change_percentage': '1h,24h,7d,30d'
+        }
+        return self.transport.get_json(f"{self.coingecko_base}/coins/markets", params, source='coingecko')
+    
+    def _request_crypto_quotes(self, coin_ids: List[str]) -> Dict:
+        """Fetch CoinGecko market rows keyed by coin id, one concurrent request per page"""
+        pages = [tuple(page) for page in chunked(coin_ids, COINGECKO_MAX_PAGE)]
+        results, errors = self.transport.map(self._request_crypto_page, pages)
+        if errors and not results:
+            raise RuntimeError(next(iter(errors.values())))
+        for page, error in errors.items():
+            self._report_error('fetch_crypto_data', f"Error fetching crypto data for {len(page)} coins: {error}")
+        return {row['id']: row for _, rows in results for row in rows}
+    
+    @instrumented()
+    def fetch_crypto_data(self, coin_ids: List[str], refresh: bool = False) -> pd.DataFrame:
+        """Fetch cryptocurrency data from CoinGecko API (refresh=True bypasses cached quotes)"""
+        import pandas as pd
+        try:
+            quotes = cached_fetch_many(self.cache, 'coingecko', coin_ids, self._request_crypto_quotes, refresh)
+            rows = [quotes[c] for c in dict.fromkeys(coin_ids) if c in quotes]
+            if not rows:
+                return pd.DataFrame()
+            
+            with self.metrics.timer('dataframe_build', method='fetch_crypto_data'):
+                df = pd.DataFrame(rows).sort_values('market_cap', ascending=False, kind='stable')
+                df = df.reset_index(drop=True)
+           
+            available_cols = ['id', 'symbol', 'current_price', 'market_cap', 'total_volume']
+            optional_cols = ['price_change_percentage_24h', 'price_change_percentage_7d_in_currency', 
+                           'price_change_percentage_30d_in_currency']
+            
+            cols_to_return = available_cols.copy()
+            for col in optional_cols:
+                if col in df.columns:
+                    cols_to_return.append(col)
+            
+            return df[cols_to_return]
+        except Exception as e:
+            self._report_error('fetch_crypto_data', f"Error fetching crypto data: {e}")
+            return pd.DataFrame()
+    
+    def _request_fx_rates(self, currencies: List[str]) -> Dict:
+        """Fetch the CoinGecko exchange-rate table and return every fiat rate per base unit"""
+        payload = self.transport.get_json(f"{self.coingecko_base}/exchange_rates", {}, source='coingecko')
+        # The whole table is one response, so cache all of it rather than just the requested codes
+        return FxTable.from_exchange_rates(payload, BASE_CURRENCY).rates
+    
+    @instrumented()
+    def fetch_fx_rates(self, currencies: List[str]) -> FxTable:
+        """
+        Rates from the base currency to each of `currencies`, cached for the 'fx' TTL
+        The base currency never needs a request. Currencies that could not
+        be fetched are missing from the table (check `currency in table`).
+        """
+        wanted = [c.lower() for c in currencies if c.lower() != BASE_CURRENCY]
+        try:
+            rates = cached_fetch_many(self.cache, 'fx', wanted, self._request_fx_rates)
+        except Exception as e:
+            self._report_error('fetch_fx_rates', f"Error fetching exchange rates: {e}")
+            rates = {}
+        return FxTable({c: rates[c] for c in wanted if c in rates})
+    
+    def _request_stock_quote(self, symbol: str) -> Optional[Dict]:
+        """Fetch one Alpha Vantage global quote"""
+        params = {
+            'function': 'GLOBAL_QUOTE',
+            'symbol': symbol,
+            'apikey': self.alpha_vantage_key
+        }
+        data = self.transport.get_json(self.alpha_vantage_base, params, source='alphavantage')
+        
+        if 'Global Quote' in data:
+            quote = data['Global Quote']
+            return {
+                'symbol': symbol,
+                'price': float(quote.get('05. price', 0)),
+                'change': float(quote.get('09. change', 0)),
+                'change_percent': quote.get('10. change percent', '0%').rstrip('%'),
+                'volume': int(quote.get('06. volume', 0))
+            }
+        return None
+    
+    def _request_stock_quotes(self, symbols: List[str]) -> Dict:
+        """Fetch Alpha Vantage global quotes keyed by symbol, skipping unknown symbols"""
+        quotes = {}
+        for symbol in symbols:
+            quote = self._request_stock_quote(symbol)
+            if quote:
+                quotes[symbol] = quote
+        return quotes
+    
+    @instrumented()
+    def fetch_stock_data(self, symbol: str) -> Dict:
+        """Fetch stock data from Alpha Vantage API"""
+        try:
+            quotes = cached_fetch_many(self.cache, 'alphavantage', [symbol], self._request_stock_quotes)
+            return quotes.get(symbol, {})
+        except Exception as e:
+            self._report_error('fetch_stock_data', f"Error fetching stock data for {symbol}: {e}")
+            return {}
+    
+    @instrumented()
+    def fetch_stock_data_many(self, symbols: List[str], max_workers: Optional[int] = None) -> Dict:
+        """
+        Fetch many stock quotes concurrently over the pooled transport
+        Returns {'quotes': {symbol: quote}, 'errors': {symbol: message}};
+        symbols Alpha Vantage has no quote for are reported as errors too.
+        """
+        errors = {}
+        
+        def fetch_missing(missing: List[str]) -> Dict:
+            results, failed = self.transport.map(self._request_stock_quote, missing, max_workers)
+            errors.update(failed)
+            for symbol, error in failed.items():
+                self.metrics.record_error('fetch_stock_data_many', f"{symbol}: {error}")
+            quotes = {}
+            for symbol, quote in results:
+                if quote:
+                    quotes[symbol] = quote
+                else:
+                    errors[symbol] = 'No quote returned'
+            return quotes
+        
+        quotes = cached_fetch_many(self.cache, 'alphavantage', symbols, fetch_missing)
+        return {'quotes': quotes, 'errors': errors}
+    
+    @instrumented()
+    def record_market_snapshot(self, crypto_data: pd.DataFrame) -> int:
+        """Append fetched prices to the price store as today's close"""
+        if self.price_store is None:
+            return 0
+        return self.price_store.append_snapshot(crypto_data)
+    
+    @instrumented()
+    def load_price_history(self, assets: List[str], start=None, end=None) -> pd.DataFrame:
+        """Load stored daily prices (dates x assets) for a date range"""
+        if self.price_store is None:
+            import pandas as pd
+            return pd.DataFrame()
+        return self.price_store.load_frame(assets, start, end)
+    
+    @instrumented()
+    def calculate_historical_returns(self, holdings: List[Dict], start=None, end=None) -> np.ndarray:
+        """Daily portfolio returns from stored prices, weighted by current values"""
+        return historical_portfolio_returns(self.price_store, holdings, start, end)
+    
+    @instrumented()
+    def revalue_holdings(self, holdings: List[Dict], market_data: pd.DataFrame) -> List[str]:
+        """Price holdings from fetched market data in one indexed join; returns the unpriced asset ids"""
+        return PriceBook.from_market_data(market_data).revalue(holdings)
+    
+    @instrumented()
+    def convert_holdings(self, holdings: List[Dict], currency: str, fx: Optional[FxTable] = None) -> None:
+        """Convert valued holdings from the base currency to `currency` in place (fetching rates if no fx)"""
+        if fx is None:
+            fx = self.fetch_fx_rates([currency])
+        fx.convert_holdings(holdings, currency)
+    
+    @instrumented()
+    def calculate_portfolio_metrics(self, holdings: List[Dict]) -> Dict:
+        """Calculate comprehensive portfolio metrics"""
+        frame = HoldingsFrame.from_records(holdings)
+        frame.write_weights(holdings)
+        return frame.metrics()
+    
+    @instrumented()
+    def calculate_risk_metrics(self, returns: List[float], periods_per_year: float = TRADING_DAYS) -> Dict:
+        """
+        Calculate portfolio risk metrics
+        `periods_per_year` annualizes the returns: 252 for trading days, or
+        ticks.periods_per_year(interval) for intraday crypto bars.
+        """
+        returns_array = np.array(returns)
+        
+        # Volatility (annualized)
+        volatility = np.std(returns_array) * np.sqrt(periods_per_year)
+        
+        # Sharpe Ratio (assuming 4% risk-free rate)
+        risk_free_rate = RISK_FREE_RATE
+        mean_return = np.mean(returns_array) * periods_per_year
+        sharpe_ratio = (mean_return - risk_free_rate) / volatility if volatility > 0 else 0
+        
+        # Maximum Drawdown
+        cumulative = np.cumprod(1 + returns_array)
+        running_max = np.maximum.accumulate(cumulative)
+        drawdown = (cumulative - running_max) / running_max
+        max_drawdown = np.min(drawdown)
+        
+        # Value at Risk (95% confidence)
+        var_95 = np.percentile(returns_array, 5)
+        
+        return {
+            'volatility': volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': max_drawdown,
+            'var_95': var_95,
+            'mean_return': mean_return
+        }
+    
+    @instrumented()
+    def calculate_tick_risk_metrics(self, tick_chunks, interval='1min') -> Dict:
+        """Risk metrics of OHLCV bar returns streamed from (timestamps, prices, sizes) tick chunks"""
+        return tick_risk_metrics(tick_chunks, interval)
+    
+    @instrumented()
+    def calculate_risk_metrics_batch(self, returns_matrix):
+        """Calculate risk metrics for every row of an (n_series x n_days) returns matrix"""
+        return batch_risk_metrics(returns_matrix)
+    
+    @instrumented()
+    def calculate_rolling_risk_metrics(self, returns, windows=DEFAULT_WINDOWS) -> Dict:
+        """Calculate rolling risk metric series for each window length"""
+        return rolling_risk_metrics(returns, windows)
+    
+    @instrumented()
+    def calculate_monte_carlo_var(self, holdings: List[Dict], price_data: pd.DataFrame,
+                                  confidence: float = 0.95, horizon_days: int = 10,
+                                  n_paths: int = 100_000, seed: Optional[int] = 42,
+                                  workers: int = 1) -> Dict:
+        """Simulate VaR / CVaR of the holdings from a shrunk covariance of price history"""
+        frame = HoldingsFrame.from_records(holdings)
+        frame.write_weights(holdings)
+        total_value = frame.metrics()['total_value']
+        
+        # Position values per asset from the portfolio weights
+        positions = {}
+        for asset, weight in zip(frame.asset_ids.tolist(), frame.weight.tolist()):
+            positions[asset] = positions.get(asset, 0) + weight / 100 * total_value
+        missing = [a for a in positions if a not in price_data.columns]
+        if missing:
+            raise ValueError(f"No price history for: {', '.join(missing)}")
+        
+        assets = list(positions)
+        engine = CovarianceEngine.from_prices(price_data[assets])
+        return monte_carlo_var(
+            [positions[a] for a in assets], engine.mean(), engine.covariance(shrinkage='ledoit_wolf'),
+            confidence=confidence, horizon_days=horizon_days, n_paths=n_paths,
+            seed=seed, workers=workers
+        )
+    
+    @instrumented()
+    def optimize_target_weights(self, price_data: pd.DataFrame, method: str = 'max_sharpe',
+                                lower: float = 0.0, upper: float = 1.0) -> Dict[str, float]:
+        """Compute target weights (percent) for generate_rebalancing_recommendations"""
+        engine = CovarianceEngine.from_prices(price_data)
+        mean, cov = annualized_moments(engine.mean(), engine.covariance(shrinkage='ledoit_wolf'))
+        weights = optimize_weights(mean, cov, method, RISK_FREE_RATE, lower, upper)
+        return to_target_weights(engine.assets, weights)
+    
+    @instrumented()
+    def calculate_efficient_frontier(self, price_data: pd.DataFrame, n_points: int = 100,
+                                     lower: float = 0.0, upper: float = 1.0) -> Dict:
+        """Sweep the constrained efficient frontier from stored price history"""
+        engine = CovarianceEngine.from_prices(price_data)
+        mean, cov = annualized_moments(engine.mean(), engine.covariance(shrinkage='ledoit_wolf'))
+        frontier = efficient_frontier(mean, cov, n_points, RISK_FREE_RATE, lower, upper)
+        frontier['assets'] = engine.assets
+        return frontier
+    
+    @instrumented()
+    def generate_rebalancing_recommendations(self, holdings: List[Dict], 
+                                            target_weights: Dict[str, float]) -> List[Dict]:
+        """Generate portfolio rebalancing recommendations"""
+        assets, values, weights = holding_columns(holdings, 'asset', 'value', 'weight')
+        total_value = sum(values)
+        
+        current = np.array(weights, dtype=np.float64)
+        target = np.array([target_weights.get(a, 0) for a in assets], dtype=np.float64)
+        difference = target - current
+        
+        # Only recommend if difference > 2%, largest differences first
+        idx = np.flatnonzero(np.abs(difference) > 2)
+        idx = idx[np.argsort(-np.abs(difference[idx]), kind='stable')]
+        action_value = total_value * (target[idx] / 100) - np.array(values, dtype=np.float64)[idx]
+        
+        return [{
+            'asset': assets[i],
+            'action': 'BUY' if a > 0 else 'SELL',
+            'current_weight': c,
+            'target_weight': t,
+            'difference': d,
+            'amount': abs(a)
+        } for i, c, t, d, a in zip(idx.tolist(), current[idx].tolist(), target[idx].tolist(),
+                                   difference[idx].tolist(), action_value.tolist())]
+    
+    @instrumented()
+    def backtest_rebalancing(self, price_data: pd.DataFrame, target_weights: Dict[str, float],
+                             band: float = DEFAULT_BAND, frequency: int = 1, cost_bps: float = 0.0,
+                             periods_per_year: float = TRADING_DAYS) -> Dict:
+        """
+        Replay a (dates x assets) price history through the drift-band rebalancing rule
+        Returns the equity curve (growth of 1), rebalance count, turnover,
+        trading costs and calculate_risk_metrics of the equity returns.
+        """
+        import pandas as pd
+        prices, assets = price_matrix(price_data)
+        result = simulate(prices, target_matrix([target_weights], assets), band, frequency, cost_bps)
+        index = price_data.dropna().index if hasattr(price_data, 'dropna') else None
+        return {
+            'equity': pd.Series(result['equity'][:, 0], index=index, name='equity'),
+            'rebalances': int(result['rebalances'][0]),
+            'turnover': float(result['turnover'][0]),
+            'costs': float(result['costs'][0]),
+            'risk_metrics': self.calculate_risk_metrics(result['returns'][:, 0], periods_per_year),
+        }
+    
+    @instrumented()
+    def backtest_rebalancing_grid(self, price_data: pd.DataFrame, targets: List[Dict[str, float]],
+                                  bands=(DEFAULT_BAND,), frequencies=(1,), costs_bps=(0.0,),
+                                  periods_per_year: float = TRADING_DAYS,
+                                  workers: Optional[int] = None) -> pd.DataFrame:
+        """Backtest every combination of targets, bands, frequencies and costs; one summary row per config"""
+        return run_grid(price_data, targets, bands, frequencies, costs_bps, periods_per_year, workers=workers)
+    
+    @instrumented()
+    def generate_rebalancing_orders(self, accounts: List[List[Dict]], target_weights,
+                                    band=DEFAULT_BAND, min_trade: float = 0.0,
+                                    lot_sizes: Optional[Dict[str, float]] = None,
+                                    cost_bps: float = 0.0, fixed_cost: float = 0.0) -> pd.DataFrame:
+        """Generate rebalancing orders for many accounts in one vectorized pass"""
+        assets, values, targets, prices = build_account_matrix(accounts, target_weights)
+        lots = None
+        if lot_sizes:
+            lots = np.array([lot_sizes.get(a, 0) for a in assets], dtype=np.float64)
+        return rebalance_orders(values, targets, assets, prices, band=band, min_trade=min_trade,
+                                lot_size=lots, cost_bps=cost_bps, fixed_cost=fixed_cost)
+    
+    @instrumented()
+    def analyze_correlation(self, price_data: pd.DataFrame, shrinkage: Optional[str] = None,
+                            dtype=np.float64) -> pd.DataFrame:
+        """Calculate correlation matrix between assets"""
+        engine = CovarianceEngine.from_prices(price_data, dtype=dtype)
+        if engine.count == 0:
+            import pandas as pd
+            return pd.DataFrame(np.nan, index=price_data.columns, columns=price_data.columns)
+        return engine.correlation_frame(shrinkage)
+    
+    @instrumented()
+    def top_correlated_pairs(self, price_data: pd.DataFrame, k: int = 5,
+                             dtype=np.float32) -> pd.DataFrame:
+        """Top-k most correlated assets per asset without building the full matrix"""
+        engine = CovarianceEngine.from_prices(price_data, dtype=dtype, block_size=1024)
+        return engine.top_k_pairs(k)
+    
+    @instrumented()
+    def generate_report(self, portfolio_metrics: Dict, risk_metrics: Dict, 
+                       recommendations: List[Dict], currency: str = BASE_CURRENCY) -> str:
+        """Generate comprehensive portfolio analysis report (amounts shown in `currency`)"""
+        return "\n".join(iter_text_report(portfolio_metrics, risk_metrics, recommendations, currency=currency))
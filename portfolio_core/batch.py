@@ -0,0 +1,338 @@
+"""
+Headless batch analysis of many portfolios
+
+    python -m portfolio_core.batch portfolios.csv -o results.parquet
+
+Input is long format, one row per holding, with columns portfolio_id,
+asset, quantity, cost_basis and an optional target_weight (percent). It can
+be CSV, Parquet or JSON. A JSON file may also hold a list of
+{"portfolio_id", "holdings", "target_allocation"} objects. Every distinct
+asset is priced with one market-data fetch, or read from --prices. Chunks
+of portfolios then run on a process pool, and one row of results per
+portfolio is written to a single columnar file.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from holdings import PORTFOLIO_METRIC_NAMES, AssetTable, Holding
+from instrumentation import PROFILE_BACKENDS, get_default_registry, profile
+from price_store import DEFAULT_STORE_DIR, MIN_HISTORY_DAYS, PriceStore
+from progress import ProgressMeter
+from risk import RISK_METRIC_NAMES
+
+HOLDING_COLUMNS = ['portfolio_id', 'asset', 'quantity', 'cost_basis']
+RESULT_COLUMNS = (['portfolio_id'] + PORTFOLIO_METRIC_NAMES + ['unpriced_positions', 'history_days']
+                  + RISK_METRIC_NAMES + ['num_recommendations', 'rebalance_turnover', 'top_recommendation'])
+DEFAULT_CHUNK_SIZE = 250
+
+# (portfolio_id, holdings, target_allocation)
+Portfolio = Tuple[str, List[Holding], Dict[str, float]]
+
+_worker_state = {}
+
+
+def _read_table(path: str):
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(path)
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    if ext in ('.json', '.jsonl'):
+        return pd.read_json(path, lines=ext == '.jsonl')
+    raise ValueError(f"Unsupported file type: {path} (expected .csv, .parquet, .json or .jsonl)")
+
+
+def portfolios_from_frame(frame, assets: Optional[AssetTable] = None) -> List[Portfolio]:
+    """Group a long-format holdings table into portfolios of Holding objects"""
+    missing = [c for c in HOLDING_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    frame = frame.assign(portfolio_id=frame['portfolio_id'].astype(str))
+    frame = frame.sort_values('portfolio_id', kind='stable')
+
+    ids = frame['portfolio_id'].to_numpy()
+    asset_names = frame['asset'].astype(str).tolist()
+    quantity = frame['quantity'].astype(float).tolist()
+    cost_basis = frame['cost_basis'].astype(float).tolist()
+    targets = frame['target_weight'].astype(float).tolist() if 'target_weight' in frame.columns else None
+
+    bounds = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1], True])
+    table = assets if assets is not None else AssetTable()
+    names = [table.intern(a) for a in asset_names]
+    portfolios = []
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        holdings = [Holding(names[i], quantity[i], cost_basis[i], assets=table) for i in range(lo, hi)]
+        target_allocation = {}
+        if targets is not None:
+            target_allocation = {names[i]: targets[i] for i in range(lo, hi) if not np.isnan(targets[i])}
+        portfolios.append((ids[lo], holdings, target_allocation))
+    return portfolios
+
+
+def read_portfolios(path: str) -> List[Portfolio]:
+    """Load portfolios from a CSV, Parquet or JSON file"""
+    if path.lower().endswith('.json'):
+        with open(path) as f:
+            data = json.load(f)
+        if data and isinstance(data, list) and 'holdings' in data[0]:
+            table = AssetTable()
+            return [(str(p['portfolio_id']), [Holding.from_dict(dict(h, value=0), table) for h in p['holdings']],
+                     p.get('target_allocation') or {}) for p in data]
+    return portfolios_from_frame(_read_table(path))
+
+
+def fetch_prices(analyzer, assets: List[str], prices_path: Optional[str] = None) -> Dict[str, float]:
+    """Current price per asset, from one deduplicated fetch or a local id/current_price table"""
+    data = _read_table(prices_path) if prices_path else analyzer.fetch_crypto_data(assets)
+    if data.empty:
+        return {}
+    return dict(zip(data['id'].astype(str).tolist(), data['current_price'].astype(float).tolist()))
+
+
+def load_returns(store: Optional[PriceStore], assets: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Daily returns (days x assets) for every stored asset; NaN where an asset has no price"""
+    if store is None:
+        return np.empty((0, 0)), []
+    prices = store.load_frame(assets)
+    if prices.empty:
+        return np.empty((0, 0)), []
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    return returns.to_numpy(), list(returns.columns)
+
+
+def _init_worker(prices: Dict[str, float], returns: np.ndarray, return_assets: List[str],
+                 default_targets: Dict[str, float], ship_metrics: bool = False) -> None:
+    """Install the shared inputs once per worker process instead of once per task"""
+    from portfolio_core.analyzer import PortfolioAnalyzer
+    if ship_metrics:
+        # A forked worker starts with a copy of the parent's registry; ship only what it records itself
+        get_default_registry().reset()
+    _worker_state.update(
+        analyzer=PortfolioAnalyzer(),
+        ship_metrics=ship_metrics,
+        prices=prices,
+        returns=returns,
+        columns={asset: i for i, asset in enumerate(return_assets)},
+        default_targets=default_targets,
+    )
+
+
+def _portfolio_returns(holdings: List[Dict]) -> np.ndarray:
+    """Same weighting as historical_portfolio_returns, over the shared returns matrix"""
+    columns = _worker_state['columns']
+    values = {}
+    for h in holdings:
+        if h['asset'] in columns:
+            values[h['asset']] = values.get(h['asset'], 0) + h['value']
+    weights = np.array(list(values.values()), dtype=np.float64)
+    if not values or weights.sum() <= 0:
+        return np.empty(0)
+    sub = _worker_state['returns'][:, [columns[a] for a in values]]
+    sub = sub[~np.isnan(sub).any(axis=1)]
+    return sub @ (weights / weights.sum())
+
+
+def _analyze_chunk(chunk: List[Portfolio], with_reports: bool = False) -> Tuple[Dict[str, list], List, Optional[Dict]]:
+    """
+    Metrics, risk and rebalancing summary for a chunk, as result columns
+    With `with_reports` the per-portfolio (id, metrics, risk, recommendations)
+    are returned too, for the parent to stream to a report writer. Pool
+    workers also return (and reset) their instrumentation snapshot so the
+    parent registry covers the whole run.
+    """
+    analyzer = _worker_state['analyzer']
+    prices = _worker_state['prices']
+    out = {column: [] for column in RESULT_COLUMNS}
+    reports = []
+    for portfolio_id, holdings, targets in chunk:
+        unpriced = 0
+        for h in holdings:
+            price = prices.get(h['asset'])
+            if price is None:
+                unpriced += 1
+                continue
+            h['current_price'] = price
+            h['value'] = h['quantity'] * price
+
+        metrics = analyzer.calculate_portfolio_metrics(holdings)
+        returns = _portfolio_returns(holdings)
+        if len(returns) >= MIN_HISTORY_DAYS:
+            risk = analyzer.calculate_risk_metrics(returns)
+        else:
+            risk = dict.fromkeys(RISK_METRIC_NAMES, np.nan)
+        targets = targets or _worker_state['default_targets']
+        recommendations = analyzer.generate_rebalancing_recommendations(holdings, targets) if targets else []
+
+        out['portfolio_id'].append(portfolio_id)
+        for name in PORTFOLIO_METRIC_NAMES:
+            out[name].append(metrics[name])
+        out['unpriced_positions'].append(unpriced)
+        out['history_days'].append(len(returns))
+        for name in RISK_METRIC_NAMES:
+            out[name].append(float(risk[name]))
+        out['num_recommendations'].append(len(recommendations))
+        out['rebalance_turnover'].append(sum(r['amount'] for r in recommendations))
+        top = recommendations[0] if recommendations else None
+        out['top_recommendation'].append(f"{top['action']} {top['asset']}" if top else '')
+        if with_reports:
+            reports.append((portfolio_id, metrics, risk, recommendations))
+    snapshot = None
+    if _worker_state['ship_metrics']:
+        snapshot = analyzer.metrics.snapshot()
+        analyzer.metrics.reset()
+    return out, reports, snapshot
+
+
+def write_results(columns: Dict[str, list], path: str) -> None:
+    """Write result columns as Parquet, Feather, CSV or JSON lines, chosen by extension"""
+    import pandas as pd
+    df = pd.DataFrame(columns, columns=RESULT_COLUMNS)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.parquet':
+        df.to_parquet(path, index=False)
+    elif ext == '.feather':
+        df.to_feather(path)
+    elif ext == '.csv':
+        df.to_csv(path, index=False)
+    elif ext == '.jsonl':
+        df.to_json(path, orient='records', lines=True)
+    else:
+        raise ValueError(f"Unsupported output type: {path} (expected .parquet, .feather, .csv or .jsonl)")
+
+
+def run_batch(input_path: str, output_path: str, prices_path: Optional[str] = None,
+              targets_path: Optional[str] = None, store_root: Optional[str] = DEFAULT_STORE_DIR,
+              workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: bool = True, report_path: Optional[str] = None,
+              metrics_path: Optional[str] = None) -> Dict:
+    """
+    Analyze every portfolio in `input_path` and write the results; returns timing stats
+    With `report_path`, full per-portfolio reports are streamed there as
+    chunks finish (format from the extension, see open_report_writer).
+    With `metrics_path`, instrumentation from the parent and every worker is
+    exported there at the end (.json for JSON, anything else Prometheus text).
+    """
+    from portfolio_core.analyzer import PortfolioAnalyzer
+    from portfolio_core.reports import open_report_writer
+    timings = {}
+    start = time.perf_counter()
+    portfolios = read_portfolios(input_path)
+    # The holdings live for the whole run; freezing keeps GC passes from rescanning them
+    gc.freeze()
+    timings['read'] = time.perf_counter() - start
+
+    stage = time.perf_counter()
+    assets = list(dict.fromkeys(h['asset'] for _, holdings, _ in portfolios for h in holdings))
+    prices = fetch_prices(PortfolioAnalyzer(), assets, prices_path)
+    store = PriceStore(store_root) if store_root else None
+    returns, return_assets = load_returns(store, assets)
+    default_targets = {}
+    if targets_path:
+        with open(targets_path) as f:
+            default_targets = json.load(f)
+    timings['prices'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    chunks = [portfolios[i:i + chunk_size] for i in range(0, len(portfolios), chunk_size)]
+    initargs = (prices, returns, return_assets, default_targets)
+    meter = ProgressMeter(len(portfolios), enabled=progress, unit='portfolios')
+    writer = open_report_writer(report_path) if report_path else None
+    parts = [None] * len(chunks)
+
+    registry = get_default_registry()
+
+    def collect(i, result):
+        parts[i], reports, snapshot = result
+        if snapshot is not None:
+            registry.merge(snapshot)
+        if writer is not None:
+            writer.write_many(reports)
+        meter.update(len(chunks[i]))
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1 or len(chunks) <= 1:
+            _init_worker(*initargs)
+            for i, chunk in enumerate(chunks):
+                collect(i, _analyze_chunk(chunk, writer is not None))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=initargs + (True,)) as pool:
+                futures = {pool.submit(_analyze_chunk, chunk, writer is not None): i
+                           for i, chunk in enumerate(chunks)}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+    finally:
+        meter.close()
+        if writer is not None:
+            writer.close()
+        gc.unfreeze()
+        # In-process runs share the module; don't keep the analyzer and returns alive after returning
+        _worker_state.clear()
+    timings['analyze'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    columns = {column: [v for part in parts for v in part[column]] for column in RESULT_COLUMNS}
+    write_results(columns, output_path)
+    timings['write'] = time.perf_counter() - stage
+    if metrics_path:
+        registry.export(metrics_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'portfolios': len(portfolios),
+        'assets': len(assets),
+        'priced_assets': len(prices),
+        'workers': workers,
+        'seconds': elapsed,
+        'portfolios_per_sec': len(portfolios) / elapsed if elapsed > 0 else 0.0,
+        'timings': timings,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze many portfolios from a file in parallel")
+    parser.add_argument('input', help="Holdings file (.csv, .parquet, .json, .jsonl)")
+    parser.add_argument('-o', '--output', default='portfolio_results.parquet',
+                        help="Results file (.parquet, .feather, .csv, .jsonl)")
+    parser.add_argument('--prices', help="Use an id,current_price table instead of fetching live quotes")
+    parser.add_argument('--targets', help="JSON {asset: percent} target allocation for portfolios without targets")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Price history directory for risk metrics")
+    parser.add_argument('--no-history', action='store_true', help="Skip risk metrics from price history")
+    parser.add_argument('-w', '--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Portfolios per task")
+    parser.add_argument('--report', help="Also stream full reports here (.txt, .jsonl, .csv, .html)")
+    parser.add_argument('--metrics-out', help="Export timers and counters (.prom Prometheus text or .json)")
+    parser.add_argument('--profile', choices=PROFILE_BACKENDS, help="Profile the run and print the hottest functions")
+    parser.add_argument('--profile-out', help="Save profiler output (pstats file, or .html for pyinstrument)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="No progress meter")
+    args = parser.parse_args(argv)
+
+    with profile(args.profile, args.profile_out) if args.profile else nullcontext():
+        summary = run_batch(args.input, args.output, prices_path=args.prices, targets_path=args.targets,
+                            store_root=None if args.no_history else args.store, workers=args.workers,
+                            chunk_size=args.chunk_size, progress=not args.quiet, report_path=args.report,
+                            metrics_path=args.metrics_out)
+    timings = ', '.join(f"{k} {v:.2f}s" for k, v in summary['timings'].items())
+    print(f"Analyzed {summary['portfolios']:,} portfolios ({summary['priced_assets']}/{summary['assets']} "
+          f"assets priced) in {summary['seconds']:.2f}s with {summary['workers']} workers "
+          f"- {summary['portfolios_per_sec']:,.0f} portfolios/sec")
+    print(f"  {timings}")
+    print(f"Results written to {args.output}")
+    if args.report:
+        print(f"Reports written to {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Streaming portfolio report writers
+
+Each writer renders one report per write() call straight to a text stream.
+The stream can be an open file, sys.stdout or a socket's makefile('w'), so
+memory stays flat however many portfolios a run covers. Recommendation
+lists are rendered in full. Amounts are rendered in the writer's
+`currency`; convert the holdings (FxTable.convert_holdings) before
+computing the metrics passed in.
+
+    with open_report_writer('nightly.html') as writer:
+        for portfolio_id, metrics, risk, recommendations in results:
+            writer.write(portfolio_id, metrics, risk, recommendations)
+"""
+import csv
+import html
+import json
+import math
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from string import Template
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from fx import BASE_CURRENCY, format_money
+from holdings import PORTFOLIO_METRIC_NAMES
+from risk import RISK_METRIC_NAMES
+
+REPORT_FORMATS = ('text', 'jsonl', 'csv', 'html')
+_EXTENSIONS = {'.txt': 'text', '.jsonl': 'jsonl', '.csv': 'csv', '.html': 'html', '.htm': 'html'}
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def iter_text_report(portfolio_metrics: Dict, risk_metrics: Dict, recommendations: List[Dict],
+                     portfolio_id: Optional[str] = None, generated: Optional[str] = None,
+                     currency: str = BASE_CURRENCY) -> Iterator[str]:
+    """Lines of the plain-text report (the generate_report layout), amounts in `currency`"""
+    yield "=" * 60
+    yield "PORTFOLIO ANALYSIS REPORT"
+    if portfolio_id is not None:
+        yield f"Portfolio: {portfolio_id}"
+    yield f"Generated: {generated or _timestamp()}"
+    yield f"Currency: {currency.upper()}"
+    yield "=" * 60
+
+    yield "\nPORTFOLIO SUMMARY"
+    yield "-" * 60
+    yield f"Total Value:        {format_money(portfolio_metrics['total_value'], currency)}"
+    yield f"Total Cost Basis:   {format_money(portfolio_metrics['total_cost'], currency)}"
+    yield (f"Total Return:       {format_money(portfolio_metrics['total_return'], currency)} "
+           f"({portfolio_metrics['return_percentage']:.2f}%)")
+    yield f"Number of Positions: {portfolio_metrics['num_positions']}"
+
+    yield "\nRISK METRICS"
+    yield "-" * 60
+    yield f"Annual Volatility:   {risk_metrics['volatility']:.2%}"
+    yield f"Sharpe Ratio:        {risk_metrics['sharpe_ratio']:.3f}"
+    yield f"Max Drawdown:        {risk_metrics['max_drawdown']:.2%}"
+    yield f"Value at Risk (95%): {risk_metrics['var_95']:.2%}"
+    yield f"Expected Return:     {risk_metrics['mean_return']:.2%}"
+
+    yield "\nDIVERSIFICATION"
+    yield "-" * 60
+    yield f"Diversification Ratio: {portfolio_metrics['diversification_ratio']:.2f}"
+    yield f"Largest Position:      {portfolio_metrics['largest_position']} ({portfolio_metrics['largest_position_weight']:.1f}%)"
+
+    if recommendations:
+        yield "\nREBALANCING RECOMMENDATIONS"
+        yield "-" * 60
+        for rec in recommendations:
+            yield (f"{rec['action']:4} {rec['asset']:10} {format_money(rec['amount'], currency, 10)} "
+                   f"({rec['current_weight']:.1f}% → {rec['target_weight']:.1f}%)")
+
+    yield "\n" + "=" * 60
+
+
+def _json_safe(value):
+    """NumPy scalars (from the vectorized metric paths) to Python, and NaN / inf to None"""
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _to_json(value) -> str:
+    # Bare NaN is not JSON; missing metrics (e.g. too little history) are written as null
+    return json.dumps(_json_safe(value), allow_nan=False)
+
+
+class ReportWriter(ABC):
+    """
+    Base class: renders reports one at a time onto `stream`
+    Subclasses implement _write_report and optionally _begin / _end for
+    per-file headers and footers. Nothing is retained between reports.
+    """
+
+    def __init__(self, stream: TextIO, close_stream: bool = False, currency: str = BASE_CURRENCY):
+        self.stream = stream
+        self.close_stream = close_stream
+        self.currency = currency
+        self.count = 0
+        self._begun = False
+
+    def _begin(self) -> None:
+        pass
+
+    def _end(self) -> None:
+        pass
+
+    @abstractmethod
+    def _write_report(self, portfolio_id, portfolio_metrics: Dict, risk_metrics: Dict,
+                      recommendations: List[Dict], generated: str) -> None:
+        """Render one report onto self.stream"""
+
+    def write(self, portfolio_id, portfolio_metrics: Dict, risk_metrics: Dict,
+              recommendations: List[Dict]) -> None:
+        if not self._begun:
+            self._begin()
+            self._begun = True
+        self._write_report(portfolio_id, portfolio_metrics, risk_metrics, recommendations, _timestamp())
+        self.count += 1
+
+    def write_many(self, reports: Iterable) -> int:
+        """Write (portfolio_id, metrics, risk, recommendations) tuples from any iterable"""
+        for report in reports:
+            self.write(*report)
+        return self.count
+
+    def close(self) -> None:
+        if not self._begun:
+            self._begin()
+            self._begun = True
+        self._end()
+        self.stream.flush()
+        if self.close_stream:
+            self.stream.close()
+
+    def __enter__(self) -> 'ReportWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TextReportWriter(ReportWriter):
+    def _write_report(self, portfolio_id, portfolio_metrics, risk_metrics, recommendations, generated):
+        write = self.stream.write
+        for line in iter_text_report(portfolio_metrics, risk_metrics, recommendations, portfolio_id, generated,
+                                     self.currency):
+            write(line)
+            write("\n")
+        write("\n")
+
+
+class JsonLinesReportWriter(ReportWriter):
+    def _write_report(self, portfolio_id, portfolio_metrics, risk_metrics, recommendations, generated):
+        record = {
+            'portfolio_id': portfolio_id,
+            'generated': generated,
+            'currency': self.currency,
+            'portfolio': portfolio_metrics,
+            'risk': risk_metrics,
+            'recommendations': recommendations,
+        }
+        self.stream.write(_to_json(record))
+        self.stream.write("\n")
+
+
+class CsvReportWriter(ReportWriter):
+    """One row per portfolio; the full recommendation list is a JSON column"""
+    columns = (['portfolio_id', 'generated'] + PORTFOLIO_METRIC_NAMES + RISK_METRIC_NAMES
+               + ['num_recommendations', 'recommendations'])
+
+    def __init__(self, stream: TextIO, close_stream: bool = False, currency: str = BASE_CURRENCY):
+        super().__init__(stream, close_stream, currency)
+        self._writer = csv.writer(stream)
+
+    def _begin(self) -> None:
+        self._writer.writerow(self.columns)
+
+    def _write_report(self, portfolio_id, portfolio_metrics, risk_metrics, recommendations, generated):
+        row = [portfolio_id, generated]
+        row.extend(portfolio_metrics[name] for name in PORTFOLIO_METRIC_NAMES)
+        row.extend(risk_metrics[name] for name in RISK_METRIC_NAMES)
+        row.append(len(recommendations))
+        row.append(_to_json(recommendations))
+        self._writer.writerow(row)
+
+
+HTML_HEADER = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+section { border-bottom: 1px solid #ccc; padding: 1em 0; }
+table { border-collapse: collapse; }
+td, th { padding: 2px 10px; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+</style></head><body>
+<h1>$title</h1>
+<p>Generated: $generated</p>
+""")
+
+HTML_REPORT = Template("""<section id="portfolio-$anchor">
+<h2>Portfolio $portfolio_id</h2>
+<table>
+<tr><td>Total Value</td><td>$total_value</td></tr>
+<tr><td>Total Cost Basis</td><td>$total_cost</td></tr>
+<tr><td>Total Return</td><td>$total_return ($return_percentage)</td></tr>
+<tr><td>Number of Positions</td><td>$num_positions</td></tr>
+<tr><td>Annual Volatility</td><td>$volatility</td></tr>
+<tr><td>Sharpe Ratio</td><td>$sharpe_ratio</td></tr>
+<tr><td>Max Drawdown</td><td>$max_drawdown</td></tr>
+<tr><td>Value at Risk (95%)</td><td>$var_95</td></tr>
+<tr><td>Expected Return</td><td>$mean_return</td></tr>
+<tr><td>Diversification Ratio</td><td>$diversification_ratio</td></tr>
+<tr><td>Largest Position</td><td>$largest_position ($largest_position_weight)</td></tr>
+</table>
+$recommendations</section>
+""")
+
+HTML_RECOMMENDATIONS = Template("""<h3>Rebalancing Recommendations</h3>
+<table>
+<tr><th>Action</th><th>Asset</th><th>Amount</th><th>Current Weight</th><th>Target Weight</th></tr>
+$rows</table>
+""")
+
+HTML_RECOMMENDATION_ROW = Template(
+    "<tr><td>$action</td><td>$asset</td><td>$amount</td><td>$current_weight</td><td>$target_weight</td></tr>\n")
+
+HTML_FOOTER = Template("""<p>$count portfolios</p>
+</body></html>
+""")
+
+
+class HtmlReportWriter(ReportWriter):
+    """
+    HTML document with one <section> per portfolio
+    The header, per-portfolio and footer templates are string.Template
+    objects and can be replaced to restyle the output.
+    """
+
+    def __init__(self, stream: TextIO, close_stream: bool = False, currency: str = BASE_CURRENCY,
+                 title: str = "Portfolio Analysis Report",
+                 header: Template = HTML_HEADER, report: Template = HTML_REPORT,
+                 recommendations: Template = HTML_RECOMMENDATIONS,
+                 recommendation_row: Template = HTML_RECOMMENDATION_ROW, footer: Template = HTML_FOOTER):
+        super().__init__(stream, close_stream, currency)
+        self.title = title
+        self.header = header
+        self.report = report
+        self.recommendations = recommendations
+        self.recommendation_row = recommendation_row
+        self.footer = footer
+
+    def _begin(self) -> None:
+        self.stream.write(self.header.safe_substitute(title=html.escape(self.title), generated=_timestamp()))
+
+    def _write_report(self, portfolio_id, portfolio_metrics, risk_metrics, recommendations, generated):
+        rec_html = ''
+        if recommendations:
+            rows = ''.join(self.recommendation_row.safe_substitute(
+                action=rec['action'],
+                asset=html.escape(str(rec['asset'])),
+                amount=format_money(rec['amount'], self.currency),
+                current_weight=f"{rec['current_weight']:.1f}%",
+                target_weight=f"{rec['target_weight']:.1f}%"
+            ) for rec in recommendations)
+            rec_html = self.recommendations.safe_substitute(rows=rows)
+        pid = html.escape(str(portfolio_id))
+        self.stream.write(self.report.safe_substitute(
+            anchor=pid.replace(' ', '-'),
+            portfolio_id=pid,
+            total_value=format_money(portfolio_metrics['total_value'], self.currency),
+            total_cost=format_money(portfolio_metrics['total_cost'], self.currency),
+            total_return=format_money(portfolio_metrics['total_return'], self.currency),
+            return_percentage=f"{portfolio_metrics['return_percentage']:.2f}%",
+            num_positions=portfolio_metrics['num_positions'],
+            volatility=f"{risk_metrics['volatility']:.2%}",
+            sharpe_ratio=f"{risk_metrics['sharpe_ratio']:.3f}",
+            max_drawdown=f"{risk_metrics['max_drawdown']:.2%}",
+            var_95=f"{risk_metrics['var_95']:.2%}",
+            mean_return=f"{risk_metrics['mean_return']:.2%}",
+            diversification_ratio=f"{portfolio_metrics['diversification_ratio']:.2f}",
+            largest_position=html.escape(str(portfolio_metrics['largest_position'])),
+            largest_position_weight=f"{portfolio_metrics['largest_position_weight']:.1f}%",
+            recommendations=rec_html
+        ))
+
+    def _end(self) -> None:
+        self.stream.write(self.footer.safe_substitute(count=self.count))
+
+
+WRITERS = {
+    'text': TextReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'csv': CsvReportWriter,
+    'html': HtmlReportWriter,
+}
+
+
+def open_report_writer(target, fmt: Optional[str] = None, **kwargs) -> ReportWriter:
+    """
+    Writer for a path or an open text stream
+    The format defaults to the path's extension (.txt, .jsonl, .csv, .html),
+    or to text for streams. Unknown extensions are rejected before the file
+    is created.
+    """
+    if fmt is None and isinstance(target, str):
+        ext = os.path.splitext(target)[1].lower()
+        if ext not in _EXTENSIONS:
+            raise ValueError(f"Unsupported report type: {target} (expected {', '.join(_EXTENSIONS)} or an explicit fmt)")
+        fmt = _EXTENSIONS[ext]
+    elif fmt is None:
+        fmt = 'text'
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {REPORT_FORMATS}")
+    if isinstance(target, str):
+        stream = open(target, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None)
+        return WRITERS[fmt](stream, close_stream=True, **kwargs)
+    return WRITERS[fmt](target, **kwargs)
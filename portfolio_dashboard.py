@@ -1,133 +1,368 @@
 import streamlit as st
-import requests
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import io
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import plotly.graph_objects as go
-import plotly.express as px
+
+from charts import (ALLOCATION_TOP_N, MAX_CHART_POINTS, TABLE_PAGE_SIZE, ROLLING_METRICS, allocation_pie,
+                    holdings_table, market_frame, page_count, page_slice, rebalancing_frame, rolling_risk_figures)
+from fx import BASE_CURRENCY, CURRENCY_SYMBOLS, SUPPORTED_CURRENCIES, format_money
+from holdings import Holding
+from instrumentation import profile
+from portfolio_core import PortfolioAnalyzer
+from price_refresher import PriceRefresher
+from price_store import PriceStore, MIN_HISTORY_DAYS, historical_portfolio_returns
+from rebalancer import build_account_matrix, rebalance_orders
+from rolling_risk import DEFAULT_WINDOWS
 
 st.set_page_config(page_title="Portfolio Analytics Dashboard", page_icon="", layout="wide")
 
-class PortfolioAnalyzer:
-    """Advanced Portfolio Analytics System"""
-    
-    def __init__(self):
-        self.coingecko_base = "https://api.coingecko.com/api/v3"
-        self.alpha_vantage_key = "demo"
-        self.alpha_vantage_base = "https://www.alphavantage.co/query"
+# Cached resources and data
+MARKET_DATA_TTL = 60      # seconds between background price refreshes
+ANALYTICS_TTL = 300       # seconds metrics and figures stay memoized
+SNAPSHOT_POLL = 2         # seconds between a session's checks for newer prices
+FIRST_SNAPSHOT_TIMEOUT = 15  # seconds to wait for prices of newly tracked assets
+LARGE_PORTFOLIO = 50      # holdings above which large-portfolio rendering is on by default
+
+# Tables send numbers; the browser formats them. Streamlit has presets for
+# some currencies, the rest get a printf format with their symbol.
+MONEY_FORMATS = {'usd': "dollar", 'eur': "euro", 'jpy': "yen"}
+
+
+def money_column(currency):
+    symbol = CURRENCY_SYMBOLS.get(currency, currency.upper() + ' ')
+    return st.column_config.NumberColumn(format=MONEY_FORMATS.get(currency, f"{symbol}%.2f"))
+
+
+def holdings_columns(currency):
+    return {
+        'Quantity': st.column_config.NumberColumn(format="%.4f"),
+        'Value': money_column(currency),
+        'Weight': st.column_config.NumberColumn(format="%.1f%%"),
+        'P&L': money_column(currency),
+    }
+
+
+def rebalancing_columns(currency):
+    return {
+        'Amount': money_column(currency),
+        'Current Weight': st.column_config.NumberColumn(format="%.1f%%"),
+        'Target Weight': st.column_config.NumberColumn(format="%.1f%%"),
+        'Difference': st.column_config.NumberColumn(format="%.1f%%"),
+    }
+
+
+def market_columns(currency):
+    return {
+        'Price': money_column(currency),
+        '24h Change': st.column_config.NumberColumn(format="%.2f%%"),
+    }
+
+# st.fragment graduated from experimental in Streamlit 1.37
+fragment = getattr(st, 'fragment', None) or st.experimental_fragment
+
+
+def warn_session(message):
+    """
+    st.warning for the session whose script is running
+    The shared analyzer is also used by the price refresher thread, which has
+    no session to write to; its errors reach users through snapshot_watcher.
+    """
+    if get_script_run_ctx() is not None:
+        st.warning(message)
+
+
+@st.cache_resource
+def get_analyzer():
+    """One analyzer (and its quote cache / HTTP pool) shared by every session"""
+    return PortfolioAnalyzer(on_error=warn_session)
+
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+
+@st.cache_resource
+def get_refresher():
+    """Background price poller shared by every session: one fetch per cycle for all tracked assets"""
+    def record(snapshot):
+        get_price_store().append_snapshot(snapshot.data)
+    return PriceRefresher(get_analyzer(), interval=MARKET_DATA_TTL, on_snapshot=record).start()
+
+
+def session_id():
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    return st.session_state['session_id']
+
+
+def load_market_data(coin_ids):
+    """
+    Market rows for coin_ids from the latest shared snapshot
+    Only waits when no snapshot covers the assets yet (first visit, or a
+    session asking for new coins); otherwise it never touches the API.
+    """
+    refresher = get_refresher()
+    refresher.track(session_id(), coin_ids)
+    store = refresher.store
+    snapshot = store.latest()
+    deadline = time.monotonic() + FIRST_SNAPSHOT_TIMEOUT
+    while (snapshot is None or not snapshot.covers(coin_ids)) and time.monotonic() < deadline:
+        snapshot = store.wait_for(store.version, deadline - time.monotonic()) or store.latest()
+    if snapshot is None:
+        return pd.DataFrame(), None
+    return snapshot.rows_for(coin_ids), snapshot
+
+
+def cold(cached):
+    """
+    The function behind an st.cache_data wrapper while a profiled run is in progress
+    Profiling measures real work without clearing the cache other sessions share.
+    """
+    return cached.__wrapped__ if st.session_state.get('profiling') else cached
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def analyze_holdings(portfolio, crypto_data, currency, fx):
+    """Value holdings at live prices in `currency` and compute portfolio metrics; also returns unpriced asset ids"""
+    # The portfolio is rebuilt on every rerun, so its holdings are valued in place
+    holdings = portfolio
+    analyzer = get_analyzer()
+    unpriced = analyzer.revalue_holdings(holdings, crypto_data)
+    analyzer.convert_holdings(holdings, currency, fx)
+    portfolio_metrics = analyzer.calculate_portfolio_metrics(holdings)
+    return holdings, portfolio_metrics, unpriced
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def load_risk_inputs(holdings):
+    """Risk metrics from stored price history, or sample returns until there is enough"""
+    history_returns = historical_portfolio_returns(get_price_store(), holdings)
+    if len(history_returns) >= MIN_HISTORY_DAYS:
+        return history_returns, get_analyzer().calculate_risk_metrics(history_returns), True
+    np.random.seed(42)
+    sample_returns = np.random.normal(0.001, 0.02, 100)
+    return history_returns, get_analyzer().calculate_risk_metrics(sample_returns), False
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def allocation_figure(labels, values, top_n):
+    with get_analyzer().metrics.timer('plotly_figure', figure='allocation'):
+        return allocation_pie(labels, values, top_n)
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def rolling_figures(returns, windows, max_points):
+    analyzer = get_analyzer()
+    rolling = analyzer.calculate_rolling_risk_metrics(returns, windows)
+    with analyzer.metrics.timer('plotly_figure', figure='rolling'):
+        return rolling_risk_figures(rolling, max_points)
+
+
+@st.cache_data(ttl=ANALYTICS_TTL, show_spinner=False)
+def rebalancing_table(holdings, target_allocation, band):
+    assets, values, targets, prices = build_account_matrix([holdings], target_allocation)
+    return rebalance_orders(values, targets, assets, prices, band=band)
+
+
+@contextmanager
+def timed_panel(name):
+    """Record how long a panel took to render, per session and in the shared metrics"""
+    start = time.perf_counter()
+    with get_analyzer().metrics.timer('dashboard_panel', panel=name):
+        yield
+    st.session_state.setdefault('panel_timings', {})[name] = (time.perf_counter() - start) * 1000
+
+
+@fragment
+def summary_panel(portfolio_metrics, risk_metrics, currency):
+    with timed_panel("Summary"):
+        col1, col2, col3, col4 = st.columns(4)
         
-    def fetch_crypto_data(self, coin_ids):
-        """Fetch cryptocurrency data from CoinGecko API"""
-        try:
-            url = f"{self.coingecko_base}/coins/markets"
-            params = {
-                'vs_currency': 'usd',
-                'ids': ','.join(coin_ids),
-                'order': 'market_cap_desc',
-                'sparkline': False,
-                'price_change_percentage': '1h,24h,7d,30d'
-            }
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            df = pd.DataFrame(data)
-            available_cols = ['id', 'symbol', 'current_price', 'market_cap', 'total_volume']
-            optional_cols = ['price_change_percentage_24h', 'price_change_percentage_7d_in_currency', 
-                           'price_change_percentage_30d_in_currency']
-            
-            cols_to_return = available_cols.copy()
-            for col in optional_cols:
-                if col in df.columns:
-                    cols_to_return.append(col)
-            
-            return df[cols_to_return]
-        except Exception as e:
-            st.error(f"Error fetching crypto data: {e}")
-            return pd.DataFrame()
-    
-    def calculate_portfolio_metrics(self, holdings):
-        """Calculate comprehensive portfolio metrics"""
-        total_value = sum(h['value'] for h in holdings)
-        total_cost = sum(h['cost_basis'] for h in holdings)
+        with col1:
+            st.metric("Total Value", format_money(portfolio_metrics['total_value'], currency))
+        with col2:
+            st.metric("Total Return", 
+                     format_money(portfolio_metrics['total_return'], currency),
+                     f"{portfolio_metrics['return_percentage']:.2f}%")
+        with col3:
+            st.metric("Sharpe Ratio", f"{risk_metrics['sharpe_ratio']:.3f}")
+        with col4:
+            st.metric("Volatility", f"{risk_metrics['volatility']:.2%}")
+
+
+@fragment
+def composition_panel(holdings, large, currency):
+    with timed_panel("Portfolio Composition"):
+        st.markdown("---")
+        st.subheader("Portfolio Composition")
         
-        total_return = total_value - total_cost
-        return_pct = (total_return / total_cost * 100) if total_cost > 0 else 0
+        col1, col2 = st.columns([2, 1])
         
-        for h in holdings:
-            h['weight'] = (h['value'] / total_value * 100) if total_value > 0 else 0
+        with col1:
+            fig_pie = cold(allocation_figure)(tuple(h['asset'].upper() for h in holdings),
+                                              tuple(h['value'] for h in holdings),
+                                              ALLOCATION_TOP_N if large else None)
+            st.plotly_chart(fig_pie, use_container_width=True)
         
-        weights = np.array([h['weight'] / 100 for h in holdings])
-        herfindahl_index = np.sum(weights ** 2)
-        diversification_ratio = 1 / herfindahl_index if herfindahl_index > 0 else 0
+        with col2:
+            holdings_df = holdings_table(holdings, sort_by_value=large)
+            if large and len(holdings_df) > TABLE_PAGE_SIZE:
+                # Send one page of rows at a time, largest positions first
+                pages = page_count(len(holdings_df))
+                page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+                rows = page_slice(int(page))
+                st.caption(f"Rows {rows.start + 1:,}-{min(rows.stop, len(holdings_df)):,} "
+                           f"of {len(holdings_df):,}, by value")
+                holdings_df = holdings_df.iloc[rows]
+            st.dataframe(holdings_df, use_container_width=True, hide_index=True, column_config=holdings_columns(currency))
+
+
+@fragment
+def risk_panel(portfolio_metrics, risk_metrics, from_history, history_days):
+    with timed_panel("Risk Analysis"):
+        st.markdown("---")
+        st.subheader("Risk Analysis")
+        if not from_history:
+            st.info(f"Only {history_days} days of stored price history - risk metrics use sample returns.")
         
-        return {
-            'total_value': total_value,
-            'total_cost': total_cost,
-            'total_return': total_return,
-            'return_percentage': return_pct,
-            'num_positions': len(holdings),
-            'herfindahl_index': herfindahl_index,
-            'diversification_ratio': diversification_ratio,
-            'largest_position': max(holdings, key=lambda x: x['weight'])['asset'] if holdings else None,
-            'largest_position_weight': max(h['weight'] for h in holdings) if holdings else 0
-        }
-    
-    def calculate_risk_metrics(self, returns):
-        """Calculate portfolio risk metrics"""
-        returns_array = np.array(returns)
+        col1, col2, col3 = st.columns(3)
         
-        volatility = np.std(returns_array) * np.sqrt(252)
-        risk_free_rate = 0.04
-        mean_return = np.mean(returns_array) * 252
-        sharpe_ratio = (mean_return - risk_free_rate) / volatility if volatility > 0 else 0
+        with col1:
+            st.metric("Annual Volatility", f"{risk_metrics['volatility']:.2%}")
+            st.metric("Max Drawdown", f"{risk_metrics['max_drawdown']:.2%}")
+        with col2:
+            st.metric("Sharpe Ratio", f"{risk_metrics['sharpe_ratio']:.3f}")
+            st.metric("Expected Return", f"{risk_metrics['mean_return']:.2%}")
+        with col3:
+            st.metric("Value at Risk (95%)", f"{risk_metrics['var_95']:.2%}")
+            st.metric("Diversification Ratio", f"{portfolio_metrics['diversification_ratio']:.2f}")
+
+
+@fragment
+def rolling_panel(history_returns, large):
+    with timed_panel("Rolling Risk"):
+        st.markdown("---")
+        st.subheader("Rolling Risk")
         
-        cumulative = np.cumprod(1 + returns_array)
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = np.min(drawdown)
+        windows = st.multiselect("Windows (days)", list(DEFAULT_WINDOWS), default=list(DEFAULT_WINDOWS))
+        if not windows:
+            return
         
-        var_95 = np.percentile(returns_array, 5)
+        # Fall back to two years of sample returns so the 252-day window fills
+        rolling_returns = history_returns
+        if len(rolling_returns) < max(windows):
+            rolling_returns = np.random.default_rng(42).normal(0.001, 0.02, 504)
+        figures = cold(rolling_figures)(rolling_returns, tuple(sorted(windows)), MAX_CHART_POINTS if large else None)
         
-        return {
-            'volatility': volatility,
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'var_95': var_95,
-            'mean_return': mean_return
-        }
-    
-    def generate_rebalancing_recommendations(self, holdings, target_weights):
-        """Generate portfolio rebalancing recommendations"""
-        recommendations = []
-        total_value = sum(h['value'] for h in holdings)
+        rolling_tabs = st.tabs(["Volatility", "Sharpe Ratio", "Drawdown", "VaR (95%)"])
+        for tab, metric in zip(rolling_tabs, ROLLING_METRICS):
+            with tab:
+                st.plotly_chart(figures[metric], use_container_width=True)
+
+
+@fragment
+def rebalancing_panel(holdings, target_allocation, currency):
+    with timed_panel("Rebalancing"):
+        st.markdown("---")
+        st.subheader("Rebalancing Recommendations")
         
-        for holding in holdings:
-            current_weight = holding['weight']
-            target_weight = target_weights.get(holding['asset'], 0)
-            difference = target_weight - current_weight
-            
-            if abs(difference) > 2:
-                target_value = total_value * (target_weight / 100)
-                action_value = target_value - holding['value']
-                
-                recommendations.append({
-                    'asset': holding['asset'],
-                    'action': 'BUY' if action_value > 0 else 'SELL',
-                    'current_weight': current_weight,
-                    'target_weight': target_weight,
-                    'difference': difference,
-                    'amount': abs(action_value)
-                })
+        band = st.slider("Rebalancing band (%)", 0.5, 10.0, 2.0, 0.5)
+        orders = cold(rebalancing_table)(holdings, target_allocation, band)
+        if orders.empty:
+            st.caption(f"Every holding is within {band:g}% of its target - no trades needed.")
+            return
+        st.dataframe(rebalancing_frame(orders), use_container_width=True, hide_index=True,
+                     column_config=rebalancing_columns(currency))
+
+
+@fragment
+def market_panel(crypto_data, currency):
+    with timed_panel("Live Market Data"):
+        st.markdown("---")
+        st.subheader("Live Market Data")
         
-        return sorted(recommendations, key=lambda x: abs(x['difference']), reverse=True)
+        st.dataframe(market_frame(crypto_data), use_container_width=True, hide_index=True,
+                     column_config=market_columns(currency))
+
+
+@fragment(run_every=SNAPSHOT_POLL)
+def snapshot_watcher(auto_refresh):
+    """Show the price timestamp and refresh errors, and rerun the app once a newer snapshot is published"""
+    refresher = get_refresher()
+    if refresher.failures and refresher.last_error:
+        st.warning(f"Price refresh failing ({refresher.failures} in a row): {refresher.last_error}")
+    snapshot = refresher.store.latest()
+    if snapshot is None:
+        return
+    fetched = time.strftime('%H:%M:%S', time.localtime(snapshot.fetched_at))
+    st.caption(f"Prices as of {fetched} (update #{snapshot.version})")
+    if auto_refresh and snapshot.version > st.session_state.get('snapshot_version', snapshot.version):
+        st.rerun()
+
+
+def diagnostics_panel():
+    """Timers, counters, cache and HTTP stats, recent errors and the last profile"""
+    registry = get_analyzer().metrics
+    snapshot = registry.snapshot()
+    
+    st.subheader("Timers")
+    timers = pd.DataFrame(registry.summary())
+    if timers.empty:
+        st.caption("Nothing has been timed yet - run an analysis first.")
+    else:
+        st.dataframe(timers.round(3), use_container_width=True, hide_index=True)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.subheader("Quote Cache")
+        st.json(get_analyzer().cache.stats())
+    with col2:
+        st.subheader("Price Refresher")
+        st.json(get_refresher().stats())
+    with col3:
+        st.subheader("HTTP")
+        http = [{'counter': c['name'], **c['labels'], 'value': c['value']}
+                for c in snapshot['counters'] if c['name'].startswith('http_')]
+        if http:
+            st.dataframe(pd.DataFrame(http), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No HTTP requests yet.")
+    
+    st.subheader("This Session's Panel Render Times")
+    timings = st.session_state.get('panel_timings', {})
+    st.dataframe(pd.DataFrame({'Panel': list(timings), 'Render (ms)': list(timings.values())}),
+                 use_container_width=True, hide_index=True)
+    
+    st.subheader("Recent Errors")
+    if snapshot['errors']:
+        errors = pd.DataFrame(snapshot['errors'])
+        errors['time'] = pd.to_datetime(errors['time'], unit='s')
+        st.dataframe(errors.iloc[::-1], use_container_width=True, hide_index=True)
+    else:
+        st.caption("No errors recorded.")
+    
+    if st.session_state.get('profile_report'):
+        with st.expander("Last profiled analysis (cProfile)"):
+            st.code(st.session_state['profile_report'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Download Prometheus metrics", registry.to_prometheus(),
+                           file_name="portfolio_metrics.prom", mime="text/plain")
+    with col2:
+        st.download_button("Download JSON metrics", registry.to_json(),
+                           file_name="portfolio_metrics.json", mime="application/json")
+
 
 # Initialize
 st.title("Portfolio Analytics Dashboard")
 st.markdown("### Real-time Portfolio Analysis & Risk Management")
 
-analyzer = PortfolioAnalyzer()
-
 # Sidebar - Portfolio Input
 st.sidebar.header("Portfolio Settings")
 
@@ -136,140 +371,74 @@ portfolio_type = st.sidebar.radio("Select Portfolio", ["Demo Portfolio", "Custom
 
 if portfolio_type == "Demo Portfolio":
     portfolio = [
-        {'asset': 'bitcoin', 'quantity': 0.5, 'cost_basis': 15000, 'value': 0},
-        {'asset': 'ethereum', 'quantity': 2.0, 'cost_basis': 4000, 'value': 0},
-        {'asset': 'cardano', 'quantity': 1000, 'cost_basis': 500, 'value': 0},
+        Holding('bitcoin', quantity=0.5, cost_basis=15000),
+        Holding('ethereum', quantity=2.0, cost_basis=4000),
+        Holding('cardano', quantity=1000, cost_basis=500),
     ]
     target_allocation = {'bitcoin': 50, 'ethereum': 35, 'cardano': 15}
 else:
     st.sidebar.info("Custom portfolio builder coming soon!")
     portfolio = [
-        {'asset': 'bitcoin', 'quantity': 0.5, 'cost_basis': 15000, 'value': 0},
-        {'asset': 'ethereum', 'quantity': 2.0, 'cost_basis': 4000, 'value': 0},
-        {'asset': 'cardano', 'quantity': 1000, 'cost_basis': 500, 'value': 0},
+        Holding('bitcoin', quantity=0.5, cost_basis=15000),
+        Holding('ethereum', quantity=2.0, cost_basis=4000),
+        Holding('cardano', quantity=1000, cost_basis=500),
     ]
     target_allocation = {'bitcoin': 50, 'ethereum': 35, 'cardano': 15}
 
-# Fetch Data Button
+currency = st.sidebar.selectbox("Valuation currency", SUPPORTED_CURRENCIES, format_func=str.upper)
+auto_refresh = st.sidebar.checkbox("Auto-refresh when new prices arrive", value=True)
+large_mode = st.sidebar.checkbox("Large-portfolio rendering", value=len(portfolio) > LARGE_PORTFOLIO,
+                                 help=f"Top {ALLOCATION_TOP_N} allocation slices, downsampled WebGL charts "
+                                      f"and {TABLE_PAGE_SIZE}-row table pages")
+profile_run = st.sidebar.checkbox("Profile next analysis (cProfile)")
+
+# Results stay on screen across reruns once the button has been clicked
+profiling = False
 if st.sidebar.button("Analyze Portfolio", type="primary"):
-    with st.spinner("Fetching live market data..."):
-        crypto_ids = [h['asset'] for h in portfolio]
-        crypto_data = analyzer.fetch_crypto_data(crypto_ids)
-        
-        if not crypto_data.empty:
-            # Update portfolio values
-            for holding in portfolio:
-                price_data = crypto_data[crypto_data['id'] == holding['asset']]
-                if not price_data.empty:
-                    current_price = price_data.iloc[0]['current_price']
-                    holding['value'] = holding['quantity'] * current_price
-                    holding['current_price'] = current_price
-            
-            # Calculate metrics
-            portfolio_metrics = analyzer.calculate_portfolio_metrics(portfolio)
-            
-            np.random.seed(42)
-            sample_returns = np.random.normal(0.001, 0.02, 100)
-            risk_metrics = analyzer.calculate_risk_metrics(sample_returns)
-            
-            recommendations = analyzer.generate_rebalancing_recommendations(portfolio, target_allocation)
-            
-            # Display Results
-            st.success("Analysis Complete!")
-            
-            # Key Metrics Row
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("Total Value", f"${portfolio_metrics['total_value']:,.2f}")
-            with col2:
-                profit_color = "normal" if portfolio_metrics['total_return'] >= 0 else "inverse"
-                st.metric("Total Return", 
-                         f"${portfolio_metrics['total_return']:,.2f}",
-                         f"{portfolio_metrics['return_percentage']:.2f}%")
-            with col3:
-                st.metric("Sharpe Ratio", f"{risk_metrics['sharpe_ratio']:.3f}")
-            with col4:
-                st.metric("Volatility", f"{risk_metrics['volatility']:.2%}")
-            
-            # Portfolio Composition
-            st.markdown("---")
-            st.subheader("Portfolio Composition")
-            
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                # Pie chart
-                fig_pie = go.Figure(data=[go.Pie(
-                    labels=[h['asset'].upper() for h in portfolio],
-                    values=[h['value'] for h in portfolio],
-                    hole=0.4
-                )])
-                fig_pie.update_layout(title="Asset Allocation", height=400)
-                st.plotly_chart(fig_pie, use_container_width=True)
-            
-            with col2:
-                # Holdings table
-                holdings_df = pd.DataFrame([{
-                    'Asset': h['asset'].upper(),
-                    'Quantity': h['quantity'],
-                    'Value': f"${h['value']:,.2f}",
-                    'Weight': f"{h['weight']:.1f}%",
-                    'P&L': f"${h['value'] - h['cost_basis']:,.2f}"
-                } for h in portfolio])
-                st.dataframe(holdings_df, use_container_width=True, hide_index=True)
-            
-            # Risk Metrics
-            st.markdown("---")
-            st.subheader("Risk Analysis")
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Annual Volatility", f"{risk_metrics['volatility']:.2%}")
-                st.metric("Max Drawdown", f"{risk_metrics['max_drawdown']:.2%}")
-            with col2:
-                st.metric("Sharpe Ratio", f"{risk_metrics['sharpe_ratio']:.3f}")
-                st.metric("Expected Return", f"{risk_metrics['mean_return']:.2%}")
-            with col3:
-                st.metric("Value at Risk (95%)", f"{risk_metrics['var_95']:.2%}")
-                st.metric("Diversification Ratio", f"{portfolio_metrics['diversification_ratio']:.2f}")
+    st.session_state['analyzed'] = True
+    profiling = profile_run
+# Cached steps would return instantly, so a profiled run bypasses the cache (see cold)
+st.session_state['profiling'] = profiling
+
+analysis_tab, diagnostics_tab = st.tabs(["Analysis", "Diagnostics"])
+
+with analysis_tab:
+    if st.session_state.get('analyzed'):
+        profile_buffer = io.StringIO()
+        with profile(stream=profile_buffer) if profiling else nullcontext():
+            with st.spinner("Fetching live market data..."):
+                crypto_data, snapshot = load_market_data(tuple(h['asset'] for h in portfolio))
             
-            # Rebalancing Recommendations
-            if recommendations:
-                st.markdown("---")
-                st.subheader("Rebalancing Recommendations")
+            if not crypto_data.empty:
+                st.session_state['snapshot_version'] = snapshot.version
+                snapshot_watcher(auto_refresh)
+                # Prices arrive in the base currency; one rate table converts everything shown
+                fx = get_analyzer().fetch_fx_rates([currency])
+                if currency not in fx:
+                    st.warning(f"No exchange rate for {currency.upper()}; showing {BASE_CURRENCY.upper()}.")
+                    currency = BASE_CURRENCY
+                holdings, portfolio_metrics, unpriced = cold(analyze_holdings)(portfolio, crypto_data, currency, fx)
+                if unpriced:
+                    st.warning(f"No live price for {', '.join(a.upper() for a in unpriced)}; "
+                               "these positions keep their last known value.")
+                history_returns, risk_metrics, from_history = cold(load_risk_inputs)(holdings)
                 
-                rec_df = pd.DataFrame([{
-                    'Action': rec['action'],
-                    'Asset': rec['asset'].upper(),
-                    'Amount': f"${rec['amount']:,.2f}",
-                    'Current Weight': f"{rec['current_weight']:.1f}%",
-                    'Target Weight': f"{rec['target_weight']:.1f}%",
-                    'Difference': f"{rec['difference']:.1f}%"
-                } for rec in recommendations])
+                st.success("Analysis Complete!")
                 
-                st.dataframe(rec_df, use_container_width=True, hide_index=True)
-            
-            # Live Market Data
-            st.markdown("---")
-            st.subheader("Live Market Data")
-            
-            market_df = crypto_data.copy()
-            market_df['symbol'] = market_df['symbol'].str.upper()
-            market_df['current_price'] = market_df['current_price'].apply(lambda x: f"${x:,.2f}")
-            
-            if 'price_change_percentage_24h' in market_df.columns:
-                market_df['24h Change'] = market_df['price_change_percentage_24h'].apply(lambda x: f"{x:.2f}%")
-            
-            display_cols = ['symbol', 'current_price']
-            if '24h Change' in market_df.columns:
-                display_cols.append('24h Change')
-            
-            st.dataframe(market_df[display_cols], use_container_width=True, hide_index=True)
-            
-        else:
-            st.error("Could not fetch market data. Please check your internet connection.")
+                summary_panel(portfolio_metrics, risk_metrics, currency)
+                composition_panel(holdings, large_mode, currency)
+                risk_panel(portfolio_metrics, risk_metrics, from_history, len(history_returns))
+                rolling_panel(history_returns, large_mode)
+                rebalancing_panel(holdings, target_allocation, currency)
+                market_panel(fx.convert_frame(crypto_data, currency), currency)
+            else:
+                st.error("Could not fetch market data. Please check your internet connection.")
+        if profiling:
+            st.session_state['profile_report'] = profile_buffer.getvalue()
+            st.session_state['profiling'] = False
+
+with diagnostics_tab:
+    diagnostics_panel()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,95 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from holdings import Holding, holding_columns
+
+
+class PriceBook:
+    """
+    Market prices indexed by asset id, with symbol as a fallback key
+    Built once per fetch; revalue() then prices a whole book with one hash
+    join instead of scanning the market frame per holding. When two rows
+    share a symbol the first one wins, which for fetch_crypto_data output is
+    the larger market cap.
+    """
+
+    def __init__(self, ids: Iterable[str], prices, symbols: Optional[Iterable[str]] = None):
+        import pandas as pd
+        self.ids = pd.Index([str(i) for i in ids])
+        self.prices = np.asarray(prices, dtype=np.float64)
+        if len(self.ids) != len(self.prices):
+            raise ValueError("ids and prices must have the same length")
+        # Index.get_indexer needs unique keys; keep the first occurrence of each
+        keep = ~self.ids.duplicated()
+        self.ids, self.prices = self.ids[keep], self.prices[keep]
+        self.symbols = None
+        if symbols is not None:
+            symbols = pd.Index([str(s).lower() for s in symbols])[keep]
+            first = ~symbols.duplicated()
+            self.symbols = symbols[first]
+            self._symbol_rows = np.flatnonzero(first)
+
+    @classmethod
+    def from_market_data(cls, market_data, id_col: str = 'id', price_col: str = 'current_price',
+                         symbol_col: str = 'symbol') -> 'PriceBook':
+        """Index a fetch_crypto_data frame (or any id / price table)"""
+        if market_data.empty:
+            return cls([], [])
+        symbols = market_data[symbol_col].tolist() if symbol_col in market_data.columns else None
+        return cls(market_data[id_col].tolist(), market_data[price_col].to_numpy(dtype=np.float64), symbols)
+
+    @classmethod
+    def from_mapping(cls, prices: Dict[str, float]) -> 'PriceBook':
+        return cls(list(prices), list(prices.values()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, asset) -> bool:
+        return self.lookup([asset])[0] >= 0
+
+    def lookup(self, assets: Iterable[str]) -> np.ndarray:
+        """Row of each asset by id, then by lower-cased symbol; -1 where neither matches"""
+        assets = list(assets)
+        rows = self.ids.get_indexer(assets)
+        missing = np.flatnonzero(rows < 0)
+        if missing.size and self.symbols is not None:
+            by_symbol = self.symbols.get_indexer([str(assets[i]).lower() for i in missing.tolist()])
+            found = by_symbol >= 0
+            rows[missing[found]] = self._symbol_rows[by_symbol[found]]
+        return rows
+
+    def prices_for(self, assets: Iterable[str]) -> np.ndarray:
+        """Price per asset, NaN where the book has no quote"""
+        rows = self.lookup(assets)
+        prices = np.full(len(rows), np.nan)
+        found = rows >= 0
+        prices[found] = self.prices[rows[found]]
+        return prices
+
+    def get(self, asset: str, default: Optional[float] = None) -> Optional[float]:
+        price = self.prices_for([asset])[0]
+        return default if np.isnan(price) else float(price)
+
+    def revalue(self, holdings: List[Dict]) -> List[str]:
+        """
+        Set current_price and value on every holding the book quotes
+        Holdings without a quote keep their value and are returned as a
+        de-duplicated list of unpriced asset ids, in first-seen order.
+        """
+        if not holdings:
+            return []
+        assets, quantity = holding_columns(holdings, 'asset', 'quantity')
+        price = self.prices_for(assets)
+        value = np.asarray(quantity, dtype=np.float64) * price
+        priced = ~np.isnan(price)
+        for i, p, v in zip(np.flatnonzero(priced).tolist(), price[priced].tolist(), value[priced].tolist()):
+            h = holdings[i]
+            if type(h) is Holding:
+                h.current_price = p
+                h.value = v
+            else:
+                h['current_price'] = p
+                h['value'] = v
+        return list(dict.fromkeys(assets[i] for i in np.flatnonzero(~priced).tolist()))
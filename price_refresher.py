@@ -0,0 +1,228 @@
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from market_transport import COINGECKO_MAX_PAGE
+
+DEFAULT_INTERVAL = 60.0
+DEFAULT_JITTER = 0.1
+# Share of the CoinGecko request budget the refresher may spend; the rest
+# stays free for interactive fetches
+DEFAULT_RATE_SHARE = 0.5
+MAX_BACKOFF = 600.0
+# Backoff doubles per failure up to this many doublings; MAX_BACKOFF caps it long before
+MAX_BACKOFF_DOUBLINGS = 16
+# Sessions that stop calling track() are dropped from the union after this long
+DEFAULT_SESSION_TTL = 900.0
+
+
+class PriceSnapshot:
+    """One published set of market rows; immutable once published"""
+
+    __slots__ = ('version', 'fetched_at', 'assets', 'data', 'errors')
+
+    def __init__(self, version: int, fetched_at: float, assets: Tuple[str, ...], data, errors: Tuple[str, ...] = ()):
+        self.version = version
+        self.fetched_at = fetched_at
+        self.assets = assets
+        self.data = data
+        self.errors = errors
+
+    def covers(self, assets: Iterable[str]) -> bool:
+        return set(assets) <= set(self.assets)
+
+    def rows_for(self, assets: Iterable[str]):
+        """Market rows for `assets`, in market-cap order like fetch_crypto_data"""
+        if self.data.empty:
+            return self.data
+        return self.data[self.data['id'].isin(set(assets))].reset_index(drop=True)
+
+
+class SnapshotStore:
+    """
+    Latest PriceSnapshot, shared by every reader in the process
+    latest() is a plain attribute read so readers never wait on a fetch;
+    wait_for() lets a reader block until a newer version is published.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[PriceSnapshot] = None
+        self._changed = threading.Condition()
+
+    @property
+    def version(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else 0
+
+    def latest(self) -> Optional[PriceSnapshot]:
+        return self._snapshot
+
+    def publish(self, data, assets: Iterable[str], errors: Iterable[str] = ()) -> PriceSnapshot:
+        with self._changed:
+            snapshot = PriceSnapshot(self.version + 1, time.time(), tuple(assets), data, tuple(errors))
+            self._snapshot = snapshot
+            self._changed.notify_all()
+        return snapshot
+
+    def wait_for(self, version: int, timeout: Optional[float] = None) -> Optional[PriceSnapshot]:
+        """Block until a snapshot newer than `version` exists; returns it, or None on timeout"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version, timeout)
+            snapshot = self._snapshot
+        return snapshot if snapshot is not None and snapshot.version > version else None
+
+
+class PriceRefresher:
+    """
+    Background poller publishing market snapshots for every tracked asset
+    Sessions register the assets they show with track(); each cycle fetches
+    the union once with fetch_crypto_data(refresh=True), so N sessions cost
+    one set of API calls and the quote cache stays warm for everyone. Cycles
+    are spaced by `interval` with +/- `jitter` (a fraction), never faster
+    than the CoinGecko token bucket allows for the pages needed at
+    `rate_share` of its budget, and back off exponentially while fetches fail.
+    The cycle runs on its own thread, so failures are kept in `last_error`
+    for sessions to display rather than reported to any one of them.
+    """
+
+    def __init__(self, analyzer, store: Optional[SnapshotStore] = None, interval: float = DEFAULT_INTERVAL,
+                 jitter: float = DEFAULT_JITTER, rate_share: float = DEFAULT_RATE_SHARE,
+                 session_ttl: float = DEFAULT_SESSION_TTL,
+                 on_snapshot: Optional[Callable[[PriceSnapshot], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.analyzer = analyzer
+        self.store = store if store is not None else SnapshotStore()
+        self.interval = interval
+        self.jitter = jitter
+        self.rate_share = rate_share
+        self.session_ttl = session_ttl
+        self.on_snapshot = on_snapshot
+        self.clock = clock
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.cycles = 0
+        self.last_duration = 0.0
+        self.next_delay = 0.0
+        self._tracked: Dict[Hashable, Tuple[frozenset, float]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        analyzer.metrics.register_collector('price_refresher', self.stats)
+
+    def track(self, owner: Hashable, assets: Iterable[str]) -> None:
+        """Register (or renew) the assets `owner` wants; wakes the refresher if any are new"""
+        assets = frozenset(assets)
+        with self._lock:
+            known = self._union()
+            self._tracked[owner] = (assets, self.clock())
+        if not assets <= known:
+            self._wake.set()
+
+    def untrack(self, owner: Hashable) -> None:
+        with self._lock:
+            self._tracked.pop(owner, None)
+
+    def _union(self) -> frozenset:
+        return frozenset().union(*(assets for assets, _ in self._tracked.values()))
+
+    def tracked_assets(self) -> List[str]:
+        """Sorted union of assets tracked by live sessions; stale sessions are dropped"""
+        cutoff = self.clock() - self.session_ttl
+        with self._lock:
+            for owner in [o for o, (_, seen) in self._tracked.items() if seen < cutoff]:
+                del self._tracked[owner]
+            return sorted(self._union())
+
+    def min_interval(self, n_assets: int) -> float:
+        """Shortest cycle the CoinGecko budget sustains for this many assets"""
+        bucket = self.analyzer.transport.rate_limits.get('coingecko')
+        if bucket is None or n_assets == 0:
+            return 0.0
+        pages = math.ceil(n_assets / COINGECKO_MAX_PAGE)
+        return pages / (bucket.rate * self.rate_share)
+
+    def _delay(self, n_assets: int) -> float:
+        base = max(self.interval, self.min_interval(n_assets))
+        if self.failures:
+            base = min(base * 2 ** min(self.failures, MAX_BACKOFF_DOUBLINGS), max(MAX_BACKOFF, base))
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def refresh(self) -> Optional[PriceSnapshot]:
+        """Fetch every tracked asset once and publish the result; returns None when nothing was published"""
+        assets = self.tracked_assets()
+        if not assets:
+            return None
+        metrics = self.analyzer.metrics
+        start = time.perf_counter()
+        with metrics.timer('price_refresh'):
+            data = self.analyzer.fetch_crypto_data(assets, refresh=True)
+        self.last_duration = time.perf_counter() - start
+        self.cycles += 1
+        if data.empty:
+            self.failures += 1
+            self.last_error = f"No market data returned for {len(assets)} tracked assets"
+            metrics.count('price_refresh_total', status='error')
+            return None
+        self.failures = 0
+        self.last_error = None
+        metrics.count('price_refresh_total', status='ok')
+        missing = tuple(sorted(set(assets) - set(data['id'])))
+        snapshot = self.store.publish(data, assets, missing)
+        if self.on_snapshot is not None:
+            try:
+                self.on_snapshot(snapshot)
+            except Exception as e:
+                metrics.record_error('price_refresher', f"on_snapshot failed: {e}")
+        return snapshot
+
+    def refresh_now(self) -> None:
+        """Start the next cycle immediately instead of waiting out the delay"""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self.analyzer.metrics.record_error('price_refresher', str(e))
+            self.next_delay = self._delay(len(self.tracked_assets()))
+            self._wake.wait(self.next_delay)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'PriceRefresher':
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = len(self._tracked)
+            assets = len(self._union())
+        snapshot = self.store.latest()
+        return {
+            'sessions': sessions,
+            'assets': assets,
+            'version': self.store.version,
+            'age_seconds': time.time() - snapshot.fetched_at if snapshot is not None else 0.0,
+            'cycles': self.cycles,
+            'failures': self.failures,
+            'last_duration_seconds': self.last_duration,
+            'next_delay_seconds': self.next_delay,
+        }
@@ -0,0 +1,149 @@
+import os
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser('~'), '.portfolio_analytics', 'prices')
+# Minimum stored observations before history replaces sample returns
+MIN_HISTORY_DAYS = 30
+
+_EMPTY_DATES = np.empty(0, dtype='datetime64[D]')
+_EMPTY_PRICES = np.empty(0, dtype=np.float64)
+
+
+def _to_day(value) -> np.datetime64:
+    if value is None:
+        value = datetime.now(timezone.utc).date()
+    return np.datetime64(value, 'D')
+
+
+class PriceStore:
+    """
+    On-disk daily price history, one pair of columnar files per asset
+    `<asset>.dates` holds int64 day numbers and `<asset>.prices` float64
+    closes, both raw little-endian so appends are plain byte writes. Reads
+    memory-map the files and slice the requested date range, so only the
+    pages in that range are touched and nothing is copied. Dates must be
+    appended in order; appending the latest date again overwrites it, so
+    several intraday snapshots keep the last price of the day. Intended for
+    a single writer process.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        # Created by the first append, so read-only use leaves no directory behind
+        self.root = root
+
+    def _paths(self, asset: str) -> Tuple[str, str]:
+        stem = os.path.join(self.root, quote(asset, safe=''))
+        return f"{stem}.dates", f"{stem}.prices"
+
+    def assets(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name[:-len('.dates')]) for name in os.listdir(self.root)
+                      if name.endswith('.dates'))
+
+    def _map(self, asset: str, mode: str = 'r') -> Tuple[np.ndarray, np.ndarray]:
+        dates_path, prices_path = self._paths(asset)
+        if not os.path.exists(dates_path) or not os.path.exists(prices_path):
+            return _EMPTY_DATES, _EMPTY_PRICES
+        # A concurrent append may have extended one file but not yet the other;
+        # only rows present in both are complete
+        n = min(os.path.getsize(dates_path), os.path.getsize(prices_path)) // 8
+        if n == 0:
+            return _EMPTY_DATES, _EMPTY_PRICES
+        days = np.memmap(dates_path, dtype='<i8', mode=mode, shape=(n,))
+        prices = np.memmap(prices_path, dtype='<f8', mode=mode, shape=(n,))
+        return days.view('datetime64[D]'), prices
+
+    def append(self, asset: str, dates, prices) -> int:
+        """Append observations for one asset; returns the number of new rows"""
+        new_dates = np.atleast_1d(np.asarray(dates, dtype='datetime64[D]'))
+        new_prices = np.atleast_1d(np.asarray(prices, dtype=np.float64))
+        if len(new_dates) != len(new_prices):
+            raise ValueError(f"Got {len(new_dates)} dates but {len(new_prices)} prices for {asset}")
+        if len(new_dates) == 0:
+            return 0
+        if np.any(np.diff(new_dates.astype(np.int64)) <= 0):
+            raise ValueError(f"Dates for {asset} must be strictly increasing")
+
+        stored_dates, _ = self._map(asset)
+        if len(stored_dates):
+            last = stored_dates[-1]
+            if new_dates[0] < last:
+                raise ValueError(f"Cannot append {new_dates[0]} before stored {last} for {asset}")
+            if new_dates[0] == last:
+                # Same day as the last stored row: overwrite it in place
+                _, prices_rw = self._map(asset, mode='r+')
+                prices_rw[-1] = new_prices[0]
+                prices_rw.flush()
+                del prices_rw
+                new_dates, new_prices = new_dates[1:], new_prices[1:]
+        del stored_dates
+
+        # Prices first: a row becomes visible to readers once its date is written.
+        # Drop any half-written row an interrupted append left behind.
+        os.makedirs(self.root, exist_ok=True)
+        dates_path, prices_path = self._paths(asset)
+        complete = len(self._map(asset)[0]) * 8
+        for path in (dates_path, prices_path):
+            if os.path.exists(path) and os.path.getsize(path) > complete:
+                os.truncate(path, complete)
+        with open(prices_path, 'ab') as f:
+            f.write(new_prices.astype('<f8').tobytes())
+        with open(dates_path, 'ab') as f:
+            f.write(new_dates.astype('<i8').tobytes())
+        return len(new_dates)
+
+    def append_snapshot(self, market_data, on: Optional[date] = None,
+                        id_col: str = 'id', price_col: str = 'current_price') -> int:
+        """Record one fetch_crypto_data snapshot as the price for `on` (default: today, UTC)"""
+        if market_data is None or market_data.empty:
+            return 0
+        day = _to_day(on)
+        written = 0
+        for asset, price in zip(market_data[id_col].tolist(), market_data[price_col].tolist()):
+            if price is not None and np.isfinite(price):
+                self.append(asset, [day], [price])
+                written += 1
+        return written
+
+    def load(self, asset: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-mapped (dates, prices) views for start <= date <= end"""
+        dates, prices = self._map(asset)
+        lo = 0 if start is None else int(np.searchsorted(dates, _to_day(start), side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _to_day(end), side='right'))
+        return dates[lo:hi], prices[lo:hi]
+
+    def load_frame(self, assets: Iterable[str], start=None, end=None):
+        """Prices for several assets as a (dates x assets) DataFrame"""
+        import pandas as pd
+        columns = {}
+        for asset in dict.fromkeys(assets):
+            dates, prices = self.load(asset, start, end)
+            if len(dates):
+                columns[asset] = pd.Series(np.array(prices), index=pd.DatetimeIndex(np.array(dates)))
+        if not columns:
+            return pd.DataFrame()
+        return pd.DataFrame(columns).sort_index()
+
+
+def historical_portfolio_returns(store: Optional['PriceStore'], holdings: List[dict],
+                                 start=None, end=None) -> np.ndarray:
+    """Daily portfolio returns from stored prices, weighted by current holding values"""
+    if store is None:
+        return _EMPTY_PRICES
+    prices = store.load_frame([h['asset'] for h in holdings], start, end)
+    if prices.empty:
+        return _EMPTY_PRICES
+    returns = prices.pct_change(fill_method=None).dropna()
+
+    values = {}
+    for h in holdings:
+        values[h['asset']] = values.get(h['asset'], 0) + h['value']
+    weights = np.array([values[asset] for asset in returns.columns], dtype=np.float64)
+    if weights.sum() <= 0:
+        return _EMPTY_PRICES
+    return returns.to_numpy() @ (weights / weights.sum())
@@ -0,0 +1,41 @@
+"""
+Terminal progress for long-running CLIs
+Kept free of the analytics imports so any command line tool can report
+progress without loading the portfolio engine.
+"""
+import sys
+import time
+from typing import Optional
+
+
+class ProgressMeter:
+    """Single-line progress and throughput on stderr; total=None for streams of unknown length"""
+
+    def __init__(self, total: Optional[int], enabled: bool = True, stream=sys.stderr, interval: float = 0.2,
+                 unit: str = 'items'):
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.enabled = enabled
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, n: int) -> None:
+        self.done += n
+        now = time.perf_counter()
+        if self.enabled and (now - self._last >= self.interval or self.done == self.total):
+            self._last = now
+            rate = self.done / max(now - self.start, 1e-9)
+            if self.total is None:
+                self.stream.write(f"\r{self.done:,} {self.unit} {rate:,.0f}/s")
+            else:
+                pct = self.done / self.total * 100 if self.total else 100
+                self.stream.write(f"\r{self.done:,}/{self.total:,} {self.unit} ({pct:5.1f}%) {rate:,.0f}/s")
+            self.stream.flush()
+
+    def close(self) -> None:
+        if self.enabled:
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,103 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_BAND = 2.0  # percent drift before a trade is recommended
+
+ORDER_COLUMNS = ['account', 'asset', 'action', 'current_weight', 'target_weight',
+                 'difference', 'amount', 'quantity', 'estimated_cost']
+
+
+def build_account_matrix(accounts: Sequence[List[Dict]],
+                         target_weights: Union[Dict[str, float], Sequence[Dict[str, float]]]
+                         ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lay out per-account holdings and targets on a shared asset axis
+    The asset universe is the union of held and targeted assets, so assets
+    that only appear in the targets get a zero-value column and a BUY.
+    Returns (assets, values, targets, prices) with values/targets shaped
+    (accounts x assets); prices are NaN where no holding quotes them.
+    """
+    if isinstance(target_weights, dict):
+        per_account_targets = [target_weights] * len(accounts)
+    else:
+        per_account_targets = list(target_weights)
+    index = {}
+    for holdings, targets in zip(accounts, per_account_targets):
+        for h in holdings:
+            index.setdefault(h['asset'], len(index))
+        for asset in targets:
+            index.setdefault(asset, len(index))
+
+    values = np.zeros((len(accounts), len(index)))
+    targets = np.zeros((len(accounts), len(index)))
+    prices = np.full(len(index), np.nan)
+    for i, (holdings, account_targets) in enumerate(zip(accounts, per_account_targets)):
+        for h in holdings:
+            j = index[h['asset']]
+            values[i, j] += h['value']
+            price = h.get('current_price')
+            if price is None and h.get('quantity'):
+                price = h['value'] / h['quantity']
+            if price:
+                prices[j] = price
+        for asset, weight in account_targets.items():
+            targets[i, index[asset]] = weight
+    return list(index), values, targets, prices
+
+
+def rebalance_orders(values: np.ndarray, targets: np.ndarray, assets: Sequence[str],
+                     prices: Optional[np.ndarray] = None, band=DEFAULT_BAND,
+                     min_trade: float = 0.0, lot_size=None,
+                     cost_bps: float = 0.0, fixed_cost: float = 0.0):
+    """
+    Generate rebalancing orders for every account in one vectorized pass
+    `values` is (accounts x assets) market value; `targets` the target
+    weights in percent, either per account or one row broadcast to all.
+    `band` (percent, scalar or per asset) is the drift tolerance.
+    `lot_size` (units, scalar or per asset; 0 or NaN for none) rounds order
+    quantities where a price is known. Orders below `min_trade` notional are
+    dropped, and the estimated cost is `cost_bps` of notional plus
+    `fixed_cost` per order.
+    Returns a DataFrame of orders sorted by account, then by absolute drift.
+    """
+    import pandas as pd
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    targets = np.broadcast_to(np.asarray(targets, dtype=np.float64), values.shape)
+    n_assets = values.shape[1]
+    prices = np.full(n_assets, np.nan) if prices is None else np.asarray(prices, dtype=np.float64)
+
+    total = values.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current = np.where(total > 0, values / total * 100, 0.0)
+    difference = targets - current
+    trade_value = total * targets / 100 - values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quantity = trade_value / prices
+    if lot_size is not None:
+        lots = np.broadcast_to(np.asarray(lot_size, dtype=np.float64), (n_assets,))
+        # Assets without a positive lot size trade in any quantity
+        with np.errstate(divide='ignore', invalid='ignore'):
+            quantity = np.where(lots > 0, np.round(quantity / lots) * lots, quantity)
+        priced = np.isfinite(quantity)
+        trade_value = np.where(priced, quantity * prices, trade_value)
+
+    amount = np.abs(trade_value)
+    mask = (np.abs(difference) > np.asarray(band)) & (amount > 0) & (amount >= min_trade)
+
+    account_idx, asset_idx = np.nonzero(mask)
+    order = np.lexsort((-np.abs(difference[mask]), account_idx))
+    account_idx, asset_idx = account_idx[order], asset_idx[order]
+    selected = (account_idx, asset_idx)
+
+    return pd.DataFrame({
+        'account': account_idx,
+        'asset': np.asarray(assets, dtype=object)[asset_idx],
+        'action': np.where(trade_value[selected] > 0, 'BUY', 'SELL'),
+        'current_weight': current[selected],
+        'target_weight': targets[selected],
+        'difference': difference[selected],
+        'amount': amount[selected],
+        'quantity': np.abs(quantity[selected]),
+        'estimated_cost': amount[selected] * cost_bps / 10_000 + fixed_cost
+    }, columns=ORDER_COLUMNS)
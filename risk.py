@@ -0,0 +1,224 @@
+import bisect
+import numpy as np
+from typing import Dict
+
+# Shared metric definitions, matching PortfolioAnalyzer.calculate_risk_metrics
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.04
+VAR_PERCENTILE = 5
+
+RISK_METRIC_NAMES = ['volatility', 'sharpe_ratio', 'max_drawdown', 'var_95', 'mean_return']
+
+
+def batch_risk_metrics(returns, periods_per_year: int = TRADING_DAYS,
+                       risk_free_rate: float = RISK_FREE_RATE):
+    """
+    Calculate risk metrics for many return series at once
+    `returns` is an (n_series x n_days) array or DataFrame; every metric is
+    computed along axis 1 so the whole batch costs one NumPy call per step.
+    Returns a dict of per-series arrays, or a DataFrame indexed like the input
+    when a DataFrame is passed.
+    """
+    index = None
+    if hasattr(returns, 'to_numpy'):
+        index = returns.index
+        returns = returns.to_numpy(dtype=np.float64)
+    returns_array = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+
+    # Volatility (annualized)
+    volatility = np.std(returns_array, axis=1) * np.sqrt(periods_per_year)
+
+    # Sharpe Ratio
+    mean_return = np.mean(returns_array, axis=1) * periods_per_year
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = np.where(volatility > 0, (mean_return - risk_free_rate) / volatility, 0.0)
+
+    # Maximum Drawdown
+    cumulative = np.cumprod(1 + returns_array, axis=1)
+    running_max = np.maximum.accumulate(cumulative, axis=1)
+    drawdown = (cumulative - running_max) / running_max
+    max_drawdown = np.min(drawdown, axis=1)
+
+    # Value at Risk (95% confidence)
+    var_95 = np.percentile(returns_array, VAR_PERCENTILE, axis=1)
+
+    metrics = {
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'var_95': var_95,
+        'mean_return': mean_return
+    }
+
+    if index is not None:
+        import pandas as pd
+        return pd.DataFrame(metrics, index=index, columns=RISK_METRIC_NAMES)
+    return metrics
+
+
+def risk_metrics_row(metrics: Dict, i: int) -> Dict:
+    """Extract the scalar metrics of one series from a batch result"""
+    return {name: float(metrics[name][i]) for name in RISK_METRIC_NAMES}
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimator with bounded memory
+    Keeps the first `exact_window` observations sorted and answers exactly
+    (same linear interpolation as np.percentile). Past that it switches to
+    the P-square algorithm (Jain & Chlamtac, 1985), which tracks five
+    markers and never stores the observations.
+    """
+
+    def __init__(self, p: float, exact_window: int = 512):
+        self.p = p
+        self.exact_window = max(exact_window, 5)
+        self.count = 0
+        self._buffer = []
+        self._heights = None
+        self._positions = None
+        self._desired = None
+        self._increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def _start_markers(self) -> None:
+        """Seed the five P-square markers from the exact buffer"""
+        n = len(self._buffer)
+        self._heights = np.percentile(self._buffer, self._increments * 100)
+        positions = np.round(1 + (n - 1) * self._increments)
+        # Marker positions must be strictly increasing
+        for i in range(1, 5):
+            positions[i] = max(positions[i], positions[i - 1] + 1)
+        self._positions = positions
+        self._desired = 1 + (n - 1) * self._increments
+        self._buffer = None
+
+    def update(self, x: float) -> None:
+        """Add one observation"""
+        self.count += 1
+        if self._buffer is not None:
+            bisect.insort(self._buffer, x)
+            if len(self._buffer) > self.exact_window:
+                self._start_markers()
+            return
+
+        q, n = self._heights, self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = int(np.searchsorted(q, x, side='right')) - 1
+        n[k + 1:] += 1
+        self._desired += self._increments
+
+        for i in range(1, 4):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1.0 if d > 0 else -1.0
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    j = i + int(d)
+                    q[i] = q[i] + d * (q[j] - q[i]) / (n[j] - n[i])
+                n[i] += d
+
+    def value(self) -> float:
+        """Current quantile estimate"""
+        if self._buffer is not None:
+            return float(np.percentile(self._buffer, self.p * 100)) if self._buffer else float('nan')
+        return float(self._heights[2])
+
+
+class StreamingRiskMetrics:
+    """
+    Incrementally updated risk metrics for intraday monitoring
+    Each tick costs O(1) and memory stays bounded regardless of history
+    length. Against calculate_risk_metrics on the same returns:
+      - volatility, mean_return, sharpe_ratio and max_drawdown agree to
+        floating-point rounding (relative error below 1e-9)
+      - var_95 is exact for the first `exact_window` returns, after which
+        the P-square estimate typically stays within 5% of the return
+        standard deviation of the exact percentile
+    """
+
+    def __init__(self, periods_per_year: int = TRADING_DAYS,
+                 risk_free_rate: float = RISK_FREE_RATE, exact_window: int = 512):
+        self.periods_per_year = periods_per_year
+        self.risk_free_rate = risk_free_rate
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._wealth = 1.0
+        self._peak = None
+        self._max_drawdown = 0.0
+        self._var = P2Quantile(VAR_PERCENTILE / 100, exact_window=exact_window)
+
+    def update(self, r: float) -> None:
+        """Feed a single return"""
+        r = float(r)
+        # Welford running mean / variance
+        self.count += 1
+        delta = r - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (r - self._mean)
+
+        # Running peak and drawdown of cumulative wealth
+        self._wealth *= 1 + r
+        if self._peak is None or self._wealth > self._peak:
+            self._peak = self._wealth
+        drawdown = (self._wealth - self._peak) / self._peak
+        if drawdown < self._max_drawdown:
+            self._max_drawdown = drawdown
+
+        self._var.update(r)
+
+    def update_many(self, returns) -> None:
+        """Feed a mini-batch of returns"""
+        batch = np.asarray(returns, dtype=np.float64).ravel()
+        if batch.size == 0:
+            return
+
+        # Merge batch moments into the running ones (Chan et al.)
+        n_a, n_b = self.count, batch.size
+        mean_b = batch.mean()
+        m2_b = np.sum((batch - mean_b) ** 2)
+        delta = mean_b - self._mean
+        total = n_a + n_b
+        self._mean += delta * n_b / total
+        self._m2 += m2_b + delta ** 2 * n_a * n_b / total
+        self.count = total
+
+        cumulative = self._wealth * np.cumprod(1 + batch)
+        running_max = np.maximum.accumulate(cumulative)
+        if self._peak is not None:
+            running_max = np.maximum(running_max, self._peak)
+        drawdown = (cumulative - running_max) / running_max
+        self._max_drawdown = min(self._max_drawdown, float(drawdown.min()))
+        self._wealth = float(cumulative[-1])
+        self._peak = float(running_max[-1])
+
+        for r in batch.tolist():
+            self._var.update(r)
+
+    def metrics(self) -> Dict:
+        """Current metrics in the calculate_risk_metrics format"""
+        if self.count == 0:
+            return {name: float('nan') for name in RISK_METRIC_NAMES}
+
+        volatility = np.sqrt(self._m2 / self.count) * np.sqrt(self.periods_per_year)
+        mean_return = self._mean * self.periods_per_year
+        sharpe_ratio = (mean_return - self.risk_free_rate) / volatility if volatility > 0 else 0
+
+        return {
+            'volatility': volatility,
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': self._max_drawdown,
+            'var_95': self._var.value(),
+            'mean_return': mean_return
+        }
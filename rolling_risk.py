@@ -0,0 +1,107 @@
+import numpy as np
+from collections import deque
+from typing import Dict, Iterable
+
+from risk import TRADING_DAYS, RISK_FREE_RATE, VAR_PERCENTILE
+
+DEFAULT_WINDOWS = (30, 90, 252)
+ROLLING_METRIC_NAMES = ['volatility', 'sharpe_ratio', 'max_drawdown', 'drawdown', 'var_95', 'mean_return']
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing-window maximum in O(n) using a monotonic deque of indices"""
+    items = np.asarray(values, dtype=np.float64).tolist()
+    out = [0.0] * len(items)
+    candidates = deque()
+    for i, v in enumerate(items):
+        while candidates and items[candidates[-1]] <= v:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        out[i] = items[candidates[0]]
+    return np.array(out)
+
+
+def _blocked_window_reduce(values: np.ndarray, window: int, reduce, block_rows: int) -> np.ndarray:
+    """Apply `reduce` to strided window views in row blocks to cap peak memory"""
+    views = np.lib.stride_tricks.sliding_window_view(values, window)
+    out = np.empty(len(views))
+    for start in range(0, len(views), block_rows):
+        out[start:start + block_rows] = reduce(views[start:start + block_rows])
+    return out
+
+
+def _window_max_drawdown(views: np.ndarray) -> np.ndarray:
+    """Max drawdown of each wealth window, measured against the window's own peak"""
+    peaks = np.maximum.accumulate(views, axis=1)
+    return np.min((views - peaks) / peaks, axis=1)
+
+
+def _window_var(views: np.ndarray) -> np.ndarray:
+    """Historical VaR of each return window"""
+    return np.percentile(views, VAR_PERCENTILE, axis=1)
+
+
+def rolling_risk_metrics(returns, windows: Iterable[int] = DEFAULT_WINDOWS,
+                         periods_per_year: int = TRADING_DAYS,
+                         risk_free_rate: float = RISK_FREE_RATE,
+                         block_rows: int = 4096) -> Dict:
+    """
+    Rolling risk metrics for several window lengths in one pass
+    Each window uses the calculate_risk_metrics definitions on the trailing
+    `w` returns. Mean and volatility come from shared cumulative sums, the
+    trailing-peak drawdown from a monotonic-deque rolling max, and max
+    drawdown / VaR from strided window views. Series are aligned with the
+    input and NaN until the window fills.
+    Returns {window: {metric: array}}, or {window: DataFrame} when a pandas
+    Series is passed.
+    """
+    index = None
+    if hasattr(returns, 'to_numpy'):
+        index = returns.index
+        returns = returns.to_numpy(dtype=np.float64)
+    returns_array = np.asarray(returns, dtype=np.float64).ravel()
+    n = len(returns_array)
+
+    # Shared prefix sums; centring keeps the variance difference well conditioned
+    shift = returns_array.mean() if n else 0.0
+    centred = returns_array - shift
+    csum = np.concatenate(([0.0], np.cumsum(centred)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(centred ** 2)))
+    wealth = np.cumprod(1 + returns_array)
+
+    results = {}
+    for w in windows:
+        metrics = {name: np.full(n, np.nan) for name in ROLLING_METRIC_NAMES}
+        if w < 1 or w > n:
+            results[w] = metrics
+            continue
+        tail = slice(w - 1, n)
+
+        window_sum = csum[w:] - csum[:-w]
+        window_sq = csum_sq[w:] - csum_sq[:-w]
+        mean = window_sum / w
+        variance = np.maximum(window_sq / w - mean ** 2, 0.0)
+
+        volatility = np.sqrt(variance) * np.sqrt(periods_per_year)
+        mean_return = (mean + shift) * periods_per_year
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe_ratio = np.where(volatility > 0, (mean_return - risk_free_rate) / volatility, 0.0)
+
+        # Drawdown from the trailing w-period peak
+        metrics['drawdown'] = wealth / rolling_max(wealth, w) - 1
+
+        metrics['volatility'][tail] = volatility
+        metrics['sharpe_ratio'][tail] = sharpe_ratio
+        metrics['mean_return'][tail] = mean_return
+        metrics['max_drawdown'][tail] = _blocked_window_reduce(wealth, w, _window_max_drawdown, block_rows)
+        metrics['var_95'][tail] = _blocked_window_reduce(returns_array, w, _window_var, block_rows)
+        metrics['drawdown'][:w - 1] = np.nan
+
+        results[w] = metrics
+
+    if index is not None:
+        import pandas as pd
+        return {w: pd.DataFrame(m, index=index, columns=ROLLING_METRIC_NAMES) for w, m in results.items()}
+    return results
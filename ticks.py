@@ -0,0 +1,274 @@
+"""
+Streaming tick-to-bar aggregation for intraday risk
+
+Raw trade ticks arrive as chunks of (timestamps, prices, sizes) arrays,
+with timestamps in epoch seconds. They are resampled into OHLCV bars one
+chunk at a time: a chunk's completed bars are emitted and its last, still
+open bar is carried into the next chunk. Memory therefore depends on the
+chunk size, not on how many ticks the stream has. Crypto trades around the
+clock, so bars are annualized on a 365-day calendar:
+
+    chunks = read_tick_csv('btc_trades.csv')
+    metrics = tick_risk_metrics(chunks, interval='5min')
+"""
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from risk import RISK_FREE_RATE, StreamingRiskMetrics
+
+CALENDAR_DAYS = 365
+SECONDS_PER_YEAR = CALENDAR_DAYS * 24 * 60 * 60
+DEFAULT_CHUNK_SIZE = 1_000_000
+RETURN_KINDS = ('simple', 'log')
+BAR_FIELDS = ('start', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+_UNITS = {'s': 1, 'sec': 1, 'min': 60, 'm': 60, 'h': 3600, 'd': 86400}
+_INTERVAL = re.compile(r'^\s*(\d+(?:\.\d+)?)?\s*([a-z]+)\s*$')
+
+Bars = Dict[str, np.ndarray]
+TickChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def parse_interval(interval) -> float:
+    """Bar length in seconds from a number of seconds or a string like '30s', '5min', '1h', '1d'"""
+    if isinstance(interval, (int, float)):
+        seconds = float(interval)
+    else:
+        match = _INTERVAL.match(str(interval).lower())
+        if not match or match.group(2) not in _UNITS:
+            raise ValueError(f"Unrecognised bar interval {interval!r}")
+        seconds = float(match.group(1) or 1) * _UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError("Bar interval must be positive")
+    return seconds
+
+
+def periods_per_year(interval) -> float:
+    """Bars per year on a 365-day, 24-hour calendar (525,600 one-minute bars)"""
+    return SECONDS_PER_YEAR / parse_interval(interval)
+
+
+def chunk_ticks(ticks: Iterable[Tuple[float, float, float]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[TickChunk]:
+    """Group an iterable of (timestamp, price, size) tuples into array chunks"""
+    buffer = []
+    for tick in ticks:
+        buffer.append(tick)
+        if len(buffer) == chunk_size:
+            yield _to_chunk(buffer)
+            buffer = []
+    if buffer:
+        yield _to_chunk(buffer)
+
+
+def _to_chunk(rows) -> TickChunk:
+    array = np.asarray(rows, dtype=np.float64)
+    return array[:, 0], array[:, 1], array[:, 2]
+
+
+def read_tick_csv(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, time_col: str = 'timestamp',
+                  price_col: str = 'price', size_col: str = 'size') -> Iterator[TickChunk]:
+    """
+    Stream tick chunks from a CSV file
+    Timestamps may be epoch seconds or anything pd.to_datetime parses;
+    only the three needed columns are read.
+    """
+    import pandas as pd
+    reader = pd.read_csv(path, usecols=[time_col, price_col, size_col], chunksize=chunk_size)
+    for frame in reader:
+        times = frame[time_col]
+        if pd.api.types.is_numeric_dtype(times):
+            seconds = times.to_numpy(dtype=np.float64)
+        else:
+            seconds = pd.to_datetime(times, utc=True).to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+        yield seconds, frame[price_col].to_numpy(dtype=np.float64), frame[size_col].to_numpy(dtype=np.float64)
+
+
+class OhlcvAggregator:
+    """
+    Resamples time-ordered tick chunks into fixed-interval OHLCV bars
+    update() returns the bars completed by a chunk (possibly none); the
+    last bar stays open until a later tick lands in a newer interval or
+    flush() is called. With fill_gaps, intervals without trades become
+    flat bars at the previous close with zero volume, so every bar spans
+    exactly one interval and annualization stays correct for illiquid assets.
+    """
+
+    def __init__(self, interval='1min', fill_gaps: bool = True):
+        self.interval = parse_interval(interval)
+        self.fill_gaps = fill_gaps
+        self.bars_emitted = 0
+        self.ticks_seen = 0
+        self._open: Optional[list] = None  # [bucket, open, high, low, close, volume, ticks]
+        self._last_bucket: Optional[int] = None
+        self._last_close: Optional[float] = None
+
+    def update(self, timestamps, prices, sizes) -> Bars:
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        if timestamps.size == 0:
+            return _empty_bars()
+        buckets = np.floor(timestamps / self.interval).astype(np.int64)
+        if np.any(np.diff(buckets) < 0) or (self._open is not None and buckets[0] < self._open[0]):
+            raise ValueError("Ticks must be in timestamp order")
+        self.ticks_seen += timestamps.size
+
+        # One group per interval present in the chunk
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], buckets.size]
+        group_bucket = buckets[starts]
+        group_open = prices[starts]
+        group_high = np.maximum.reduceat(prices, starts)
+        group_low = np.minimum.reduceat(prices, starts)
+        group_close = prices[ends - 1]
+        group_volume = np.add.reduceat(sizes, starts)
+        group_ticks = ends - starts
+
+        # Fold the first group into the bar carried over from the last chunk
+        carried = self._open
+        if carried is not None and carried[0] == group_bucket[0]:
+            group_open[0] = carried[1]
+            group_high[0] = max(group_high[0], carried[2])
+            group_low[0] = min(group_low[0], carried[3])
+            group_volume[0] += carried[5]
+            group_ticks[0] += carried[6]
+            carried = None
+
+        # The chunk's last group may continue in the next chunk
+        self._open = [int(group_bucket[-1]), float(group_open[-1]), float(group_high[-1]),
+                      float(group_low[-1]), float(group_close[-1]), float(group_volume[-1]),
+                      int(group_ticks[-1])]
+        completed = {
+            'start': group_bucket[:-1], 'open': group_open[:-1], 'high': group_high[:-1],
+            'low': group_low[:-1], 'close': group_close[:-1], 'volume': group_volume[:-1],
+            'ticks': group_ticks[:-1],
+        }
+        if carried is not None:
+            completed = _concat_bars([_bar_from_state(carried), completed])
+        return self._emit(completed)
+
+    def flush(self) -> Bars:
+        """Close and return the open bar, if any"""
+        if self._open is None:
+            return _empty_bars()
+        bar, self._open = _bar_from_state(self._open), None
+        return self._emit(bar)
+
+    def _emit(self, bars: Bars) -> Bars:
+        if bars['start'].size == 0:
+            return _empty_bars()
+        if self.fill_gaps:
+            bars = _fill_gaps(bars, self._last_bucket, self._last_close)
+        self._last_bucket = int(bars['start'][-1])
+        self._last_close = float(bars['close'][-1])
+        self.bars_emitted += bars['start'].size
+        # Interval indices back to epoch seconds
+        return dict(bars, start=bars['start'] * self.interval)
+
+
+def _empty_bars() -> Bars:
+    return {field: np.empty(0, dtype=np.int64 if field == 'ticks' else np.float64) for field in BAR_FIELDS}
+
+
+def _bar_from_state(state) -> Bars:
+    bucket, open_, high, low, close, volume, ticks = state
+    return {
+        'start': np.array([bucket], dtype=np.int64), 'open': np.array([open_]), 'high': np.array([high]),
+        'low': np.array([low]), 'close': np.array([close]), 'volume': np.array([volume]),
+        'ticks': np.array([ticks], dtype=np.int64),
+    }
+
+
+def _concat_bars(parts) -> Bars:
+    return {field: np.concatenate([part[field] for part in parts]) for field in BAR_FIELDS}
+
+
+def _fill_gaps(bars: Bars, prev_bucket: Optional[int], prev_close: Optional[float]) -> Bars:
+    """Insert flat zero-volume bars for intervals with no ticks"""
+    buckets = bars['start']
+    first = buckets[0] if prev_bucket is None else prev_bucket + 1
+    span = int(buckets[-1] - first + 1)
+    if span == buckets.size:
+        return bars
+    slots = buckets - first
+    # Index of the latest real bar at or before each slot; -1 before the first one
+    latest = np.full(span, -1, dtype=np.int64)
+    latest[slots] = np.arange(buckets.size)
+    latest = np.maximum.accumulate(latest)
+
+    close = np.where(latest >= 0, bars['close'][np.maximum(latest, 0)], prev_close)
+    filled = {'start': np.arange(first, first + span, dtype=np.int64), 'close': close}
+    for field in ('open', 'high', 'low'):
+        values = close.copy()
+        values[slots] = bars[field]
+        filled[field] = values
+    filled['volume'] = np.zeros(span)
+    filled['volume'][slots] = bars['volume']
+    filled['ticks'] = np.zeros(span, dtype=np.int64)
+    filled['ticks'][slots] = bars['ticks']
+    return filled
+
+
+def aggregate_ticks(chunks: Iterable[TickChunk], interval='1min', fill_gaps: bool = True) -> Iterator[Bars]:
+    """Yield OHLCV bar chunks for a stream of tick chunks, flushing the final bar at the end"""
+    aggregator = OhlcvAggregator(interval, fill_gaps)
+    for timestamps, prices, sizes in chunks:
+        bars = aggregator.update(timestamps, prices, sizes)
+        if bars['start'].size:
+            yield bars
+    bars = aggregator.flush()
+    if bars['start'].size:
+        yield bars
+
+
+def bar_returns(bar_chunks: Iterable[Bars], kind: str = 'simple') -> Iterator[np.ndarray]:
+    """Close-to-close returns per bar, carried across chunk boundaries"""
+    if kind not in RETURN_KINDS:
+        raise ValueError(f"kind must be one of {RETURN_KINDS}")
+    previous = None
+    for bars in bar_chunks:
+        closes = bars['close']
+        if previous is not None:
+            closes = np.r_[previous, closes]
+        previous = bars['close'][-1]
+        if closes.size < 2:
+            continue
+        if kind == 'log':
+            yield np.diff(np.log(closes))
+        else:
+            yield closes[1:] / closes[:-1] - 1
+
+
+def tick_risk_metrics(chunks: Iterable[TickChunk], interval='1min', fill_gaps: bool = True,
+                      risk_free_rate: float = RISK_FREE_RATE) -> Dict:
+    """
+    Risk metrics of per-bar simple returns, streamed from tick chunks
+    Annualized with periods_per_year(interval) on a 365-day calendar; the
+    result also carries the bar count, tick count and periods_per_year.
+    Simple returns are used so drawdown and VaR match calculate_risk_metrics;
+    use bar_returns(..., kind='log') for log returns.
+    """
+    aggregator = OhlcvAggregator(interval, fill_gaps)
+    streaming = StreamingRiskMetrics(periods_per_year=periods_per_year(interval), risk_free_rate=risk_free_rate)
+
+    def bars():
+        for timestamps, prices, sizes in chunks:
+            yield aggregator.update(timestamps, prices, sizes)
+        yield aggregator.flush()
+
+    for returns in bar_returns((b for b in bars() if b['start'].size), 'simple'):
+        streaming.update_many(returns)
+    metrics = streaming.metrics()
+    metrics.update(bars=aggregator.bars_emitted, ticks=aggregator.ticks_seen,
+                   periods_per_year=streaming.periods_per_year)
+    return metrics
+
+
+def bars_frame(bar_chunks: Iterable[Bars]):
+    """Collect bar chunks into one DataFrame indexed by UTC bar start (for bars that fit in memory)"""
+    import pandas as pd
+    bars = _concat_bars(list(bar_chunks) or [_empty_bars()])
+    index = pd.to_datetime(bars.pop('start'), unit='s', utc=True)
+    return pd.DataFrame(bars, index=index.rename('start'))